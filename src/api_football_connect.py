@@ -3,22 +3,31 @@
 API-Football (API-Sports) — Stage 6 connector
 
 What this script does:
-- Pulls fixtures for the next 14 days (league + season from .env)
-- Attempts lineups for the first fixture (may be empty until close to kickoff)
+- Pulls fixtures for the next 14 days for every league in APIFOOTBALL_LEAGUE_IDS
+  (follows paging.total when the API splits a response into pages)
+- Pulls lineups, events and statistics for EVERY fixture in the window, concurrently
+  (lineups may be empty until close to kickoff)
 - Pulls injuries for the last 14 days
 - Prints fields and sample values for quick verification
 - Saves raw JSON snapshots under data/raw/api_football/YYYY-MM-DD/
 
+All calls share one token-bucket limiter (APIFOOTBALL_PER_MINUTE) that also
+listens to the quota headers: X-RateLimit-Remaining (per minute) pauses the
+bucket when it hits 0, x-ratelimit-requests-remaining (per day) stops the run
+before it drops below APIFOOTBALL_MIN_DAILY_REMAINING.
+
 Env required (in .env or GitHub Actions env):
   APIFOOTBALL_BASE=https://v3.football.api-sports.io
   APIFOOTBALL_KEY=<your key>
-  APIFOOTBALL_LEAGUE_ID=39
+  APIFOOTBALL_LEAGUE_ID=39          (or APIFOOTBALL_LEAGUE_IDS=39,140,78)
   APIFOOTBALL_SEASON=2024
 """
 
-import sys, os, json, requests
+import sys, os, json, threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
+import http_client
 
 # import your shared utils (provides dump_json -> data/raw/<source>/<YYYY-MM-DD>/...)
 from utils import dump_json
@@ -28,7 +37,40 @@ load_dotenv()
 BASE   = os.getenv("APIFOOTBALL_BASE", "https://v3.football.api-sports.io")
 KEY    = os.getenv("APIFOOTBALL_KEY", "")
 LEAGUE = os.getenv("APIFOOTBALL_LEAGUE_ID", "39")  # EPL
+LEAGUES = [s.strip() for s in os.getenv("APIFOOTBALL_LEAGUE_IDS", LEAGUE).split(",") if s.strip()]
 SEASON = os.getenv("APIFOOTBALL_SEASON", "2024")
+DETAILS = [s.strip() for s in os.getenv("APIFOOTBALL_FIXTURE_DETAILS", "lineups,events,statistics").split(",") if s.strip()]
+PER_MINUTE = int(os.getenv("APIFOOTBALL_PER_MINUTE", "10"))     # free plan: 10/min
+MIN_DAILY = int(os.getenv("APIFOOTBALL_MIN_DAILY_REMAINING", "5"))
+CONCURRENCY = int(os.getenv("APIFOOTBALL_CONCURRENCY", "4"))
+
+class DailyQuotaLow(RuntimeError):
+    pass
+
+class Quota:
+    """Token bucket + feedback from API-Football's rate-limit headers."""
+    def __init__(self, per_minute, min_daily):
+        self.limiter = http_client.RateLimiter(per_minute, per=60)
+        self.min_daily = min_daily
+        self.daily_remaining = None
+        self.lock = threading.Lock()
+
+    def check(self):
+        with self.lock:
+            if self.daily_remaining is not None and self.daily_remaining <= self.min_daily:
+                raise DailyQuotaLow(f"daily requests remaining={self.daily_remaining} (floor {self.min_daily})")
+
+    def observe(self, headers):
+        day = headers.get("x-ratelimit-requests-remaining")
+        minute = headers.get("X-RateLimit-Remaining")
+        with self.lock:
+            if day is not None:
+                day = int(day)
+                self.daily_remaining = day if self.daily_remaining is None else min(self.daily_remaining, day)
+        if minute is not None and int(minute) <= 0:
+            self.limiter.pause(60)    # minute window used up; the next call would 429
+
+QUOTA = Quota(PER_MINUTE, MIN_DAILY)
 
 def headers():
     if not KEY:
@@ -39,14 +81,30 @@ def headers():
     }
 
 def get(path, params=None):
+    QUOTA.check()
     url = f"{BASE}{path}"
-    r = requests.get(url, headers=headers(), params=params or {}, timeout=30)
+    r = http_client.get_with_backoff(url, attempts=3, retry_on=(429, 500, 502, 503, 504),
+                                     limiter=QUOTA.limiter, headers=headers(),
+                                     params=params or {}, timeout=30)
+    QUOTA.observe(r.headers)
     r.raise_for_status()
     data = r.json()
     if not isinstance(data, dict) or "response" not in data:
         raise RuntimeError(f"Unexpected payload at {path}: {str(data)[:300]}")
     return data["response"], data  # (response list/dict, full payload)
 
+def get_all_pages(path, params=None):
+    """Follow paging.total: page 1 first, then the remaining pages concurrently; responses concatenated."""
+    resp, full = get(path, params)
+    total = int((full.get("paging") or {}).get("total") or 1)
+    if total > 1 and isinstance(resp, list):
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+            pages = pool.map(lambda n: get(path, {**(params or {}), "page": n})[0], range(2, total + 1))
+            for more in pages:
+                resp = resp + more
+        full = {**full, "response": resp, "results": len(resp)}
+    return resp, full
+
 def print_fields(title, items):
     print("\n" + "="*72)
     print(title)
@@ -62,13 +120,13 @@ def print_fields(title, items):
     else:
         print("no items")
 
-def fixtures_window():
+def fixtures_window(league=LEAGUE):
     today = datetime.now(timezone.utc).date()
-    params = {"league": LEAGUE, "season": SEASON, "from": str(today), "to": str(today + timedelta(days=14))}
-    resp, full = get("/fixtures", params)
+    params = {"league": league, "season": SEASON, "from": str(today), "to": str(today + timedelta(days=14))}
+    resp, full = get_all_pages("/fixtures", params)
     # export raw snapshot
-    dump_json("api_football", f"fixtures_future_{LEAGUE}_{SEASON}.json", full)
-    print_fields("API-Football fixtures (future 14d)", resp)
+    dump_json("api_football", f"fixtures_future_{league}_{SEASON}.json", full)
+    print_fields(f"API-Football fixtures (future 14d, league {league})", resp)
     if resp:
         f0 = resp[0]
         fid = f0["fixture"]["id"]
@@ -76,29 +134,53 @@ def fixtures_window():
         home = f0["teams"]["home"]["name"]
         away = f0["teams"]["away"]["name"]
         print(f"\nFixture sample: id={fid} kickoff={kickoff}  {home} vs {away}")
-        return fid
-    return None
+    return [f["fixture"]["id"] for f in resp]
 
 def lineups_for_fixture(fid: int):
     resp, full = get("/fixtures/lineups", {"fixture": fid})
     dump_json("api_football", f"lineups_fixture_{fid}.json", full)
-    print_fields("API-Football lineups", resp)
-    if resp:
-        team = resp[0]["team"]["name"]
-        formation = resp[0].get("formation")
-        starts = len(resp[0].get("startXI", []))
-        print(f"\nLineups sample: team={team} formation={formation} startXI={starts}")
+    return resp
+
+def fixture_detail(kind: str, fid: int):
+    """kind in lineups / events / statistics -> raw snapshot <kind>_fixture_<fid>.json"""
+    if kind == "lineups":
+        return lineups_for_fixture(fid)
+    resp, full = get(f"/fixtures/{kind}", {"fixture": fid})
+    dump_json("api_football", f"{kind}_fixture_{fid}.json", full)
+    return resp
+
+def details_for_fixtures(fids):
+    """Every (fixture, detail kind) pair concurrently, paced by the shared limiter."""
+    jobs = [(kind, fid) for fid in fids for kind in DETAILS]
+    counts = {kind: 0 for kind in DETAILS}
+    notes = []
+    def one(job):
+        try:
+            return job, fixture_detail(*job), None
+        except Exception as e:
+            return job, None, e
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        for (kind, fid), resp, err in pool.map(one, jobs):
+            if err is not None:
+                notes.append(f"{kind} fixture={fid}: {err}")
+            elif resp:
+                counts[kind] += 1
+    print(f"\nFixture details: fixtures={len(fids)} non-empty={counts}")
+    if notes:
+        # lineups are often empty/unavailable until close to kickoff; do not fail the job
+        print("Detail notes:", *notes[:10], sep="\n  ")
+    return counts
 
-def injuries_window():
+def injuries_window(league=LEAGUE):
     today = datetime.now(timezone.utc).date()
-    resp, full = get("/injuries", {
-        "league": LEAGUE,
+    resp, full = get_all_pages("/injuries", {
+        "league": league,
         "season": SEASON,
         "from": str(today - timedelta(days=14)),
         "to":   str(today)
     })
-    dump_json("api_football", f"injuries_{LEAGUE}_{SEASON}_last14d.json", full)
-    print_fields("API-Football injuries (last 14d)", resp)
+    dump_json("api_football", f"injuries_{league}_{SEASON}_last14d.json", full)
+    print_fields(f"API-Football injuries (last 14d, league {league})", resp)
     if resp:
         p = resp[0]["player"]["name"]
         t = resp[0]["team"]["name"]
@@ -107,15 +189,15 @@ def injuries_window():
 
 if __name__ == "__main__":
     try:
-        first_fid = fixtures_window()
-        if first_fid:
-            try:
-                lineups_for_fixture(first_fid)
-            except Exception as e:
-                # Often empty until close to kickoff; do not fail the job
-                print("Lineups note (may be empty until close to kickoff):", e)
-        injuries_window()
+        for league in LEAGUES:
+            fids = fixtures_window(league)
+            if fids:
+                details_for_fixtures(fids)
+            injuries_window(league)
+        print(f"\nquota: daily remaining={QUOTA.daily_remaining}")
         print("\n✅ API-Football smoke test + exports complete")
+    except DailyQuotaLow as e:
+        print("Stopped early to protect the daily quota:", e)
     except Exception as e:
         print("❌", repr(e))
         sys.exit(1)
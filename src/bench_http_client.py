@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared HTTP client against a local stub server.
+
+Starts a keep-alive HTTP/1.1 stub on 127.0.0.1 that answers every GET with a
+small JSON body after a fixed delay (simulated server/network latency), then
+times N requests three ways:
+  1) bare requests.get in a loop (what the pull scripts used to do)
+  2) http_client.get in a loop (pooled keep-alive, still serial)
+  3) http_client.fetch_all (pooled + many in flight)
+
+Usage:
+  python src/bench_http_client.py            # N=60, delay=50ms
+  python src/bench_http_client.py 200 0.02
+"""
+
+import sys, time, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+import http_client
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    delay = 0.05
+    body = b'{"ok": true, "items": [1, 2, 3]}'
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub(delay):
+    StubHandler.delay = delay
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<34} {dt:7.3f}s")
+    return dt
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    srv = start_stub(delay)
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    urls = [f"{base}/item/{i}" for i in range(n)]
+    print(f"stub={base} requests={n} delay={delay*1000:.0f}ms "
+          f"host_concurrency={http_client.HOST_CONCURRENCY}")
+
+    def bare():
+        for u in urls:
+            requests.get(u, timeout=10).raise_for_status()
+
+    def pooled():
+        for u in urls:
+            http_client.get(u, timeout=10).raise_for_status()
+
+    def fanout():
+        for r in http_client.fetch_all(urls, return_exceptions=False):
+            r.raise_for_status()
+
+    t_bare = timed("bare requests.get (serial)", bare)
+    t_pool = timed("http_client.get (pooled, serial)", pooled)
+    t_async = timed("http_client.fetch_all (async)", fanout)
+    print(f"\nspeedup vs bare: pooled x{t_bare/t_pool:.1f}, async x{t_bare/t_async:.1f}")
+    srv.shutdown()
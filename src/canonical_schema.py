@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+schemas/canonical_match_schema.json compiled to an Arrow schema, and conform()
+to cast a normalizer's frame to it in one pass:
+
+  match_date_utc / source_last_update   timestamp[ms, UTC] (ISO 8601 parsed by one fixed format)
+  score_home / score_away               nullable int16
+  prices, lines, xG                     float32
+  provider / competition / teams / status   dictionary-encoded strings
+
+"aliases" type source-specific columns like the field they stand for
+(kickoff_utc -> match_date_utc, ft_home_goals -> score_home, ...) without renaming them.
+
+  from canonical_schema import conform, SCHEMA
+  df = conform(df)                       # canonical fields first (missing ones typed null), extras kept
+  fx = conform(fx, fill_missing=False)   # Stage 7 tables: type the columns that are there
+
+  python src/canonical_schema.py [table.parquet ...]   # print the schema / check tables against it
+"""
+
+import sys, json
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from utils import short_obs
+
+# shipped with the code, so found from any working directory
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schemas" / "canonical_match_schema.json"
+
+_ARROW = {
+    "string": pa.string(),
+    "dictionary": pa.dictionary(pa.int32(), pa.string()),
+    "timestamp[ms, UTC]": pa.timestamp("ms", tz="UTC"),
+    "int16": pa.int16(),
+    "float32": pa.float32(),
+    "bool": pa.bool_(),
+}
+_PANDAS = {
+    "string": "string",
+    "dictionary": "category",
+    "timestamp[ms, UTC]": "datetime64[ms, UTC]",
+    "int16": "Int16",
+    "float32": "float32",
+    "bool": "boolean",
+}
+
+def _load(path=SCHEMA_PATH):
+    spec = json.loads(Path(path).read_text(encoding="utf-8"))
+    dtypes = spec.get("dtypes", {})
+    fields = spec["fields"]
+    missing = [f for f in fields if f not in dtypes]
+    if missing:
+        raise ValueError(f"{path}: no dtype for {missing}")
+    return fields, dtypes, spec.get("aliases", {})
+
+FIELDS, DTYPES, ALIASES = _load()
+SCHEMA = pa.schema([(f, _ARROW[DTYPES[f]]) for f in FIELDS])
+
+def dtype_of(col):
+    """Schema dtype name for a canonical field or an alias of one (None otherwise)."""
+    return DTYPES.get(col) or DTYPES.get(ALIASES.get(col))
+
+def parse_utc(s: pd.Series) -> pd.Series:
+    """ISO 8601 strings or datetimes -> datetime64[ms, UTC]; anything unparseable becomes NaT."""
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        t = s.dt.tz_convert("UTC")
+    elif pd.api.types.is_datetime64_dtype(s.dtype):
+        t = s.dt.tz_localize("UTC")
+    else:
+        t = pd.to_datetime(s, utc=True, errors="coerce", format="ISO8601")
+    return t.astype("datetime64[ms, UTC]")
+
+def _cast(s: pd.Series, dtype: str) -> pd.Series:
+    if dtype == "timestamp[ms, UTC]":
+        return parse_utc(s)
+    if dtype in ("int16", "float32"):
+        return pd.to_numeric(s, errors="coerce").astype(_PANDAS[dtype])
+    if dtype == "dictionary":
+        return s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("string").astype("category")
+    return s.astype(_PANDAS[dtype])
+
+def conform(df: pd.DataFrame, fill_missing=True) -> pd.DataFrame:
+    """
+    Cast every canonical (or aliased) column of df to the schema's dtype. fill_missing adds
+    absent canonical fields as typed nulls and puts the canonical fields first.
+    """
+    out = {c: (_cast(df[c], dtype_of(c)) if dtype_of(c) else df[c]) for c in df.columns}
+    if fill_missing:
+        for f in FIELDS:
+            if f not in out:
+                out[f] = pd.Series(pd.NA if DTYPES[f] != "float32" else float("nan"), index=df.index,
+                                   dtype=_PANDAS[DTYPES[f]])
+        order = FIELDS + [c for c in df.columns if c not in DTYPES]
+    else:
+        order = list(df.columns)
+    return pd.DataFrame({c: out[c] for c in order}, index=df.index)
+
+def check(schema: pa.Schema):
+    """Columns of an Arrow schema whose type differs from the canonical one: [(col, got, want)]."""
+    bad = []
+    for f in schema:
+        d = dtype_of(f.name)
+        if d and f.type != _ARROW[d] and not (pa.types.is_dictionary(f.type) and d == "dictionary"):
+            bad.append((f.name, str(f.type), d))
+    return bad
+
+if __name__ == "__main__":
+    try:
+        if len(sys.argv) == 1:
+            short_obs(f"canonical schema ({SCHEMA_PATH})", [f"{f.name}: {f.type}" for f in SCHEMA]
+                      + [f"alias {a} -> {f}" for a, f in ALIASES.items()])
+        for p in sys.argv[1:]:
+            bad = check(pq.read_schema(p))
+            short_obs(p, [f"{c}: {got} (want {want})" for c, got, want in bad] or ["conforms"])
+        print("\n✅ canonical_schema complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+SQLite catalog of raw snapshots: data/raw/_catalog.sqlite
+
+The writers in utils.py record every snapshot as it is saved (source, date,
+name, payload bytes, record count, sha256, top-level keys), so readers ask the
+catalog instead of listing dated folders and re-opening files:
+  latest_date(source), dates(source), files(source, date, pattern),
+  entries(source, date, pattern), records(source, date, contains)
+
+A source with no catalog rows yet (files saved before the catalog existed)
+falls back to the directory scan; `reindex` fills the catalog from disk.
+
+  python src/catalog.py             # per-source summary
+  python src/catalog.py reindex     # (re)build from the snapshots already on disk
+"""
+
+import sys, re, json, sqlite3, threading, time, fnmatch
+from pathlib import Path
+
+RAW = Path("data") / "raw"
+DB = RAW / "_catalog.sqlite"
+# list fields that hold the records of a dict payload (API wrappers)
+LIST_FIELDS = ("response", "matches", "competitions", "standings", "scorers")
+DATE_DIR = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    source   TEXT NOT NULL,
+    date     TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    stem     TEXT NOT NULL,
+    bytes    INTEGER,
+    records  INTEGER,
+    sha256   TEXT,
+    keys     TEXT,
+    saved_at REAL,
+    PRIMARY KEY (source, date, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshots_sha ON snapshots (sha256);
+"""
+
+def _connect():
+    DB.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(DB, timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+def describe(obj):
+    """(record count, top-level keys) of a JSON payload."""
+    if isinstance(obj, dict) and isinstance(obj.get("json"), (dict, list)):
+        obj = obj["json"]   # API-Football fail-safe wrapper
+    if isinstance(obj, list):
+        first = next((x for x in obj if isinstance(x, dict)), None)
+        return len(obj), sorted(first) if first else []
+    if isinstance(obj, dict):
+        for k in LIST_FIELDS:
+            if isinstance(obj.get(k), list):
+                return len(obj[k]), sorted(obj)
+        return 1, sorted(obj)
+    return 0, []
+
+def describe_text(name, text):
+    if name.endswith(".csv"):
+        lines = text.splitlines()
+        return max(len(lines) - 1, 0), lines[0].split(",") if lines else []
+    return text.count("\n"), []
+
+def record(path, sha256, nbytes, records, keys):
+    """Upsert one snapshot saved at data/raw/<source>/<date>/<name>."""
+    path = Path(path)
+    from utils import json_stem
+    row = (path.parent.parent.name, path.parent.name, path.name, json_stem(path.name) or path.name,
+           nbytes, records, sha256, json.dumps(list(keys)), time.time())
+    with _lock:
+        con = _connect()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO snapshots VALUES (?,?,?,?,?,?,?,?,?)", row)
+        finally:
+            con.close()
+
+def _query(sql, args=()):
+    if not DB.exists():
+        return []
+    con = _connect()
+    try:
+        return con.execute(sql, args).fetchall()
+    finally:
+        con.close()
+
+def _dated_dirs(src):
+    # only YYYY-MM-DD folders: a source dir can hold others (the StatsBomb crawl mirror open_data/)
+    return [p for p in sorted(src.iterdir()) if p.is_dir() and DATE_DIR.match(p.name)] if src.exists() else []
+
+def _scan_dates(source):
+    return [p.name for p in _dated_dirs(RAW / source)]
+
+def sources():
+    rows = [r[0] for r in _query("SELECT DISTINCT source FROM snapshots ORDER BY source")]
+    if rows or not RAW.exists():
+        return rows
+    return sorted(p.name for p in RAW.iterdir() if p.is_dir() and not p.name.startswith("_"))
+
+def dates(source):
+    rows = [r[0] for r in _query("SELECT DISTINCT date FROM snapshots WHERE source=? ORDER BY date", (source,))]
+    return rows or _scan_dates(source)
+
+def latest_date(source):
+    row = _query("SELECT MAX(date) FROM snapshots WHERE source=?", (source,))
+    if row and row[0][0]:
+        return row[0][0]
+    ds = _scan_dates(source)
+    return ds[-1] if ds else None
+
+def entries(source, date, pattern="*"):
+    """Catalog rows (dicts) for one dated folder whose file name matches pattern."""
+    rows = _query("SELECT name, stem, bytes, records, sha256, keys FROM snapshots "
+                  "WHERE source=? AND date=? ORDER BY name", (source, date))
+    if not rows:
+        from utils import iter_snapshots
+        rows = [(p.name, p.name, None, None, None, "[]") for p in iter_snapshots(RAW / source / date)]
+    return [{"name": n, "stem": s, "bytes": b, "records": r, "sha256": h, "keys": json.loads(k or "[]"),
+             "path": RAW / source / date / n}
+            for n, s, b, r, h, k in rows if fnmatch.fnmatch(n, pattern)]
+
+def files(source, date, pattern="*"):
+    """JSON snapshot paths like utils.iter_json_files (pattern matches the name without suffix)."""
+    from utils import json_stem
+    return [e["path"] for e in entries(source, date)
+            if json_stem(e["name"]) is not None and fnmatch.fnmatch(e["stem"], pattern)]
+
+def records(source, date=None, contains=None):
+    """Sum of record counts in a dated folder (default: the latest), optionally by name substring."""
+    date = date or latest_date(source)
+    if date is None:
+        return 0
+    sql, args = "SELECT COUNT(*), SUM(records) FROM snapshots WHERE source=? AND date=?", [source, date]
+    if contains:
+        sql += " AND instr(name, ?) > 0"
+        args.append(contains)
+    row = _query(sql, tuple(args))
+    if row and row[0][0]:
+        return int(row[0][1] or 0)
+    # not catalogued: open the JSON snapshots like the old directory scan did
+    from utils import read_json
+    total = 0
+    for p in files(source, date):
+        if contains and contains not in p.name:
+            continue
+        try:
+            total += describe(read_json(p))[0]
+        except Exception:
+            pass
+    return total
+
+def reindex():
+    """Catalog every snapshot already on disk (reads each file once)."""
+    from utils import iter_snapshots, json_stem, load_manifest, read_json, read_text, resolve_snapshot, snapshot_sha256
+    n = 0
+    for src in (p for p in sorted(RAW.iterdir()) if p.is_dir() and not p.name.startswith("_")):
+        for day in _dated_dirs(src):
+            manifest = load_manifest(day)
+            for p in iter_snapshots(day):
+                try:
+                    if json_stem(p.name) is not None:
+                        recs, keys = describe(read_json(p))
+                    else:
+                        recs, keys = describe_text(p.name, read_text(p))
+                    size = (manifest.get(p.name) or {}).get("bytes") or resolve_snapshot(p).stat().st_size
+                    record(p, snapshot_sha256(p), size, recs, keys)
+                    n += 1
+                except Exception as e:
+                    print(f"skip {p}: {e!r}")
+    return n
+
+if __name__ == "__main__":
+    from utils import short_obs
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == "reindex":
+            print(f"reindexed {reindex()} snapshots")
+        rows = _query("SELECT source, COUNT(DISTINCT date), COUNT(*), SUM(records), SUM(bytes), MAX(date) "
+                      "FROM snapshots GROUP BY source ORDER BY source")
+        short_obs(f"catalog → {DB}", [f"{s}: dates={d} files={f} records={r} bytes={b} latest={m}"
+                                      for s, d, f, r, b, m in rows] or ["empty — run pulls or `reindex`"])
+        print("\n✅ catalog complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
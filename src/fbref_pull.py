@@ -1,8 +1,35 @@
 #!/usr/bin/env python3
-import sys, time, requests, pandas as pd
-from utils import env, dump_text, print_fields
+"""
+FBref pull.
+
+- Goes straight to the requested table ids with lxml (FBref hides most tables
+  inside HTML comments; we scan the raw page text, so commented tables are found too)
+- Scrapes many pages (squad, player, match logs) under one polite global rate limit
+- Caches pages by content hash: a page fetched within FBREF_PAGE_TTL_HOURS is not
+  re-downloaded, and an unchanged page (same hash) is not re-parsed
+
+Env:
+  FBREF_LEAGUE_URL=https://fbref.com/en/comps/9/stats/Premier-League-Stats
+  FBREF_TABLE_IDS=stats_squads_standard_for,stats_standard
+  FBREF_PAGES=<url>|<table_id>,<table_id>;<url>|<table_id>   (optional; default = league url + table ids)
+  FBREF_MIN_INTERVAL=6          seconds between requests (FBref bans faster scrapers)
+  FBREF_PAGE_TTL_HOURS=6
+"""
+
+import sys, json, hashlib, time, re
+import pandas as pd
+import lxml.html
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils import env, dump_text, print_fields, short_obs
+import http_client
 
 URL = env("FBREF_LEAGUE_URL", "https://fbref.com/en/comps/9/stats/Premier-League-Stats")
+TABLE_IDS = [t.strip() for t in env("FBREF_TABLE_IDS", "stats_squads_standard_for,stats_standard").split(",") if t.strip()]
+PAGES_SPEC = env("FBREF_PAGES", "")
+MIN_INTERVAL = float(env("FBREF_MIN_INTERVAL", "6"))
+PAGE_TTL = float(env("FBREF_PAGE_TTL_HOURS", "6")) * 3600
+CACHE = Path("data/cache/fbref")
 
 # FBref sometimes blocks CI; send friendlier headers and retry gently.
 HEADERS = {
@@ -12,46 +39,154 @@ HEADERS = {
     "Referer": "https://fbref.com/"
 }
 
-def fetch_html_with_retries(url, attempts=3, backoff=3):
-    last_err = None
-    for i in range(attempts):
-        try:
-            r = requests.get(url, headers=HEADERS, timeout=30)
-            if r.status_code == 403:
-                # FBref blocked us (often on GitHub Actions). Try again after a pause.
-                last_err = requests.HTTPError(f"403 Forbidden on attempt {i+1}")
-                time.sleep(backoff)
+# one limiter for every FBref request in this process
+LIMITER = http_client.RateLimiter(1, per=MIN_INTERVAL)
+
+def parse_pages(spec):
+    """'url|t1,t2;url2|t3' -> [(url, [t1, t2]), (url2, [t3])]"""
+    pages = []
+    for entry in [e.strip() for e in spec.split(";") if e.strip()]:
+        url, _, ids = entry.partition("|")
+        pages.append((url.strip(), [t.strip() for t in ids.split(",") if t.strip()] or TABLE_IDS))
+    return pages
+
+class PageCache:
+    """url -> (sha256, fetched_at) index + page bodies stored once per content hash."""
+    def __init__(self, root):
+        self.root = root
+        self.index_path = root / "index.json"
+        self.index = json.loads(self.index_path.read_text(encoding="utf-8")) if self.index_path.exists() else {}
+
+    def fresh(self, url):
+        ent = self.index.get(url)
+        if ent and time.time() - ent["fetched_at"] < PAGE_TTL and (self.root / "pages" / f"{ent['sha']}.html").exists():
+            return ent["sha"]
+        return None
+
+    def read(self, sha):
+        return (self.root / "pages" / f"{sha}.html").read_text(encoding="utf-8")
+
+    def put(self, url, html):
+        sha = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        p = self.root / "pages" / f"{sha}.html"
+        if not p.exists():
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text(html, encoding="utf-8")
+        self.index[url] = {"sha": sha, "fetched_at": time.time()}
+        return sha
+
+    def table_path(self, sha, table_id):
+        return self.root / "tables" / f"{sha}_{table_id}.parquet"
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path.write_text(json.dumps(self.index, indent=2), encoding="utf-8")
+
+def fetch_html_with_retries(url, attempts=3):
+    """Backoff + jitter under the global limiter; returns None (not an exception) when blocked."""
+    try:
+        r = http_client.get_with_backoff(url, attempts=attempts, base=3.0, limiter=LIMITER,
+                                         headers=HEADERS, timeout=30, memo=False)
+    except Exception as e:
+        print(f"FBref fetch failed after {attempts} attempts: {e!r}")
+        return None
+    if not r.ok:
+        # FBref blocks us on GitHub Actions fairly often (403); not worth failing CI over
+        print(f"FBref fetch failed after {attempts} attempts: HTTP {r.status_code}")
+        return None
+    return r.text
+
+def _table_fragment(html, table_id):
+    """Raw <table ...id="table_id"...>...</table> slice, whether or not it sits in a comment."""
+    m = re.search(r'<table\b[^>]*\bid="%s"' % re.escape(table_id), html)
+    if not m:
+        return None
+    end = html.find("</table>", m.start())
+    return html[m.start(): end + len("</table>")] if end != -1 else None
+
+def extract_table(html, table_id) -> pd.DataFrame:
+    """One FBref stats table by id -> DataFrame keyed by each cell's data-stat name."""
+    frag = _table_fragment(html, table_id)
+    if frag is None:
+        return pd.DataFrame()
+    table = lxml.html.fromstring(frag)
+    cols, rows = None, []
+    for tr in table.iterfind(".//tbody/tr"):
+        cls = tr.get("class") or ""
+        if "thead" in cls or "over_header" in cls or "spacer" in cls:
+            continue   # repeated header rows inside long tables
+        cells = [c for c in tr if c.tag in ("th", "td")]
+        row = {c.get("data-stat") or f"col_{i}": c.text_content().strip() for i, c in enumerate(cells)}
+        if cols is None:
+            cols = list(row)
+        rows.append(row)
+    # keyed by data-stat: a ragged row (colspan, missing cells) fills blanks instead of failing
+    df = pd.DataFrame(rows, columns=cols).fillna("") if cols else pd.DataFrame()
+    for c in df.columns:
+        num = pd.to_numeric(df[c].str.replace(",", "", regex=False), errors="coerce")
+        # only convert columns that are fully numeric (blank cells allowed)
+        if num.notna().sum() == (df[c] != "").sum() and num.notna().any():
+            df[c] = num
+    return df
+
+def scrape(pages, cache):
+    """Fetch (or reuse) every page under the limiter, then extract the requested tables."""
+    def one(page):
+        url, ids = page
+        sha, note = cache.fresh(url), "cached"
+        if sha is None:
+            html = fetch_html_with_retries(url)
+            if html is None:
+                return url, {}, "fetch failed"
+            sha, note = cache.put(url, html), "fetched"
+        html = None
+        out = {}
+        for tid in ids:
+            tp = cache.table_path(sha, tid)
+            if tp.exists():
+                out[tid] = pd.read_parquet(tp)   # same page content -> same table, skip parsing
                 continue
-            r.raise_for_status()
-            return r.text
-        except requests.HTTPError as e:
-            last_err = e
-            time.sleep(backoff)
-        except Exception as e:
-            last_err = e
-            time.sleep(backoff)
-    # Give up but do NOT hard-fail CI: print and exit 0 so the rest of pipeline continues.
-    print(f"FBref fetch failed after {attempts} attempts: {last_err}")
-    sys.exit(0)
+            html = html or cache.read(sha)
+            df = extract_table(html, tid)
+            if not df.empty:
+                tp.parent.mkdir(parents=True, exist_ok=True)
+                df.to_parquet(tp, index=False)
+            out[tid] = df
+        return url, out, note
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="fbref") as pool:
+        results = list(pool.map(one, pages))
+    cache.save()
+    return results
+
+def slug(url):
+    return re.sub(r"[^A-Za-z0-9]+", "_", url.split("fbref.com/")[-1]).strip("_")[:80]
 
 if __name__ == "__main__":
     try:
-        html = fetch_html_with_retries(URL)
-        if not html:
-            # fetch already exited 0 on failure; this is just a safeguard
-            sys.exit(0)
+        pages = parse_pages(PAGES_SPEC) if PAGES_SPEC else [(URL, TABLE_IDS)]
+        cache = PageCache(CACHE)
+        results = scrape(pages, cache)
+        notes = []
+        for url, tables, note in results:
+            found = {t: df for t, df in tables.items() if not df.empty}
+            notes.append(f"{slug(url)}: {note}, tables={ {t: len(df) for t, df in tables.items()} }")
+            for tid, df in found.items():
+                dump_text("fbref", f"{slug(url)}_{tid}.csv", df.to_csv(index=False))
+        short_obs("fbref pages", notes)
 
-        dump_text("fbref", "page.html", html)
-
-        # Parse tables (largest by area)
-        tables = pd.read_html(html, header=1)
-        df = max(tables, key=lambda t: t.shape[0] * t.shape[1])
-        print(f"fbref tables found={len(tables)}, chosen rows={len(df)}, cols={len(df.columns)}")
-        print_fields("fbref chosen table columns", [df.head(1).to_dict(orient="records")[0]])
+        # sample output from the first table we got
+        first = next((df for _, tables, _ in results for df in tables.values() if not df.empty), None)
+        if first is None:
+            # page blocked or table ids changed — do NOT hard-fail CI
+            print("FBref: no requested tables extracted")
+            sys.exit(0)
+        print(f"\nfbref chosen rows={len(first)}, cols={len(first.columns)}")
+        print_fields("fbref chosen table columns", [first.head(1).to_dict(orient="records")[0]])
 
         # Show a few real values
         print("\nexample values:")
-        print(df.head(5).to_string(index=False))
+        print(first.head(5).to_string(index=False))
 
         print("\n✅ fbref_pull complete")
     except SystemExit as se:
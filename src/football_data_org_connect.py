@@ -3,20 +3,31 @@
 Football-Data.org v4 — Stage 6 connector
 
 What this script does:
-- Lists competitions (v4)
-- Pulls matches (future 14 days and past 30 days) for a competition code (e.g., PL)
-- Pulls standings and scorers
+- Lists competitions (v4); each entry carries a lastUpdated stamp
+- For every code in FOOTBALLDATA_COMPETITIONS whose lastUpdated moved since the
+  last run (or that has no local store yet):
+    matches (past 30 days .. next 14 days, one call), standings, scorers
+- Merges matches into an incremental per-competition store
+  (data/store/footballdata_org/<code>/matches.json, keyed by match id)
 - Prints fields and sample values for verification
 - Saves raw JSON snapshots under data/raw/footballdata_org/YYYY-MM-DD/
 
+Every request shares one limiter sized to FD.org's per-minute quota
+(FOOTBALLDATA_PER_MINUTE, free tier 10) and honors X-Requests-Available-Minute /
+X-RequestCounter-Reset, so a dozen competitions never trip a 429.
+
 Env required (in .env or GitHub Actions env):
   FOOTBALLDATA_BASE=https://api.football-data.org/v4
   FOOTBALLDATA_TOKEN=<your token>
+  FOOTBALLDATA_COMPETITIONS=PL,BL1,SA,PD,FL1,DED,PPL,ELC,CL,EC,WC,BSA   (default PL)
 """
 
-import sys, os, json, requests
+import sys, os, json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from dotenv import load_dotenv
+import http_client
 
 from utils import dump_json
 
@@ -24,17 +35,28 @@ load_dotenv()
 
 BASE  = os.getenv("FOOTBALLDATA_BASE", "https://api.football-data.org/v4")
 TOKEN = os.getenv("FOOTBALLDATA_TOKEN", "")
+CODES = [c.strip() for c in os.getenv("FOOTBALLDATA_COMPETITIONS", "PL").split(",") if c.strip()]
+PER_MINUTE = int(os.getenv("FOOTBALLDATA_PER_MINUTE", "10"))
+STORE = Path("data/store/footballdata_org")
 
 HDR = {
     "X-Auth-Token": TOKEN,
     "User-Agent": "betmachine-stage6/football-data.org"
 }
 
+# shared by every request in this process (evenly spaced: 10/min -> one call per 6s)
+LIMITER = http_client.RateLimiter(PER_MINUTE, per=60)
+
 def get(path, params=None):
     if not TOKEN:
         raise RuntimeError("Missing FOOTBALLDATA_TOKEN in environment")
     url = f"{BASE}{path}"
-    r = requests.get(url, headers=HDR, params=params or {}, timeout=30)
+    r = http_client.get_with_backoff(url, attempts=3, retry_on=(429, 500, 502, 503, 504),
+                                     limiter=LIMITER, headers=HDR, params=params or {},
+                                     timeout=30, memo=False)
+    available = r.headers.get("X-Requests-Available-Minute")
+    if available is not None and int(available) <= 0:
+        LIMITER.pause(float(r.headers.get("X-RequestCounter-Reset") or 60))
     r.raise_for_status()
     return r.json()
 
@@ -61,15 +83,14 @@ def comps():
     return comps
 
 def matches_window(code="PL"):
+    """Past 30 days .. next 14 days in one call, merged into the competition's store."""
     today = datetime.now(timezone.utc).date()
-
-    fut = get(f"/competitions/{code}/matches", {"dateFrom": str(today), "dateTo": str(today + timedelta(days=14))})
-    dump_json("footballdata_org", f"matches_future_{code}.json", fut)
-    print_fields(f"FD.org matches future 14d ({code})", fut.get("matches", []))
-
-    pst = get(f"/competitions/{code}/matches", {"dateFrom": str(today - timedelta(days=30)), "dateTo": str(today)})
-    dump_json("footballdata_org", f"matches_past_{code}.json", pst)
-    print_fields(f"FD.org matches past 30d ({code})", pst.get("matches", []))
+    data = get(f"/competitions/{code}/matches", {
+        "dateFrom": str(today - timedelta(days=30)), "dateTo": str(today + timedelta(days=14))
+    })
+    merged = merge_into_store(code, data.get("matches", []))
+    print_fields(f"FD.org matches past 30d + future 14d ({code})", data.get("matches", []))
+    return merged
 
 def standings(code="PL"):
     st = get(f"/competitions/{code}/standings")
@@ -81,13 +102,60 @@ def scorers(code="PL"):
     dump_json("footballdata_org", f"scorers_{code}.json", sc)
     print_fields(f"FD.org scorers ({code})", sc.get("scorers", []))
 
+def load_store(code):
+    p = STORE / code / "matches.json"
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+def merge_into_store(code, matches):
+    """Upsert matches by id (newer payload wins); returns the full merged store."""
+    store = load_store(code)
+    for m in matches:
+        store[str(m.get("id"))] = m
+    p = STORE / code / "matches.json"
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(store, ensure_ascii=False), encoding="utf-8")
+    return store
+
+def sync(competitions):
+    """Schedule matches/standings/scorers for changed competitions under the shared limiter."""
+    state_path = STORE / "state.json"
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+    stamps = {c.get("code"): c.get("lastUpdated") for c in competitions}
+
+    changed = [code for code in CODES
+               if not (STORE / code / "matches.json").exists() or state.get(code) != stamps.get(code)]
+    skipped = [code for code in CODES if code not in changed]
+    jobs = [(fn, code) for code in changed for fn in (matches_window, standings, scorers)]
+    failed = set()
+    def one(job):
+        fn, code = job
+        try:
+            fn(code)
+        except Exception as e:
+            failed.add(code)
+            print(f"FD.org {fn.__name__}({code}) failed: {e!r}")
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(one, jobs))
+
+    for code in changed:
+        if code not in failed and stamps.get(code):
+            state[code] = stamps[code]
+    STORE.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+    # the store is the source of truth: snapshot every competition, synced or not (no API cost)
+    for code in CODES:
+        store = load_store(code)
+        if store:
+            dump_json("footballdata_org", f"matches_{code}.json",
+                      {"competition": {"code": code}, "matches": list(store.values())})
+    print(f"\nFD.org sync: refreshed={changed} unchanged={skipped} failed={sorted(failed)} "
+          f"requests={1 + len(jobs)}")
+
 if __name__ == "__main__":
     try:
         cs = comps()
-        # Premier League (PL) as default probe; adjust/add codes if you want more
-        matches_window("PL")
-        standings("PL")
-        scorers("PL")
+        sync(cs)
         print("\n✅ Football-Data.org smoke test + exports complete")
     except Exception as e:
         print("❌", repr(e))
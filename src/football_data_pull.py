@@ -1,13 +1,202 @@
 #!/usr/bin/env python3
-import sys, io, requests, pandas as pd
-from utils import UA, dump_text, print_fields, short_obs
+"""
+Football-Data.co.uk pull.
+
+Default (smoke) mode: one CSV (E0 2024/25), saved raw, with a few sample values printed.
+
+Backfill mode (FD_BACKFILL=1): downloads every league code x season in
+FD_LEAGUES x FD_SEASONS concurrently, parses each CSV with pyarrow's
+multithreaded reader using explicit dtypes (no pandas type inference), and
+writes a Parquet dataset partitioned by league and season:
+  data/parquet/football_data/league=E0/season=2425/part-0.parquet
+
+  FD_LEAGUES=E0,E1,SP1,D1,I1,F1     league codes
+  FD_SEASONS=0506-2425              season codes: comma list and/or ranges
+"""
+
+import sys, io, os, re
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import catalog
+import http_client
+from normalizers import register
+from utils import UA, env, dump_text, print_fields, resolve_snapshot, short_obs
 
 # Example: Premier League 2024/25 = E0. Change for other leagues/years as needed.
 URL = "https://www.football-data.co.uk/mmz4281/2425/E0.csv"
+SEASON_URL = "https://www.football-data.co.uk/mmz4281/{season}/{league}.csv"
+
+BACKFILL = env("FD_BACKFILL", "0") == "1"
+LEAGUES = [s.strip() for s in env("FD_LEAGUES", "E0").split(",") if s.strip()]
+SEASONS_SPEC = env("FD_SEASONS", "2425")
+OUT_DIR = Path("data/parquet/football_data")
+
+# Explicit column types; every other column (odds, handicap lines) is a float32 price.
+STR_COLS = {"Div", "Date", "Time", "HomeTeam", "AwayTeam", "FTR", "HTR", "Referee"}
+INT_COLS = {"FTHG", "FTAG", "HTHG", "HTAG", "HS", "AS", "HST", "AST", "HHW", "AHW",
+            "HC", "AC", "HF", "AF", "HFKC", "AFKC", "HO", "AO", "HY", "AY", "HR", "AR",
+            "HBP", "ABP"}
+
+def expand_seasons(spec):
+    """'1920,2122-2425' -> ['1920', '2122', '2223', '2324', '2425'] (codes are yy(yy+1))."""
+    out = []
+    for part in [p.strip() for p in spec.split(",") if p.strip()]:
+        if "-" in part:
+            a, b = part.split("-")
+            start, end = int(a[:2]), int(b[:2])
+            if end < start:     # 9899-0102 crosses the century
+                end += 100
+            out += [f"{y % 100:02d}{(y + 1) % 100:02d}" for y in range(start, end + 1)]
+        else:
+            out.append(part)
+    return out
+
+def column_types(header):
+    types = {}
+    for c in header:
+        if c in STR_COLS:
+            types[c] = pa.string()
+        elif c in INT_COLS:
+            types[c] = pa.int16()
+        elif c == "Attendance":
+            types[c] = pa.int32()
+        else:
+            types[c] = pa.float32()
+    return types
+
+def parse_csv(body: bytes) -> pa.Table:
+    """CSV bytes -> typed Arrow table (bad rows skipped, trailing empty columns dropped)."""
+    body = body.lstrip(b"\xef\xbb\xbf")
+    first = body.split(b"\n", 1)[0].decode("latin-1").strip()
+    header = [c.strip() for c in first.split(",")]
+    keep = [c for c in header if c]
+    try:
+        body.decode("utf-8")
+        encoding = "utf8"
+    except UnicodeDecodeError:
+        encoding = "latin1"     # older seasons are cp1252-ish
+    t = pacsv.read_csv(
+        io.BytesIO(body),
+        read_options=pacsv.ReadOptions(encoding=encoding, use_threads=True),
+        parse_options=pacsv.ParseOptions(invalid_row_handler=lambda row: "skip"),
+        convert_options=pacsv.ConvertOptions(column_types=column_types(keep),
+                                             include_columns=keep, strings_can_be_null=True),
+    )
+    # blank trailing lines come through as all-null rows
+    if "HomeTeam" in t.column_names:
+        t = t.filter(pc.is_valid(t["HomeTeam"]))
+    # Date is dd/mm/yy in older files and dd/mm/yyyy in newer ones
+    if "Date" in t.column_names:
+        d = t["Date"]
+        short = pc.strptime(d, format="%d/%m/%y", unit="s", error_is_null=True)
+        long_ = pc.strptime(d, format="%d/%m/%Y", unit="s", error_is_null=True)
+        date = pc.if_else(pc.equal(pc.utf8_length(d), 8), short, long_)
+        t = t.append_column("match_date", pc.cast(date, pa.date32()))
+    return t
+
+def backfill():
+    seasons = expand_seasons(SEASONS_SPEC)
+    jobs = [(lg, ss) for lg in LEAGUES for ss in seasons]
+    print(f"backfill: {len(LEAGUES)} leagues x {len(seasons)} seasons = {len(jobs)} files")
+    calls = [{"url": SEASON_URL.format(league=lg, season=ss), "headers": UA, "timeout": 60,
+              "memo": False, "conditional": True} for lg, ss in jobs]
+    responses = http_client.fetch_all(calls)
+
+    def one(job, r):
+        lg, ss = job
+        if isinstance(r, Exception):
+            return job, None, repr(r)
+        if r.status_code == 404:
+            return job, None, "not published"
+        try:
+            r.raise_for_status()
+            t = parse_csv(r.content)
+        except Exception as e:
+            return job, None, repr(e)
+        out = OUT_DIR / f"league={lg}" / f"season={ss}"
+        out.mkdir(parents=True, exist_ok=True)
+        pq.write_table(t, out / "part-0.parquet")
+        return job, t.num_rows, None
+
+    rows, notes = 0, []
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        for (lg, ss), n, err in pool.map(lambda a: one(*a), zip(jobs, responses)):
+            if err:
+                notes.append(f"{lg} {ss}: {err}")
+            else:
+                rows += n
+    short_obs("football-data backfill", [
+        f"files written={len(jobs) - len(notes)} rows={rows} → {OUT_DIR}",
+        http_client.VALIDATORS.summary(),
+        *notes[:20],
+    ])
+
+def load_backfill(leagues=None, seasons=None, columns=None) -> pd.DataFrame:
+    """Read the partitioned dataset back, pruning to the requested leagues/seasons."""
+    keys = pa.schema([("league", pa.string()), ("season", pa.string())])
+    part = ds.partitioning(keys, flavor="hive")
+    dset = ds.dataset(OUT_DIR, format="parquet", partitioning=part)
+    # bookmaker columns come and go between seasons; read with the union of all files
+    schema = pa.unify_schemas([f.physical_schema for f in dset.get_fragments()] + [keys])
+    dset = ds.dataset(OUT_DIR, format="parquet", partitioning=part, schema=schema)
+    flt = None
+    if leagues:
+        flt = ds.field("league").isin(list(leagues))
+    if seasons:
+        f2 = ds.field("season").isin([str(s) for s in seasons])
+        flt = f2 if flt is None else flt & f2
+    return dset.to_table(filter=flt, columns=columns).to_pandas()
+
+def _first(df, cols):
+    for c in cols:
+        if c in df.columns:
+            return df[c]
+    return None
+
+def matches_frame(t: pa.Table, league=None, season=None) -> pd.DataFrame:
+    """Typed CSV table -> match rows: UTC kickoff (Date/Time are UK local), goals, average 1X2 prices."""
+    df = t.to_pandas()
+    clock = df["Time"] if "Time" in df.columns else pd.Series(None, index=df.index, dtype="object")
+    local = pd.to_datetime(df["match_date"]) + pd.to_timedelta(clock.fillna("00:00") + ":00", errors="coerce")
+    out = pd.DataFrame({
+        "provider": "football_data",
+        "league": df["Div"] if "Div" in df.columns else league,
+        "season": season,
+        "kickoff_utc": local.dt.tz_localize("Europe/London", ambiguous="NaT", nonexistent="shift_forward")
+                            .dt.tz_convert("UTC"),
+        "home_team": df["HomeTeam"],
+        "away_team": df["AwayTeam"],
+        "ft_home_goals": _first(df, ["FTHG"]),
+        "ft_away_goals": _first(df, ["FTAG"]),
+        "ht_home_goals": _first(df, ["HTHG"]),
+        "ht_away_goals": _first(df, ["HTAG"]),
+        "result": _first(df, ["FTR"]),
+    })
+    # market average where published (newer files), else Betbrain average, else bet365
+    for side, k in (("home", "H"), ("draw", "D"), ("away", "A")):
+        out[f"odds_{side}"] = _first(df, [f"Avg{k}", f"BbAv{k}", f"B365{k}"])
+    return out
+
+# registry entry for src/normalizers.py: one raw CSV snapshot (<league>_<season>.csv) -> match rows
+@register("football_data_matches", "football_data", competition="league",
+          inputs=lambda date: [e["path"] for e in catalog.entries("football_data", date, "*.csv")])
+def matches(path):
+    m = re.match(r"([A-Z]+\d?)_(\d{4})", Path(path).name)
+    return matches_frame(parse_csv(resolve_snapshot(path).read_bytes()), *(m.groups() if m else (None, None)))
 
 if __name__ == "__main__":
     try:
-        r = requests.get(URL, headers=UA, timeout=25)
+        if BACKFILL:
+            backfill()
+            print("\n✅ football_data_pull backfill complete")
+            sys.exit(0)
+        r = http_client.get(URL, headers=UA, timeout=25, conditional=True)
         r.raise_for_status()
         dump_text("football_data", "E0_2425.csv", r.text)
         df = pd.read_csv(io.StringIO(r.text))
@@ -16,6 +205,7 @@ if __name__ == "__main__":
         for c in ["PSCH","PSCD","PSCA","B365H","B365D","B365A","WHH","WHD","WHA"]:
             if c in df.columns:
                 short_obs("odds column sample", [f"{c} non-null={df[c].notna().sum()}"])
+        short_obs("conditional GET cache", [http_client.VALIDATORS.summary()])
         print("\n✅ football_data_pull complete")
     except Exception as e:
         print("❌", repr(e))
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for every pull script.
+
+- One keep-alive requests.Session per process (pooled connections, so repeated
+  calls to the same host skip the TCP+TLS handshake)
+- Per-host concurrency limits and a default timeout
+- Async mode: fetch_all() keeps many GETs in flight at once on an asyncio loop
+  (blocking I/O runs in a worker pool that shares the same connection pool)
+- RateLimiter (token bucket) and get_with_backoff() for sources with request quotas
+- Per-run memo cache: identical GETs (same URL + params, API keys ignored) are
+  answered from memory for HTTP_MEMO_TTL seconds, optionally shared on disk
+  between the scripts of one workflow run
+
+Env knobs (optional):
+  HTTP_TIMEOUT=30            default timeout (seconds) when a caller passes none
+  HTTP_POOL_SIZE=32          pooled connections kept per host / async workers
+  HTTP_HOST_CONCURRENCY=8    max requests in flight per host
+  HTTP_MEMO_TTL=900          memo lifetime in seconds (0 disables the memo)
+  HTTP_MEMO_MAX=512          in-memory entries before LRU eviction
+  HTTP_MEMO_DIR=             set (e.g. data/cache/http_memo) to persist the memo on disk
+  HTTP_VALIDATOR_DIR=data/cache/http_validators
+                             on-disk ETag/Last-Modified store for get(..., conditional=True)
+"""
+
+import asyncio, hashlib, json, random, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from utils import env, UA
+
+TIMEOUT = float(env("HTTP_TIMEOUT", "30"))
+POOL_SIZE = int(env("HTTP_POOL_SIZE", "32"))
+HOST_CONCURRENCY = int(env("HTTP_HOST_CONCURRENCY", "8"))
+MEMO_TTL = float(env("HTTP_MEMO_TTL", "900"))
+MEMO_MAX = int(env("HTTP_MEMO_MAX", "512"))
+MEMO_DIR = env("HTTP_MEMO_DIR", "")
+VALIDATOR_DIR = env("HTTP_VALIDATOR_DIR", "data/cache/http_validators")
+
+# query params that carry credentials; never part of a memo key (or a file on disk)
+SECRET_PARAMS = {"apikey", "api_key", "key", "token", "access_token", "auth"}
+
+# hosts that need a tighter (or looser) cap than HOST_CONCURRENCY
+HOST_LIMITS = {}
+
+_lock = threading.Lock()
+_session = None
+_host_sems = {}
+
+def session() -> requests.Session:
+    """Process-wide pooled session (created lazily)."""
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+def host_limit(host: str) -> int:
+    return HOST_LIMITS.get(host, HOST_CONCURRENCY)
+
+def set_host_limit(host: str, n: int):
+    """Cap in-flight requests for one host. Call before the first request to that host."""
+    HOST_LIMITS[host.lower()] = max(1, int(n))
+
+def _host_sem(host: str) -> threading.BoundedSemaphore:
+    with _lock:
+        sem = _host_sems.get(host)
+        if sem is None:
+            sem = _host_sems[host] = threading.BoundedSemaphore(host_limit(host))
+        return sem
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread that calls acquire(): at most `rate`
+    calls per `per` seconds, with bursts up to `burst` (default 1 = evenly spaced).
+    pause(seconds) blocks all callers, e.g. after a 429 with Retry-After.
+    """
+    def __init__(self, rate, per=1.0, burst=1):
+        self.rate, self.per = float(rate), float(per)
+        self.capacity = float(burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate / self.per)
+                self.updated = now
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) * self.per / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+def memo_key(url, params=None) -> str:
+    """Normalized GET key: lowercased scheme/host, path, sorted query + params, secrets stripped."""
+    parts = urlsplit(url)
+    q = parse_qsl(parts.query, keep_blank_values=True)
+    q += [(k, str(v)) for k, v in (params or {}).items()]
+    q = sorted((k, v) for k, v in q if k.lower() not in SECRET_PARAMS)
+    return f"GET {parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}?{urlencode(q)}"
+
+class MemoCache:
+    """
+    TTL + LRU memo of successful GET responses, keyed by memo_key().
+    With a directory set, entries are also written to disk so later scripts in
+    the same workflow run can reuse them (disk entries expire by the same TTL).
+    """
+    def __init__(self, ttl, max_entries, directory=""):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.dir = Path(directory) if directory else None
+        self.items = OrderedDict()   # key -> (stored_at, status, headers, body, url)
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _path(self, key):
+        return self.dir / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        now = time.time()
+        with self.lock:
+            ent = self.items.get(key)
+            if ent and now - ent[0] <= self.ttl:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return ent
+            self.items.pop(key, None)
+        ent = self._load(key, now)
+        with self.lock:
+            if ent:
+                self._remember(key, ent)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return ent
+
+    def peek(self, key):
+        """Like get(), but leaves the hit/miss counts and the LRU order alone."""
+        if self.ttl <= 0:
+            return None
+        now = time.time()
+        with self.lock:
+            ent = self.items.get(key)
+        if ent and now - ent[0] <= self.ttl:
+            return ent
+        return self._load(key, now)
+
+    def put(self, key, resp):
+        if self.ttl <= 0:
+            return
+        ent = (time.time(), resp.status_code, dict(resp.headers), resp.content, resp.url)
+        with self.lock:
+            self._remember(key, ent)
+        if self.dir:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            p = self._path(key)
+            meta = {"key": key, "stored_at": ent[0], "status": ent[1], "headers": ent[2]}
+            p.with_suffix(".body").write_bytes(ent[3])
+            p.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+
+    def _remember(self, key, ent):
+        self.items[key] = ent
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_entries:
+            self.items.popitem(last=False)
+
+    def _load(self, key, now):
+        if not self.dir:
+            return None
+        p = self._path(key)
+        try:
+            meta = json.loads(p.with_suffix(".json").read_text(encoding="utf-8"))
+            if meta.get("key") != key or now - meta["stored_at"] > self.ttl:
+                return None
+            body = p.with_suffix(".body").read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+        # disk entries replay the secret-free key as their URL
+        return (meta["stored_at"], meta["status"], meta["headers"], body, key.split(" ", 1)[1])
+
+MEMO = MemoCache(MEMO_TTL, MEMO_MAX, MEMO_DIR)
+
+def _response_from(ent) -> requests.Response:
+    _, status, headers, body, url = ent
+    r = requests.Response()
+    r.status_code = status
+    r.headers = CaseInsensitiveDict(headers)
+    r._content = body
+    r.url = url
+    r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+    r.from_memo = True
+    return r
+
+class ValidatorCache:
+    """
+    On-disk conditional-GET store for rarely-changing files (CSV dumps, GitHub raw JSON).
+    Keeps the last body plus its ETag / Last-Modified; the next request sends
+    If-None-Match / If-Modified-Since and a 304 reuses the stored body.
+    """
+    def __init__(self, directory):
+        self.dir = Path(directory)
+        self.lock = threading.Lock()
+        self.requests = self.not_modified = self.bytes_saved = 0
+
+    def _path(self, key):
+        return self.dir / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        p = self._path(key)
+        try:
+            meta = json.loads(p.with_suffix(".json").read_text(encoding="utf-8"))
+            return meta if meta.get("key") == key and p.with_suffix(".body").exists() else None
+        except (OSError, ValueError):
+            return None
+
+    def body(self, key) -> bytes:
+        return self._path(key).with_suffix(".body").read_bytes()
+
+    def store(self, key, resp):
+        etag, modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if not (etag or modified):
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        p = self._path(key)
+        p.with_suffix(".body").write_bytes(resp.content)
+        meta = {"key": key, "etag": etag, "last_modified": modified,
+                "bytes": len(resp.content), "headers": dict(resp.headers)}
+        p.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+
+    def count(self, saved=None):
+        with self.lock:
+            self.requests += 1
+            if saved is not None:
+                self.not_modified += 1
+                self.bytes_saved += saved
+
+    def summary(self):
+        return (f"conditional GETs={self.requests} not_modified={self.not_modified} "
+                f"bytes_saved={self.bytes_saved:,}")
+
+VALIDATORS = ValidatorCache(VALIDATOR_DIR)
+
+def _conditional_get(key, url, params, headers, timeout, **kw):
+    meta = VALIDATORS.load(key)
+    hdrs = dict(headers or UA)
+    if meta:
+        if meta.get("etag"):
+            hdrs["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            hdrs["If-Modified-Since"] = meta["last_modified"]
+    with _host_sem(host_of(url)):
+        r = session().get(url, params=params, headers=hdrs, timeout=timeout or TIMEOUT, **kw)
+    if r.status_code == 304 and meta:
+        body = VALIDATORS.body(key)
+        VALIDATORS.count(saved=len(body))
+        # hand back the stored body as a normal 200 so callers need no special case
+        r.status_code = 200
+        r._content = body
+        r.headers = CaseInsensitiveDict({**meta.get("headers", {}), **r.headers})
+        r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+        r.not_modified = True
+        return r
+    VALIDATORS.count()
+    if r.ok:
+        VALIDATORS.store(key, r)
+    r.not_modified = False
+    return r
+
+def is_memoized(url, params=None) -> bool:
+    """True if get(url, params) would be answered without touching the network."""
+    return MEMO.peek(memo_key(url, params)) is not None
+
+def get(url, params=None, headers=None, timeout=None, memo=True, conditional=False,
+        limiter=None, **kw) -> requests.Response:
+    """
+    Pooled GET. Same call shape as requests.get; does NOT raise_for_status,
+    so callers keep their own status handling (403/404 checks etc.).
+    Successful (2xx) responses are memoized; pass memo=False to always hit the network.
+    conditional=True revalidates against the on-disk ETag/Last-Modified store;
+    an unchanged file comes back as a 200 with r.not_modified=True.
+    limiter: a RateLimiter to wait on before touching the network (memo hits are free).
+    """
+    key = memo_key(url, params) if memo else None
+    if key:
+        ent = MEMO.get(key)
+        if ent:
+            return _response_from(ent)
+    if limiter:
+        limiter.acquire()
+    if conditional:
+        r = _conditional_get(memo_key(url, params), url, params, headers, timeout, **kw)
+    else:
+        with _host_sem(host_of(url)):
+            r = session().get(url, params=params, headers=headers or UA,
+                              timeout=timeout or TIMEOUT, **kw)
+    r.from_memo = False
+    if key and r.ok:
+        MEMO.put(key, r)
+    return r
+
+RETRY_STATUSES = (403, 429, 500, 502, 503, 504)
+
+def retry_after(resp):
+    """Seconds from a Retry-After header (delta-seconds form only), else None."""
+    v = resp.headers.get("Retry-After") if resp is not None else None
+    try:
+        return max(0.0, float(v)) if v is not None else None
+    except ValueError:
+        return None
+
+def get_with_backoff(url, attempts=4, base=2.0, cap=60.0, retry_on=RETRY_STATUSES,
+                     limiter=None, **kw) -> requests.Response:
+    """
+    get() with exponential backoff + full jitter on network errors and retry_on
+    statuses. Retry-After is honored (and applied to the limiter, so every
+    worker sharing it backs off). Returns the last response; raises the last
+    network error if no response ever came back.
+    """
+    last_err, r = None, None
+    for i in range(attempts):
+        try:
+            r = get(url, limiter=limiter, **kw)
+            if r.status_code not in retry_on:
+                return r
+            last_err = None
+        except requests.RequestException as e:
+            last_err, r = e, None
+        if i == attempts - 1:
+            break
+        wait = retry_after(r)
+        if wait is None:
+            wait = random.uniform(0, min(cap, base * 2 ** i))
+        if limiter:
+            limiter.pause(wait)
+        else:
+            time.sleep(wait)
+    if r is None and last_err:
+        raise last_err
+    return r
+
+async def _fetch_all(calls, return_exceptions):
+    loop = asyncio.get_running_loop()
+    sems = {}
+    with ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="http") as pool:
+        async def one(call):
+            call = {"url": call} if isinstance(call, str) else dict(call)
+            host = host_of(call["url"])
+            sem = sems.setdefault(host, asyncio.Semaphore(host_limit(host)))
+            async with sem:
+                return await loop.run_in_executor(pool, lambda: get(**call))
+        return await asyncio.gather(*(one(c) for c in calls), return_exceptions=return_exceptions)
+
+def fetch_all(calls, return_exceptions=True):
+    """
+    Run many GETs concurrently and return responses in input order.
+
+    calls: list of URLs or dicts of get() kwargs, e.g.
+           [{"url": ..., "params": {...}, "headers": {...}}, ...]
+    With return_exceptions=True a failed call yields its exception in place
+    of a response, so one bad URL does not sink the whole batch.
+    """
+    calls = list(calls)
+    if not calls:
+        return []
+    return asyncio.run(_fetch_all(calls, return_exceptions))
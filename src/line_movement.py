@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Line movement queries over the odds log (src/odds_log.py).
+
+Rows are sorted once by (event_id, bookmaker, market, outcome, point, captured_at);
+each event/bookmaker/market/outcome line is a contiguous slice, so every lookup is
+a binary search (np.searchsorted) over capture times, never a scan:
+- opening: first snapshot of the line
+- closing: last snapshot strictly before commence_time
+- as_of:   last snapshot at or before commence_time - N hours
+
+  python src/line_movement.py     -> data/normalized/odds_line_movement.parquet
+
+  LINE_HOURS=24,6,1               T-minus-N columns (price_t24h, ...)
+  LINE_SPORT_KEYS=soccer_epl      default: every sport key in the log
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import odds_log
+from utils import env, short_obs
+from table_io import write_frame
+
+HOURS = [float(h) for h in env("LINE_HOURS", "24,6,1").split(",") if h.strip()]
+SPORT_KEYS = [s.strip() for s in env("LINE_SPORT_KEYS", "").split(",") if s.strip()] or None
+OUT = Path("data/normalized")
+
+LINE = ["event_id", "bookmaker", "market", "outcome", "point"]
+NAT = np.iinfo(np.int64).min    # NaT as int64 ms
+
+def _ms(ts):
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts).value // 1_000_000
+
+class LineIndex:
+    """Sorted, binary-searchable view of the odds log."""
+    def __init__(self, df: pd.DataFrame):
+        # a snapshot without a capture time can't be placed on the line
+        df = df[df["captured_at"].notna()] if len(df) else df
+        df = df.sort_values(LINE + ["captured_at"], kind="stable", na_position="first").reset_index(drop=True)
+        self.df = df
+        self.t = df["captured_at"].to_numpy("datetime64[ms]").astype(np.int64)
+        self.price = df["price"].to_numpy(np.float32)
+        keys = df[LINE].astype(object).where(df[LINE].notna(), None)
+        starts = np.flatnonzero(np.r_[True, (keys.shift().to_numpy() != keys.to_numpy()).any(axis=1)[1:]]) \
+            if len(df) else np.array([], dtype=np.int64)
+        self.starts = starts
+        self.ends = np.r_[starts[1:], len(df)].astype(np.int64)
+        self.lines = keys.iloc[starts].reset_index(drop=True)
+        self.gid = {tuple(r): i for i, r in enumerate(self.lines.itertuples(index=False, name=None))}
+        # commence_time can move (rescheduled match): trust the latest snapshot
+        self.commence = df["commence_time"].to_numpy("datetime64[ms]").astype(np.int64)[self.ends - 1] \
+            if len(df) else np.array([], dtype=np.int64)
+
+    @classmethod
+    def from_log(cls, sport_keys=None, start=None, end=None):
+        return cls(odds_log.load(sport_keys=sport_keys, start=start, end=end))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _slice(self, event_id, bookmaker, market, outcome, point=None):
+        g = self.gid.get((event_id, bookmaker, market, outcome,
+                          None if point is None or pd.isna(point) else float(np.float32(point))))
+        return (None, 0, 0) if g is None else (g, self.starts[g], self.ends[g])
+
+    def _row(self, i):
+        return None if i is None else {"captured_at": pd.Timestamp(self.t[i], unit="ms", tz="UTC"),
+                                       "price": float(self.price[i])}
+
+    def opening(self, *line):
+        g, s, e = self._slice(*line)
+        return self._row(s if g is not None else None)
+
+    def before(self, *line, at, inclusive=True):
+        """Last snapshot at (or strictly before, inclusive=False) time `at`."""
+        g, s, e = self._slice(*line)
+        if g is None:
+            return None
+        i = s + np.searchsorted(self.t[s:e], _ms(at), side="right" if inclusive else "left") - 1
+        return self._row(i if i >= s else None)
+
+    def closing(self, *line):
+        g, s, e = self._slice(*line)
+        if g is None or self.commence[g] == NAT:
+            return None
+        return self.before(*line, at=pd.Timestamp(self.commence[g], unit="ms", tz="UTC"), inclusive=False)
+
+    def as_of(self, *line, hours_before):
+        g, s, e = self._slice(*line)
+        if g is None or self.commence[g] == NAT:
+            return None
+        t = self.commence[g] - int(hours_before * 3_600_000)
+        return self.before(*line, at=pd.Timestamp(t, unit="ms", tz="UTC"))
+
+    def _search_all(self, side, hours_before=0.0):
+        """
+        Vectorized per-line searchsorted against commence_time - hours_before: index of the
+        last row <= / < target, or -1 (also for lines without a commence_time).
+        """
+        out = np.full(len(self), -1, dtype=np.int64)
+        ok = self.commence != NAT      # NaT would wreck the composite key span below
+        if not ok.any():
+            return out
+        targets = self.commence[ok] - int(hours_before * 3_600_000)
+        # rows are sorted by (line, t): search the composite key line * span + (t - t0)
+        # (ms spans of a few years x a million lines stay well inside int64)
+        t0 = min(self.t.min(), targets.min())
+        span = max(self.t.max(), targets.max()) - t0 + 1
+        g = np.arange(len(self), dtype=np.int64)
+        line_of_row = np.repeat(g, self.ends - self.starts)
+        comp = line_of_row * span + (self.t - t0)
+        i = np.searchsorted(comp, g[ok] * span + (targets - t0), side=side) - 1
+        out[ok] = np.where(i >= self.starts[ok], i, -1)
+        return out
+
+    def features(self, hours=HOURS) -> pd.DataFrame:
+        """One row per line: opening, closing and T-minus-N prices, computed in bulk."""
+        out = self.lines.copy()
+        if not len(self):
+            return out
+        out["point"] = pd.to_numeric(out["point"]).astype(np.float32)
+        last = self.df.iloc[self.ends - 1]
+        # h2h outcome names are team names (or "Draw"); label the side for event-level features
+        out["side"] = np.select([out["outcome"].to_numpy() == last["home_team"].to_numpy(),
+                                 out["outcome"].to_numpy() == last["away_team"].to_numpy(),
+                                 out["outcome"].str.lower().to_numpy() == "draw"],
+                                ["home", "away", "draw"], default=None)
+        out["commence_time"] = pd.to_datetime(self.commence, unit="ms", utc=True)
+        out["n_snapshots"] = (self.ends - self.starts).astype(np.int32)
+
+        def take(idx, name):
+            ok = idx >= 0
+            out[f"{name}_price"] = np.where(ok, self.price[np.maximum(idx, 0)], np.nan).astype(np.float32)
+            out[f"{name}_at"] = pd.to_datetime(self.t[np.maximum(idx, 0)], unit="ms", utc=True).where(ok)
+
+        take(self.starts.astype(np.int64), "open")
+        take(self._search_all(side="left"), "close")
+        for h in hours:
+            idx = self._search_all(side="right", hours_before=h)
+            out[f"price_t{h:g}h"] = np.where(idx >= 0, self.price[np.maximum(idx, 0)], np.nan).astype(np.float32)
+        out["close_vs_open"] = (out["close_price"] / out["open_price"]).astype(np.float32)
+        return out
+
+def event_prices(feats: pd.DataFrame, market="h2h") -> pd.DataFrame:
+    """Per event: median across bookmakers of opening/closing price by side (open_home, close_draw, ...)."""
+    f = feats[(feats["market"] == market) & feats["side"].notna()]
+    if f.empty:
+        return pd.DataFrame(columns=["event_id"])
+    wide = f.pivot_table(index="event_id", columns="side", values=["open_price", "close_price"], aggfunc="median")
+    wide.columns = [f"{v.split('_')[0]}_{side}" for v, side in wide.columns]
+    return wide.reset_index()
+
+if __name__ == "__main__":
+    try:
+        idx = LineIndex.from_log(sport_keys=SPORT_KEYS)
+        feats = idx.features()
+        write_frame(feats, OUT / "odds_line_movement.parquet")
+        short_obs("line movement", [
+            f"snapshots={len(idx.df)} lines={len(idx)} events={idx.lines['event_id'].nunique() if len(idx) else 0}",
+            f"with closing line={int(feats['close_price'].notna().sum()) if len(idx) else 0}",
+            f"→ {OUT}/odds_line_movement.parquet",
+        ])
+        print("\n✅ line_movement complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
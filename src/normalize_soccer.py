@@ -3,56 +3,96 @@
 normalize_soccer.py
 Takes today's Odds API snapshot (if present) and normalizes a few fields
 into a canonical schema. Just a demo, safe to expand later.
+
+Every bookmaker's prices are also flattened (src/odds_flatten.py) into
+  data/normalized/odds_api_prices.parquet   long: event x bookmaker x market x outcome
+  data/normalized/odds_api_wide.parquet     one row per event
+and the bookmaker consensus (src/odds_consensus.py) into
+  data/normalized/odds_consensus.parquet
+whose h2h prices fill odds_home/odds_draw/odds_away in the canonical CSV; totals and
+spreads are the median prices at each event's main line (odds_flatten.main_lines).
+The canonical rows are cast to the Arrow schema of schemas/canonical_match_schema.json
+(src/canonical_schema.py) and also written typed to data/normalized/odds_api_canonical.parquet.
+xg_home/xg_away come from data/normalized/match_xg.parquet (src/xg_aggregate.py) once played.
 """
-import sys, json
+import sys
 import pandas as pd
 from pathlib import Path
-from utils import today_dir
+import catalog
+import odds_consensus
+import odds_flatten
+import xg_aggregate
+from canonical_schema import conform
+from normalizers import register
+from table_io import write_frame
+from utils import today_dir, read_json
 
-RAW_DIR = Path("data/raw/odds_api")
+OUT = Path("data/normalized")
 
 def load_today_events():
-    if not RAW_DIR.exists():
-        return []
-    # find latest dated folder
-    dated = sorted([p for p in RAW_DIR.iterdir() if p.is_dir()])
-    if not dated:
+    # latest dated folder + its odds snapshots, from the raw catalog
+    latest = catalog.latest_date("odds_api")
+    if latest is None:
         return []
-    latest = dated[-1]
     rows = []
-    for p in latest.glob("odds_*.json"):
+    for p in catalog.files("odds_api", latest, "odds_*"):
         try:
-            obj = json.loads(p.read_text(encoding="utf-8"))
+            obj = read_json(p)
             if isinstance(obj, list):
                 rows.extend(obj)
         except Exception:
             continue
     return rows
 
-def to_canonical(events):
-    out = []
-    for ev in events:
-        row = {
-            "provider": "odds_api",
-            "provider_event_id": ev.get("id"),
-            "competition": ev.get("sport_title"),
-            "match_date_utc": ev.get("commence_time"),
-            "home_team": ev.get("home_team"),
-            "away_team": ev.get("away_team"),
-            "status": ev.get("status"),
-        }
-        out.append(row)
-    return out
+def to_canonical(events, cons=None, long=None):
+    long = odds_flatten.flatten(events) if long is None else long
+    ev = odds_flatten.events_table(events).to_pandas()
+    df = pd.DataFrame({
+        "provider": "odds_api",
+        "provider_event_id": ev["event_id"],
+        "competition": ev["sport_title"],
+        "match_date_utc": ev["commence_time"],
+        "home_team": ev["home_team"],
+        "away_team": ev["away_team"],
+        "status": [e.get("status") for e in events],
+        "n_bookmakers": ev["n_bookmakers"],
+    })
+    # consensus across every book (median price, de-vigged probabilities), not the first listed,
+    # plus over/under and spread prices at each event's main line
+    odds = odds_consensus.canonical_odds(long, cons).rename(columns={"event_id": "provider_event_id"})
+    df = df.merge(odds, how="left", on="provider_event_id")
+    # every canonical column present and typed (schemas/canonical_match_schema.json)
+    return conform(xg_aggregate.attach(df))
+
+# registry entry for src/normalizers.py: one odds snapshot -> canonical rows
+# (xg_home/xg_away and the consensus prices come from these too, so they are part of the digest)
+@register("odds_api_events", "odds_api", ["odds_*"], key="provider_event_id", sort_by="match_date_utc",
+          depends=[xg_aggregate.MATCH_XG, xg_aggregate.__file__, odds_consensus.__file__, odds_flatten.__file__])
+def events_file(path):
+    events = read_json(path)
+    return to_canonical(events) if isinstance(events, list) and events else pd.DataFrame()
 
 if __name__ == "__main__":
     events = load_today_events()
     if not events:
         print("No Odds API events found for today. Run odds_api_pull.py first.")
         sys.exit(0)
-    df = pd.DataFrame(to_canonical(events))
+    # all bookmakers x markets x outcomes, not just the first book
+    long = odds_flatten.flatten(events)
+    cons = odds_consensus.consensus(long)
+    df = to_canonical(events, cons, long)
     print("\nCanonical sample rows:")
     print(df.head().to_string(index=False))
     outdir = today_dir("canonical")
     outpath = outdir / "odds_api_canonical.csv"
     df.to_csv(outpath, index=False)
     print(f"\nSaved canonical CSV → {outpath}")
+    write_frame(df, OUT / "odds_api_canonical.parquet")
+
+    write_frame(long.to_pandas(), OUT / "odds_api_prices.parquet")
+    wide = odds_flatten.wide(long)
+    write_frame(wide, OUT / "odds_api_wide.parquet")
+    write_frame(cons, OUT / "odds_consensus.parquet")
+    print(f"Saved {long.num_rows} prices ({len(long['bookmaker'].unique())} bookmakers) → "
+          f"{OUT}/odds_api_prices.parquet, odds_api_wide.parquet ({wide.shape[1] - 1} columns)")
+    print(f"Saved consensus for {len(cons)} event/market/line/side rows → {OUT}/odds_consensus.parquet")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Normalizer registry and process-pool driver.
+
+Each provider module registers a flatten function (one raw snapshot -> DataFrame)
+next to the code that knows its payload:
+
+  @register("fdorg_matches", "footballdata_org", ["matches_*"], competition="comp_code", key="match_id")
+  def matches(path): ...
+
+The driver turns every registered table x dated raw folder x snapshot into a work
+unit, runs the units across NORMALIZE_PROCS processes, and per table and date
+resolves team names (team_resolver), casts to the canonical dtypes
+(canonical_schema.conform), drops duplicate keys (later snapshots win) and writes
+  data/normalized/dataset/<table>/provider=/competition=/season=/date=/part-0.parquet
+plus the latest date's rows to data/normalized/<table>.parquet.
+Tables whose latest inputs hash as on the previous run are skipped; the digest also
+covers the normalizer's code, the canonical schema, the team map and declared
+dependencies (e.g. match_xg.parquet for odds_api_events).
+
+  python src/normalizers.py                       # every registered table, latest date
+  python src/normalizers.py fdorg_matches ...     # only these tables
+
+  NORMALIZE_PROCS=4          default: CPU count
+  NORMALIZE_ALL_DATES=1      every dated raw folder, not just the latest
+"""
+
+import sys, os, importlib, inspect
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import catalog
+import team_resolver
+from canonical_schema import SCHEMA_PATH, conform
+from table_io import DATASET_DIR, output_files, write_dataset, write_frame
+from utils import env, inputs_unchanged, mark_inputs, read_json, short_obs
+
+OUT = Path("data/normalized")
+PROCS = int(env("NORMALIZE_PROCS", str(os.cpu_count() or 1)))
+ALL_DATES = env("NORMALIZE_ALL_DATES", "0") == "1"
+# modules whose import registers their normalizers
+PLUGINS = ["normalize_soccer", "stage7_normalize_api_football", "stage7_normalize_fdorg",
+           "football_data_pull", "openligadb_pull", "xg_aggregate"]
+TEAMS = {"home_team": "home_team_canonical", "away_team": "away_team_canonical"}
+
+REGISTRY = {}
+if __name__ == "__main__":
+    # plugins `import normalizers`: let them register here, not in a second copy of this module
+    sys.modules["normalizers"] = sys.modules[__name__]
+
+def dated_dirs(base):
+    return [Path(base) / d for d in catalog.dates(Path(base).name)]
+
+def code_paths(*fns):
+    """Source files (and the canonical schema) whose edits must invalidate normalized outputs."""
+    files = {Path(inspect.getsourcefile(f)) for f in fns}
+    return sorted(files | {Path(__file__), Path(team_resolver.__file__), SCHEMA_PATH})
+
+def load_json(path):
+    obj = read_json(path)   # plain or compressed snapshot
+    return obj.get("json", obj) if isinstance(obj, dict) else obj  # unwrap fail-safe wrapper
+
+class Normalizer:
+    """One output table: which snapshots feed it and how one snapshot is flattened."""
+    def __init__(self, name, source, flatten, patterns=(), inputs=None, competition="competition",
+                 season="season", key=None, sort_by="kickoff_utc", teams=None, depends=()):
+        self.name, self.source, self.flatten = name, source, flatten
+        self.patterns, self._inputs = list(patterns), inputs
+        self.depends = [Path(p) for p in depends]     # non-snapshot inputs (tables, helper modules)
+        self.competition, self.season, self.key, self.sort_by = competition, season, key, sort_by
+        self.teams = TEAMS if teams is None else teams
+
+    def inputs(self, date):
+        """Snapshot paths of one dated folder, in the order duplicates are resolved (last wins)."""
+        if self._inputs:
+            return self._inputs(date)
+        return [p for pat in self.patterns for p in catalog.files(self.source, date, pat)]
+
+    def dependencies(self):
+        """Everything besides the snapshots that the output depends on, for the skip digest."""
+        extra = [p for p in [*self.depends, team_resolver.MAP_PATH] if p.exists()]
+        return code_paths(self.flatten) + extra
+
+    def finish(self, df):
+        """Resolved team names and canonical dtypes on one flattened frame."""
+        if df is None or df.empty:
+            return pd.DataFrame()
+        if "provider" not in df.columns:
+            df.insert(0, "provider", self.source)    # first dataset partition
+        for col, out in self.teams.items():
+            df = team_resolver.canon(df, col, self.source, out=out)
+        return conform(df, fill_missing=False)
+
+    def combine(self, frames):
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        if self.key and self.key in df.columns:
+            df = df.drop_duplicates(subset=[self.key], keep="last").reset_index(drop=True)
+        # concat turns categoricals with different categories into objects; re-encode once
+        return conform(df, fill_missing=False)
+
+def register(name, source, patterns=(), **kw):
+    """Decorator: flatten(path) -> DataFrame becomes the normalizer of table `name`."""
+    def deco(fn):
+        REGISTRY[name] = Normalizer(name, source, fn, patterns, **kw)
+        return fn
+    return deco
+
+def load_plugins():
+    for m in PLUGINS:
+        importlib.import_module(m)
+    return REGISTRY
+
+def flatten_one(name, path):
+    """Work unit: one snapshot through one normalizer -> (frame, error, new team misses)."""
+    if name not in REGISTRY:
+        load_plugins()      # a spawned worker starts with an empty registry
+    r = team_resolver.default()
+    try:
+        df, err = REGISTRY[name].finish(REGISTRY[name].flatten(path)), None
+    except Exception as e:
+        df, err = pd.DataFrame(), f"{name} {path}: {e!r}"
+    misses = dict(r.misses)
+    r.misses.clear()
+    return df, err, misses
+
+def normalize(name, paths):
+    """Serial: every path through one normalizer, combined (for single-table scripts)."""
+    frames = []
+    for p in paths:
+        df, err, misses = flatten_one(name, p)
+        team_resolver.default().misses.update(misses)
+        if err:
+            print("normalize error:", err)
+        frames.append(df)
+    return REGISTRY[name].combine(frames)
+
+def _size(path):
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+def plan(names=None, all_dates=ALL_DATES):
+    """{table: [(date, [paths])]} for the latest (or every) dated folder of each table's source."""
+    out = {}
+    for name in names or sorted(load_plugins()):
+        n = REGISTRY[name]
+        dates = catalog.dates(n.source)
+        out[name] = [(d, n.inputs(d)) for d in (dates if all_dates else dates[-1:])]
+    return out
+
+def run(names=None, all_dates=ALL_DATES, procs=PROCS):
+    """Normalize the planned units across procs processes and write every table -> (lines, units, procs)."""
+    load_plugins()
+    work, lines, digests = plan(names, all_dates), [], {}
+    for name, dated in list(work.items()):
+        latest = dated[-1][1] if dated else []
+        unchanged, digests[name] = inputs_unchanged(
+            f"normalize_{name}", latest + REGISTRY[name].dependencies(),
+            [*output_files(OUT / f"{name}.parquet"), DATASET_DIR / name])
+        if not latest or (unchanged and not all_dates):
+            lines.append(f"{name}: {'inputs unchanged' if latest else 'no snapshots'}, skipped")
+            del work[name]
+    units = [(name, d, i, p) for name, dated in work.items() for d, paths in dated for i, p in enumerate(paths)]
+    # largest snapshots first so the workers finish together
+    units.sort(key=lambda u: _size(u[3]), reverse=True)
+    procs = max(1, min(procs, len(units)))
+    args = ([u[0] for u in units], [u[3] for u in units])
+    if procs == 1:
+        results = list(map(flatten_one, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            results = list(pool.map(flatten_one, *args))
+    frames, failed, bad_dates, resolver = {}, {}, set(), team_resolver.default()
+    for (name, d, i, _), (df, err, misses) in zip(units, results):
+        frames.setdefault((name, d), []).append((i, df))
+        resolver.misses.update(misses)
+        if err:
+            failed.setdefault(name, []).append(err)
+            bad_dates.add((name, d))
+    for name, dated in work.items():
+        n = REGISTRY[name]
+        for d, _ in dated:
+            df = n.combine([f for _, f in sorted(frames.get((name, d), []), key=lambda x: x[0])])
+            if df.empty and (name, d) in bad_dates:
+                # nothing parsed and something failed: keep the previous output
+                lines.append(f"{name} {d}: no rows parsed, previous output kept")
+                continue
+            rows = write_dataset(df, name, d, competition=n.competition, season=n.season,
+                                 sort_by=n.sort_by if n.sort_by in df.columns else None)
+            lines.append(f"{name} {d}: {rows} rows")
+            if d == dated[-1][0]:
+                write_frame(df, OUT / f"{name}.parquet")      # latest date
+        if name not in failed:      # retry failed snapshots next run
+            mark_inputs(f"normalize_{name}", digests[name])
+    if resolver.misses:
+        lines.append(f"team names needing fuzzy/unresolved lookup: {len(resolver.misses)} "
+                     f"(→ {team_resolver.write_report()})")
+    errors = [e for errs in failed.values() for e in errs]
+    return lines + [f"failed: {e}" for e in errors[:10]], len(units), procs
+
+if __name__ == "__main__":
+    try:
+        names = sys.argv[1:] or None
+        unknown = [n for n in names or [] if n not in load_plugins()]
+        if unknown:
+            raise ValueError(f"unknown normalizers {unknown}; registered: {sorted(REGISTRY)}")
+        lines, n_units, procs = run(names)
+        short_obs(f"normalizers ({n_units} snapshots, {procs} procs)", lines)
+        print("\n✅ normalizers complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
-import sys, requests
+import sys, threading, requests
 from datetime import datetime, timezone, timedelta
 from urllib.parse import urlencode
 from dotenv import load_dotenv
 from utils import env, UA, dump_json, print_fields, short_obs
+import http_client
+import odds_log
 
 load_dotenv()
 
@@ -13,14 +15,110 @@ REGIONS = env("ODDS_REGIONS", "us,uk,eu")
 ODDS_FORMAT = env("ODDS_FORMAT", "decimal")
 SPORT_KEYS = [s.strip() for s in env("ODDS_SPORT_KEYS", "soccer_epl").split(",") if s.strip()]
 
-def get(path, params=None):
+# Fan-out mode: every sport key x market group (+ historical snapshots) in parallel.
+# Market groups are ";"-separated, markets inside a group ","-separated, e.g. "h2h;spreads,totals"
+FANOUT = env("ODDS_FANOUT", "0") == "1"
+MARKET_GROUPS = [g.strip() for g in env("ODDS_MARKET_GROUPS", "h2h,spreads,totals").split(";") if g.strip()]
+HISTORICAL_EVENTS = int(env("ODDS_HISTORICAL_EVENTS", "1"))  # events per sport to snapshot
+# never let a run push x-requests-remaining below this many credits
+MIN_CREDITS = int(env("ODDS_MIN_CREDITS_REMAINING", "50"))
+http_client.set_host_limit("api.the-odds-api.com", int(env("ODDS_CONCURRENCY", "4")))
+
+class CreditBudgetExceeded(RuntimeError):
+    pass
+
+class CreditBudget:
+    """
+    Tracks The Odds API credit headers (x-requests-remaining / x-requests-used).
+    Credits for in-flight calls are reserved up front, so a burst of parallel
+    requests cannot overshoot the MIN_CREDITS floor.
+    """
+    def __init__(self, reserve):
+        self.reserve = reserve
+        self.remaining = None   # unknown until the first response
+        self.used = None
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, cost):
+        with self.lock:
+            if cost and self.remaining is not None and self.remaining - self.pending - cost < self.reserve:
+                return False
+            self.pending += cost
+            return True
+
+    def settle(self, cost, headers):
+        with self.lock:
+            self.pending -= cost
+            rem, used = headers.get("x-requests-remaining"), headers.get("x-requests-used")
+            if rem is not None:
+                rem = int(float(rem))
+                # responses can land out of order; remaining only goes down within a run
+                self.remaining = rem if self.remaining is None else min(self.remaining, rem)
+            if used is not None:
+                self.used = max(self.used or 0, int(float(used)))
+
+    def summary(self):
+        return f"credits remaining={self.remaining} used={self.used} floor={self.reserve}"
+
+BUDGET = CreditBudget(MIN_CREDITS)
+
+def request_cost(path, params):
+    # /sports and /events are free; odds cost markets x regions (historical x10)
+    if not path.endswith("/odds"):
+        return 0
+    markets = len([m for m in str(params.get("markets", "h2h")).split(",") if m])
+    regions = len([r for r in str(params.get("regions", REGIONS)).split(",") if r])
+    return markets * regions * (10 if path.startswith("/historical") else 1)
+
+def build_url(path, params=None):
     params = params.copy() if params else {}
     params["apiKey"] = API_KEY
-    url = f"{BASE}{path}?{urlencode(params)}"
-    r = requests.get(url, headers=UA, timeout=25)
+    return f"{BASE}{path}?{urlencode(params)}"
+
+def get(path, params=None):
+    url = build_url(path, params)
+    # memo hits (same path + params earlier in the run) cost no credits
+    cost = 0 if http_client.is_memoized(url) else request_cost(path, params or {})
+    if not BUDGET.acquire(cost):
+        raise CreditBudgetExceeded(f"{path} needs {cost} credits; {BUDGET.summary()}")
+    try:
+        r = http_client.get(url, headers=UA, timeout=25)
+    except Exception:
+        BUDGET.settle(cost, {})
+        raise
+    BUDGET.settle(cost, r.headers)
     r.raise_for_status()
     return r.json()
 
+def get_many(reqs):
+    """
+    Parallel version of get() for a list of (path, params).
+    Calls that would break the credit floor are not sent; their slot (and any
+    failed call's slot) holds the exception instead of the payload.
+    """
+    out = [None] * len(reqs)
+    send = []
+    for i, (path, params) in enumerate(reqs):
+        cost = 0 if http_client.is_memoized(build_url(path, params)) else request_cost(path, params)
+        if BUDGET.acquire(cost):
+            send.append((i, cost, path, params))
+        else:
+            out[i] = CreditBudgetExceeded(f"{path} needs {cost} credits; {BUDGET.summary()}")
+    calls = [{"url": build_url(path, params), "headers": UA, "timeout": 25} for _, _, path, params in send]
+    for (i, cost, _, _), r in zip(send, http_client.fetch_all(calls)):
+        if isinstance(r, Exception):
+            BUDGET.settle(cost, {})
+            out[i] = r
+            continue
+        BUDGET.settle(cost, r.headers)
+        try:
+            r.raise_for_status()
+            out[i] = r.json()
+        except Exception as e:
+            out[i] = e
+    return out
+
 def list_sports():
     data = get("/sports")
     # filter to soccer only
@@ -31,13 +129,22 @@ def list_sports():
     short_obs("sample soccer sports", sample)
     return data
 
+def odds_params(markets="h2h,spreads,totals"):
+    return {"regions": REGIONS, "oddsFormat": ODDS_FORMAT, "markets": markets}
+
 def fetch_odds(sport_key, markets="h2h,spreads,totals"):
-    data = get(f"/sports/{sport_key}/odds", {
-        "regions": REGIONS,
-        "oddsFormat": ODDS_FORMAT,
-        "markets": markets
-    })
+    data = get(f"/sports/{sport_key}/odds", odds_params(markets))
     dump_json("odds_api", f"odds_{sport_key}.json", data)
+    log_poll(sport_key, data)
+    report_odds(sport_key, data)
+
+def log_poll(sport_key, events, captured_at=None):
+    """Append the poll to the odds log (the dated JSON above is overwritten every run)."""
+    p = odds_log.append_poll(sport_key, events, captured_at)
+    if p:
+        print(f"logged: {p}")
+
+def report_odds(sport_key, data):
     if not data:
         print(f"no events returned for {sport_key}")
         return
@@ -76,9 +183,8 @@ def fetch_odds(sport_key, markets="h2h,spreads,totals"):
 def try_historical_if_enabled(sport_key):
     # If your plan includes historical snapshots this succeeds; otherwise prints a friendly note.
     try:
-        events = get(f"/sports/{sport_key}/odds", {
-            "regions": REGIONS, "oddsFormat": ODDS_FORMAT, "markets": "h2h"
-        })
+        # same params as fetch_odds, so this is a memo hit (no extra credits/round-trip)
+        events = get(f"/sports/{sport_key}/odds", odds_params())
         if not events:
             print("no current events to demo historical snapshot")
             return
@@ -89,6 +195,8 @@ def try_historical_if_enabled(sport_key):
             "date": date_param, "regions": REGIONS, "oddsFormat": ODDS_FORMAT, "markets": "h2h"
         })
         dump_json("odds_api", f"historical_{sport_key}_{event_id}.json", data)
+        if data.get("data"):
+            log_poll(sport_key, [data["data"]], data.get("timestamp"))
         short_obs("historical snapshot (if enabled)", [
             f"bookmakers={len(data.get('bookmakers', []))}",
             f"date={date_param}"
@@ -96,13 +204,66 @@ def try_historical_if_enabled(sport_key):
     except requests.HTTPError as e:
         short_obs("historical not enabled/available", [str(e)])
 
+def merge_market_groups(events, more):
+    """Fold one market group's events into another's (same event/bookmaker -> union of markets)."""
+    by_id = {ev.get("id"): ev for ev in events}
+    for ev in more:
+        cur = by_id.get(ev.get("id"))
+        if cur is None:
+            by_id[ev.get("id")] = ev
+            events.append(ev)
+            continue
+        books = {bm.get("key"): bm for bm in cur.setdefault("bookmakers", [])}
+        for bm in ev.get("bookmakers", []):
+            if bm.get("key") in books:
+                books[bm.get("key")].setdefault("markets", []).extend(bm.get("markets", []))
+            else:
+                cur["bookmakers"].append(bm)
+    return events
+
+def fan_out():
+    """Every sport key x market group in parallel, then historical snapshots in parallel."""
+    jobs = [(sk, grp) for sk in SPORT_KEYS for grp in MARKET_GROUPS]
+    results = get_many([(f"/sports/{sk}/odds", odds_params(grp)) for sk, grp in jobs])
+
+    merged = {}
+    for (sk, grp), res in zip(jobs, results):
+        if isinstance(res, Exception):
+            short_obs(f"{sk} [{grp}] not fetched", [repr(res)])
+            continue
+        merged[sk] = merge_market_groups(merged.get(sk, []), res)
+    for sk, data in merged.items():
+        dump_json("odds_api", f"odds_{sk}.json", data)
+        log_poll(sk, data)
+        report_odds(sk, data)
+
+    date_param = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    hist = [(sk, ev["id"]) for sk, data in merged.items() for ev in data[:HISTORICAL_EVENTS]]
+    results = get_many([(f"/historical/sports/{sk}/events/{eid}/odds", {
+        "date": date_param, "regions": REGIONS, "oddsFormat": ODDS_FORMAT, "markets": "h2h"
+    }) for sk, eid in hist])
+    for (sk, eid), res in zip(hist, results):
+        if isinstance(res, Exception):
+            short_obs(f"historical snapshot skipped ({sk})", [repr(res)])
+            continue
+        dump_json("odds_api", f"historical_{sk}_{eid}.json", res)
+        if res.get("data"):
+            log_poll(sk, [res["data"]], res.get("timestamp"))
+    short_obs("credit budget", [BUDGET.summary()])
+
 if __name__ == "__main__":
     try:
         list_sports()
-        for sk in SPORT_KEYS:
-            fetch_odds(sk)
-            try_historical_if_enabled(sk)
+        if FANOUT:
+            fan_out()
+        else:
+            for sk in SPORT_KEYS:
+                fetch_odds(sk)
+                try_historical_if_enabled(sk)
+            short_obs("credit budget", [BUDGET.summary()])
         print("\n✅ odds_api_pull complete (soccer only)")
+    except CreditBudgetExceeded as e:
+        short_obs("stopped to protect credit budget", [str(e)])
     except Exception as e:
         print("❌", repr(e))
         sys.exit(1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Bookmaker consensus over the flattened odds (src/odds_flatten.py).
+
+Per event x market x line x side, across every bookmaker:
+  n_books, best_price (+ best_bookmaker), mean_price, median_price,
+  overround       mean bookmaker margin on that market line (sum of 1/price - 1)
+  best_overround  margin of the best prices across books (< 0 means an arbitrage)
+  prob_mult       de-vigged probability, multiplicative: (1/o) / sum(1/o)
+  prob_power      de-vigged probability, power: (1/o)^k with k solving sum((1/o)^k) = 1
+Probabilities are de-vigged per bookmaker and then averaged. Every step is a
+grouped NumPy reduction (bincount / sorted slices) over the whole table; the
+power method runs Newton's method for all bookmaker markets at once.
+
+  python src/odds_consensus.py   data/normalized/odds_api_prices.parquet
+                                 -> data/normalized/odds_consensus.parquet (+ per-event odds_home/draw/away)
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import odds_flatten
+from table_io import exists, read_frame, write_frame
+from utils import short_obs
+
+NORM = Path("data/normalized")
+PRICES = NORM / "odds_api_prices.parquet"
+GROUP = ["event_id", "market", "line", "side"]
+
+def _ids(df, cols):
+    """Dense group id per row (first-seen order) and the first row of each group."""
+    gid = df.groupby(cols, sort=False, dropna=False).ngroup().to_numpy()
+    first = np.full(gid.max() + 1 if len(gid) else 0, -1, dtype=np.int64)
+    first[gid[::-1]] = np.arange(len(gid) - 1, -1, -1)
+    return gid, first
+
+def power_k(q, book, n_books, iters=50, tol=1e-12):
+    """k per bookmaker market with sum((q)^k) = 1, Newton's method vectorized over all markets."""
+    k = np.ones(n_books)
+    logq = np.log(q)
+    for _ in range(iters):
+        qk = q ** k[book]
+        f = np.bincount(book, qk, n_books) - 1.0
+        df = np.bincount(book, qk * logq, n_books)
+        step = np.divide(f, df, out=np.zeros_like(f), where=df != 0)
+        k -= step
+        if np.abs(f).max(initial=0) < tol:
+            break
+    return k
+
+def _median(values, gid, n):
+    """Grouped median: sort by (group, value) once and pick the middle of each slice."""
+    order = np.lexsort((values, gid))
+    v = values[order]
+    counts = np.bincount(gid, minlength=n)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    lo, hi = starts + (counts - 1) // 2, starts + counts // 2
+    return (v[lo] + v[hi]) / 2
+
+def consensus(long) -> pd.DataFrame:
+    """Long prices (pa.Table or DataFrame) -> one row per event/market/line/side."""
+    df = long.to_pandas() if hasattr(long, "to_pandas") else long.copy()
+    df = df[df["side"].notna() & (df["price"] > 1)].reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(columns=GROUP + ["n_books", "best_price", "best_bookmaker", "mean_price",
+                                             "median_price", "overround", "best_overround", "prob_mult", "prob_power"])
+    # a market line: h2h has none, totals share one point, spreads use the home handicap
+    point = df["point"].astype("float64")
+    df["line"] = np.where(df["market"] == "spreads", np.where(df["side"] == "away", -point, point), point)
+    df["line"] = df["line"].fillna(0.0)
+
+    price = df["price"].to_numpy(np.float64)
+    q = 1.0 / price
+    book, _ = _ids(df, ["event_id", "market", "line", "bookmaker"])
+    nb = book.max() + 1
+    # only complete books (every side of the market line quoted) are de-vigged
+    sides = np.bincount(book, minlength=nb)
+    mline, _ = _ids(df, ["event_id", "market", "line"])
+    want = np.zeros(mline.max() + 1, dtype=np.int64)
+    np.maximum.at(want, mline, sides[book])
+    complete = sides[book] == want[mline]
+
+    margin = np.bincount(book, q, nb)
+    p_mult = q / margin[book]
+    k = power_k(q, book, nb)
+    p_pow = q ** k[book]
+
+    gid, first = _ids(df, GROUP)
+    ng = len(first)
+    n = np.bincount(gid, minlength=ng)
+    best = np.full(ng, -np.inf)
+    np.maximum.at(best, gid, price)
+    is_best = price == best[gid]
+    best_row = np.full(ng, len(df), dtype=np.int64)
+    np.minimum.at(best_row, gid, np.where(is_best, np.arange(len(df)), len(df)))
+
+    c = np.bincount(gid, complete.astype(float), ng)
+    def _avg(x):
+        s = np.bincount(gid, np.where(complete, x, 0.0), ng)
+        return np.divide(s, c, out=np.full(ng, np.nan), where=c > 0)
+
+    out = df.loc[first, GROUP].reset_index(drop=True)
+    out["n_books"] = n.astype(np.int32)
+    out["best_price"] = best
+    out["best_bookmaker"] = df["bookmaker"].to_numpy()[best_row]
+    out["mean_price"] = np.bincount(gid, price, ng) / n
+    out["median_price"] = _median(price, gid, ng)
+    out["overround"] = _avg(margin[book] - 1.0)
+    # consensus probabilities are renormalised within the market line
+    gline = mline[first]
+    for name, p in (("prob_mult", _avg(p_mult)), ("prob_power", _avg(p_pow))):
+        tot = np.bincount(gline, np.nan_to_num(p), gline.max() + 1)
+        out[name] = p / np.where(tot > 0, tot, np.nan)[gline]
+    out["best_overround"] = np.bincount(gline, 1.0 / best, gline.max() + 1)[gline] - 1.0
+    return out
+
+def event_odds(cons: pd.DataFrame) -> pd.DataFrame:
+    """Per event, canonical columns: consensus h2h prices, de-vigged probabilities and best prices."""
+    h2h = cons[cons["market"] == "h2h"]
+    if h2h.empty:
+        return pd.DataFrame(columns=["event_id"])
+    wide = h2h.pivot_table(index="event_id", columns="side",
+                           values=["median_price", "best_price", "prob_power", "prob_mult"], aggfunc="first")
+    names = {"median_price": "odds", "best_price": "best_odds", "prob_power": "prob", "prob_mult": "prob_mult"}
+    wide.columns = [f"{names[v]}_{side}" for v, side in wide.columns]
+    order = [f"{v}_{side}" for v in ("odds", "prob", "prob_mult", "best_odds") for side in ("home", "draw", "away")]
+    out = wide[[c for c in order if c in wide.columns]].reset_index()
+    margin = h2h.groupby("event_id", sort=False).agg(h2h_overround=("overround", "first"),
+                                                     h2h_books=("n_books", "max")).reset_index()
+    return out.merge(margin, how="left", on="event_id")
+
+def canonical_odds(long, cons: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Per event, every canonical odds column: the consensus h2h of event_odds() plus the
+    median over/under and spread prices at the main line (odds_flatten.main_lines).
+    """
+    if cons is None:
+        cons = consensus(long)
+    lines = odds_flatten.main_lines(long).drop(columns=["odds_home", "odds_draw", "odds_away"])
+    return lines.merge(event_odds(cons), how="outer", on="event_id")
+
+if __name__ == "__main__":
+    try:
+        if not exists(PRICES):
+            print(f"{PRICES} not found. Run normalize_soccer.py first.")
+            sys.exit(0)
+        cons = consensus(read_frame(PRICES))
+        write_frame(cons, NORM / "odds_consensus.parquet")
+        ev = event_odds(cons)
+        short_obs("odds consensus", [
+            f"lines={len(cons)} events={cons['event_id'].nunique()} markets={sorted(cons['market'].unique())}",
+            f"median h2h overround={cons.loc[cons['market'] == 'h2h', 'overround'].median():.4f}",
+            f"arbitrage lines (best_overround < 0)={int((cons['best_overround'] < 0).sum())}",
+            f"events with consensus odds_home={int(ev['odds_home'].notna().sum()) if 'odds_home' in ev else 0}",
+            f"→ {NORM}/odds_consensus.parquet",
+        ])
+        print("\n✅ odds_consensus complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
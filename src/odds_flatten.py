@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Columnar flattener for Odds API payloads.
+
+flatten() converts the event list to one nested Arrow array in a single pass
+and explodes events x bookmakers x markets x outcomes with list_flatten /
+list_parent_indices, so every bookmaker, market (h2h, totals, spreads, ...)
+and outcome becomes a row without a per-row Python loop:
+
+  event_id  sport_key  commence_time  home_team  away_team  bookmaker  market  outcome  side  point  price ...
+
+wide() pivots that long table to one row per event (h2h_home__pinnacle, totals_over__bet365, ...).
+
+  python src/odds_flatten.py [n_events] [n_books]    # time flatten() on synthetic payloads
+"""
+
+import sys, time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+OUTCOME = pa.struct([("name", pa.string()), ("price", pa.float64()), ("point", pa.float64())])
+MARKET = pa.struct([("key", pa.string()), ("last_update", pa.string()), ("outcomes", pa.list_(OUTCOME))])
+BOOKMAKER = pa.struct([("key", pa.string()), ("title", pa.string()), ("last_update", pa.string()),
+                       ("markets", pa.list_(MARKET))])
+EVENT = pa.struct([("id", pa.string()), ("sport_key", pa.string()), ("sport_title", pa.string()),
+                   ("commence_time", pa.string()), ("home_team", pa.string()), ("away_team", pa.string()),
+                   ("bookmakers", pa.list_(BOOKMAKER))])
+
+COLUMNS = ["event_id", "sport_key", "sport_title", "commence_time", "home_team", "away_team",
+           "bookmaker", "bookmaker_title", "bookmaker_last_update", "market", "market_last_update",
+           "outcome", "side", "point", "price"]
+
+def _explode(lists):
+    """(child values, parent index of each child) for a ListArray; null lists contribute nothing."""
+    return pc.list_flatten(lists), pc.list_parent_indices(lists)
+
+def flatten(events) -> pa.Table:
+    """Odds API events -> long Arrow table, one row per event/bookmaker/market/outcome."""
+    ev = pa.array(events or [], type=EVENT)
+    bm, bm_ev = _explode(ev.field("bookmakers"))
+    mk, mk_bm = _explode(bm.field("markets"))
+    oc, oc_mk = _explode(mk.field("outcomes"))
+    # compose parent pointers: outcome -> market -> bookmaker -> event
+    oc_bm = pc.take(mk_bm, oc_mk)
+    oc_ev = pc.take(bm_ev, oc_bm)
+
+    home, away, name = ev.field("home_team").take(oc_ev), ev.field("away_team").take(oc_ev), oc.field("name")
+    lower = pc.utf8_lower(name)
+    side = pc.case_when(
+        pc.make_struct(pc.equal(name, home), pc.equal(name, away), pc.equal(lower, "draw"),
+                       pc.equal(lower, "over"), pc.equal(lower, "under")),
+        "home", "away", "draw", "over", "under")
+    return pa.table({
+        "event_id": ev.field("id").take(oc_ev),
+        "sport_key": ev.field("sport_key").take(oc_ev),
+        "sport_title": ev.field("sport_title").take(oc_ev),
+        "commence_time": ev.field("commence_time").take(oc_ev),
+        "home_team": home,
+        "away_team": away,
+        "bookmaker": bm.field("key").take(oc_bm),
+        "bookmaker_title": bm.field("title").take(oc_bm),
+        "bookmaker_last_update": bm.field("last_update").take(oc_bm),
+        "market": mk.field("key").take(oc_mk),
+        "market_last_update": mk.field("last_update").take(oc_mk),
+        "outcome": name,
+        "side": side,
+        "point": pc.cast(oc.field("point"), pa.float32()),
+        "price": pc.cast(oc.field("price"), pa.float32()),
+    })
+
+def events_table(events) -> pa.Table:
+    """Event-level columns (one row per event, whether or not it has prices)."""
+    ev = pa.array(events or [], type=EVENT)
+    return pa.table({
+        "event_id": ev.field("id"),
+        "sport_key": ev.field("sport_key"),
+        "sport_title": ev.field("sport_title"),
+        "commence_time": ev.field("commence_time"),
+        "home_team": ev.field("home_team"),
+        "away_team": ev.field("away_team"),
+        "n_bookmakers": pc.fill_null(pc.list_value_length(ev.field("bookmakers")), 0),
+    })
+
+def wide(long: pa.Table, markets=("h2h", "totals", "spreads")) -> pd.DataFrame:
+    """One row per event; columns <market>_<side>__<bookmaker> (prices) and <market>_point__<bookmaker>."""
+    df = long.filter(pc.is_in(long["market"], pa.array(list(markets)))).to_pandas()
+    df = df[df["side"].notna()]
+    if df.empty:
+        return pd.DataFrame(columns=["event_id"])
+    # a book can quote several lines for one market; keep its first (main) line
+    df = df.drop_duplicates(subset=["event_id", "bookmaker", "market", "side"], keep="first")
+    prices = df.pivot(index="event_id", columns=["market", "side", "bookmaker"], values="price")
+    prices.columns = [f"{m}_{s}__{b}" for m, s, b in prices.columns]
+    frames = [prices]
+    lines = df[df["point"].notna() & df["side"].isin(["over", "home"])]
+    if not lines.empty:
+        points = lines.pivot(index="event_id", columns=["market", "bookmaker"], values="point")
+        points.columns = [f"{m}_point__{b}" for m, b in points.columns]
+        frames.append(points)
+    return pd.concat(frames, axis=1).reset_index()
+
+def main_lines(long: pa.Table) -> pd.DataFrame:
+    """
+    One row per event across every bookmaker: median h2h prices, and over/under and
+    spread prices at the most quoted (main) line. Columns follow the canonical schema.
+    """
+    df = long.select(["event_id", "bookmaker_last_update", "market", "side", "point", "price"]).to_pandas()
+    out = pd.DataFrame(index=pd.Index(df["event_id"].unique(), name="event_id"))
+    # books without last_update are NaN among strings: max over the quoted ones only
+    stamped = df[df["bookmaker_last_update"].notna()]
+    out["source_last_update"] = stamped.groupby("event_id", sort=False)["bookmaker_last_update"].max()
+    h2h = df[df["market"] == "h2h"].pivot_table(index="event_id", columns="side", values="price", aggfunc="median")
+    for side in ("home", "draw", "away"):
+        out[f"odds_{side}"] = h2h[side] if side in h2h else np.nan
+    for market, anchor, cols in (("totals", "over", {"over": "total_goals_over_price", "under": "total_goals_under_price"}),
+                                 ("spreads", "home", {"home": "spread_home_price", "away": "spread_away_price"})):
+        m = df[(df["market"] == market) & df["point"].notna()]
+        # main line = the point most books quote for the anchor side
+        main = m[m["side"] == anchor].groupby(["event_id", "point"]).size().reset_index(name="n") \
+            .sort_values(["event_id", "n"], ascending=[True, False], kind="stable").drop_duplicates("event_id")
+        line = main.set_index("event_id")["point"]
+        # signed per side: over/under share the line, spreads are home == line, away == -line
+        want = line.reindex(m["event_id"]).to_numpy()
+        if market == "spreads":
+            want = np.where(m["side"].to_numpy() == "away", -want, want)
+        m = m[m["point"].to_numpy() == want]
+        med = m.pivot_table(index="event_id", columns="side", values="price", aggfunc="median")
+        if market == "totals":
+            out["total_goals_line"] = line
+        else:
+            out["spread_home_line"], out["spread_away_line"] = line, -line
+        for side, col in cols.items():
+            out[col] = med[side] if side in med else np.nan
+    return out.reset_index()
+
+def _synthetic(n_events, n_books):
+    rng = np.random.default_rng(0)
+    def book(j):
+        return {"key": f"book{j}", "title": f"Book {j}", "last_update": "2024-08-17T10:00:00Z", "markets": [
+            {"key": "h2h", "outcomes": [{"name": "Home FC", "price": float(rng.uniform(1.5, 4))},
+                                        {"name": "Away FC", "price": float(rng.uniform(1.5, 4))},
+                                        {"name": "Draw", "price": float(rng.uniform(3, 4))}]},
+            {"key": "totals", "outcomes": [{"name": "Over", "price": 1.9, "point": 2.5},
+                                           {"name": "Under", "price": 1.9, "point": 2.5}]},
+            {"key": "spreads", "outcomes": [{"name": "Home FC", "price": 1.9, "point": -0.5},
+                                            {"name": "Away FC", "price": 1.9, "point": 0.5}]}]}
+    return [{"id": f"ev{i}", "sport_key": "soccer_epl", "commence_time": "2024-08-17T14:00:00Z",
+             "home_team": "Home FC", "away_team": "Away FC", "bookmakers": [book(j) for j in range(n_books)]}
+            for i in range(n_events)]
+
+def _loop_flatten(events):
+    """Reference per-row Python loop (what flatten() replaces)."""
+    rows = []
+    for ev in events:
+        for bm in ev.get("bookmakers") or []:
+            for m in bm.get("markets") or []:
+                for o in m.get("outcomes") or []:
+                    rows.append((ev.get("id"), bm.get("key"), m.get("key"), o.get("name"), o.get("point"), o.get("price")))
+    return pd.DataFrame(rows, columns=["event_id", "bookmaker", "market", "outcome", "point", "price"])
+
+if __name__ == "__main__":
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    n_books = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    events = _synthetic(n_events, n_books)
+    t0 = time.perf_counter(); ref = _loop_flatten(events); t1 = time.perf_counter()
+    long = flatten(events); t2 = time.perf_counter()
+    w = wide(long); t3 = time.perf_counter()
+    assert long.num_rows == len(ref)
+    print(f"{n_events} events x {n_books} books -> {long.num_rows} prices")
+    print(f"python loop : {t1 - t0:.3f}s")
+    print(f"flatten()   : {t2 - t1:.3f}s")
+    print(f"wide()      : {t3 - t2:.3f}s ({w.shape[1]} columns)")
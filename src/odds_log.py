@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Append-only odds snapshot log.
+
+Every Odds API poll is appended as its own small Parquet file at
+event x bookmaker x market x outcome grain, stamped with the capture time:
+  data/odds_log/hourly/date=YYYY-MM-DD/sport_key=<key>/poll_HHMMSS.parquet
+Nothing is ever overwritten, so line movement within a day is kept.
+
+Compaction merges the hourly files of finished days into one file per day:
+  data/odds_log/daily/date=YYYY-MM-DD/sport_key=<key>/part-0.parquet
+
+  python src/odds_log.py compact        # finished days only (safe to run every hour)
+  python src/odds_log.py compact --all  # today as well
+  python src/odds_log.py summary
+
+  ODDS_LOG_DIR=data/odds_log
+"""
+
+import sys, os, uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime, timezone
+from pathlib import Path
+import odds_flatten
+from utils import env, short_obs
+
+ROOT = Path(env("ODDS_LOG_DIR", "data/odds_log"))
+KEY = ["event_id", "bookmaker", "market", "outcome", "point", "captured_at"]
+
+TS = pa.timestamp("ms", tz="UTC")
+SCHEMA = pa.schema([
+    ("captured_at", TS),
+    ("event_id", pa.string()),
+    ("commence_time", TS),
+    ("home_team", pa.string()),
+    ("away_team", pa.string()),
+    ("bookmaker", pa.string()),
+    ("bookmaker_last_update", TS),
+    ("market", pa.string()),
+    ("market_last_update", TS),
+    ("outcome", pa.string()),
+    ("point", pa.float32()),
+    ("price", pa.float32()),
+])
+PARTS = pa.schema([("date", pa.string()), ("sport_key", pa.string())])
+
+def flatten_poll(events, captured_at) -> pa.Table:
+    """Odds API events -> one row per event/bookmaker/market/outcome."""
+    long = odds_flatten.flatten(events)
+    df = long.select([c for c in SCHEMA.names[1:]]).to_pandas()
+    df.insert(0, "captured_at", captured_at)
+    for c in ("captured_at", "commence_time", "bookmaker_last_update", "market_last_update"):
+        df[c] = pd.to_datetime(df[c], utc=True, errors="coerce").dt.floor("ms")
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+def _write(table, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{uuid.uuid4().hex}.part")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)    # readers never see a half-written file
+
+def append_poll(sport_key, events, captured_at=None):
+    """Append one poll; returns the new file (None when the poll had no prices)."""
+    ts = pd.Timestamp(captured_at or datetime.now(timezone.utc))
+    ts = (ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")).floor("ms")
+    table = flatten_poll(events, ts)
+    if table.num_rows == 0:
+        return None
+    d = ROOT / "hourly" / f"date={ts:%Y-%m-%d}" / f"sport_key={sport_key}"
+    path = d / f"poll_{ts:%H%M%S}.parquet"
+    n = 1
+    while path.exists():     # two polls in the same second: never overwrite
+        path = d / f"poll_{ts:%H%M%S}_{n}.parquet"
+        n += 1
+    _write(table, path)
+    return path
+
+def compact(include_today=False):
+    """Merge each finished day's hourly polls into daily/<date>/<sport>/part-0.parquet."""
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    notes = []
+    for day in sorted((ROOT / "hourly").glob("date=*")):
+        date = day.name.split("=", 1)[1]
+        if date >= today and not include_today:
+            continue
+        for sdir in sorted(day.glob("sport_key=*")):
+            polls = sorted(sdir.glob("poll_*.parquet"))
+            if not polls:
+                continue
+            out = ROOT / "daily" / day.name / sdir.name / "part-0.parquet"
+            parts = [pq.read_table(p, schema=SCHEMA) for p in polls]
+            if out.exists():
+                parts.insert(0, pq.read_table(out, schema=SCHEMA))
+            df = pa.concat_tables(parts).to_pandas()
+            df = df.drop_duplicates(subset=KEY, keep="last").sort_values(KEY, kind="stable")
+            _write(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False), out)
+            for p in polls:
+                p.unlink()
+            notes.append(f"{date} {sdir.name.split('=', 1)[1]}: {len(polls)} polls -> {len(df)} rows")
+            try:
+                sdir.rmdir()
+            except OSError:
+                pass   # a poll landed meanwhile; it is compacted next time
+        try:
+            day.rmdir()
+        except OSError:
+            pass
+    return notes
+
+def dataset(tier):
+    return ds.dataset(ROOT / tier, format="parquet", schema=pa.unify_schemas([SCHEMA, PARTS]),
+                      partitioning=ds.partitioning(PARTS, flavor="hive"))
+
+def load(sport_keys=None, start=None, end=None, columns=None) -> pd.DataFrame:
+    """Compacted + hourly rows, pruned by date partition (start/end are YYYY-MM-DD, inclusive)."""
+    flt = None
+    for cond in (ds.field("sport_key").isin(list(sport_keys)) if sport_keys else None,
+                 ds.field("date") >= start if start else None,
+                 ds.field("date") <= end if end else None):
+        if cond is not None:
+            flt = cond if flt is None else flt & cond
+    tables = [dataset(t).to_table(filter=flt, columns=columns)
+              for t in ("daily", "hourly") if (ROOT / t).exists()]
+    if not tables:
+        return pd.DataFrame(columns=columns or SCHEMA.names + PARTS.names)
+    df = pa.concat_tables(tables).to_pandas()
+    # a day can sit in both tiers while it is being compacted
+    key = [c for c in KEY if c in df.columns]
+    return df.drop_duplicates(subset=key) if len(key) == len(KEY) else df
+
+def summary():
+    lines = []
+    for tier in ("daily", "hourly"):
+        files = list((ROOT / tier).glob("date=*/sport_key=*/*.parquet"))
+        rows = sum(pq.ParquetFile(f).metadata.num_rows for f in files)
+        lines.append(f"{tier}: files={len(files)} rows={rows}")
+    return lines
+
+if __name__ == "__main__":
+    try:
+        cmd = sys.argv[1] if len(sys.argv) > 1 else "summary"
+        if cmd == "compact":
+            notes = compact(include_today="--all" in sys.argv[2:])
+            short_obs("odds log compaction", notes or ["nothing to compact"])
+        elif cmd != "summary":
+            print(__doc__)
+            sys.exit(2)
+        short_obs(f"odds log → {ROOT}", summary())
+        print("\n✅ odds_log complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
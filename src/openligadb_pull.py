@@ -1,9 +1,38 @@
 #!/usr/bin/env python3
-import sys, requests, pandas as pd
+"""
+OpenLigaDB pull.
+
+Default mode: full bl1/2024 season payload + sample values (demo).
+
+Incremental mode (OPENLIGADB_INCREMENTAL=1): keeps a per-matchday store under
+data/store/openligadb/<league>/<season>/ and asks getlastchangedate for every
+matchday; only matchdays that changed since the last run (or are missing
+locally) are refetched. The whole season is then snapshotted from the store as
+raw openligadb/<date>/<league>_<season>.json, the same payload the default mode
+saves, and src/normalizers.py builds the tables from it:
+  data/normalized/openligadb_matches.parquet
+  data/normalized/openligadb_goals.parquet
+
+  OPENLIGADB_LEAGUES=bl1,bl2,bl3
+  OPENLIGADB_SEASONS=2023,2024
+"""
+
+import sys, json, re
+import pandas as pd
 from collections import Counter
-from utils import UA, dump_json, print_fields, short_obs
+from pathlib import Path
+import http_client
+from canonical_schema import conform
+from normalizers import load_json, register
+from utils import UA, env, dump_json, json_stem, print_fields, short_obs
 
 URL = "https://api.openligadb.de/getmatchdata/bl1/2024"
+API = "https://api.openligadb.de"
+
+INCREMENTAL = env("OPENLIGADB_INCREMENTAL", "0") == "1"
+LEAGUES = [s.strip() for s in env("OPENLIGADB_LEAGUES", "bl1").split(",") if s.strip()]
+SEASONS = [s.strip() for s in env("OPENLIGADB_SEASONS", "2024").split(",") if s.strip()]
+STORE = Path("data/store/openligadb")
 
 def last_result(m):
     # Handle both 'matchResults' and 'MatchResults'
@@ -19,9 +48,135 @@ def get_val(obj, *keys, default=None):
             return obj[k]
     return default
 
+def get_json(path):
+    r = http_client.get(f"{API}{path}", headers=UA, timeout=30, memo=False)
+    r.raise_for_status()
+    return r.json()
+
+def sync_season(league, season):
+    """Refetch only the matchdays whose last-change date moved. Returns (matches, refetched_groups)."""
+    d = STORE / league / season
+    d.mkdir(parents=True, exist_ok=True)
+    state_path = d / "state.json"
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+
+    groups = [g.get("groupOrderID") for g in get_json(f"/getavailablegroups/{league}/{season}")]
+    groups = [g for g in groups if g is not None]
+    stamps = http_client.fetch_all([{"url": f"{API}/getlastchangedate/{league}/{season}/{g}",
+                                     "headers": UA, "timeout": 30, "memo": False} for g in groups])
+    changed = {}
+    for g, r in zip(groups, stamps):
+        stamp = r.json() if not isinstance(r, Exception) and r.ok else None
+        have = (d / f"md_{g:02d}.json").exists()
+        # unknown stamp (endpoint hiccup) -> refetch to be safe
+        if stamp is None or not have or state.get(str(g)) != stamp:
+            changed[g] = stamp
+
+    fetched = http_client.fetch_all([{"url": f"{API}/getmatchdata/{league}/{season}/{g}",
+                                      "headers": UA, "timeout": 30, "memo": False} for g in changed])
+    for (g, stamp), r in zip(changed.items(), fetched):
+        if isinstance(r, Exception) or not r.ok:
+            print(f"{league} {season} matchday {g}: fetch failed ({r if isinstance(r, Exception) else r.status_code})")
+            continue
+        (d / f"md_{g:02d}.json").write_text(json.dumps(r.json(), ensure_ascii=False), encoding="utf-8")
+        if stamp is not None:
+            state[str(g)] = stamp
+    state_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+    matches = []
+    for p in sorted(d.glob("md_*.json")):
+        matches.extend(json.loads(p.read_text(encoding="utf-8")))
+    return matches, sorted(changed)
+
+def result_of(m, type_id):
+    for res in (m.get("matchResults") or []):
+        if res.get("resultTypeID") == type_id:
+            return res
+    return {}
+
+def normalize(matches, league, season):
+    """OpenLigaDB match payloads -> (matches_df, goals_df)."""
+    mrows, grows = [], []
+    for m in matches:
+        ft, ht = result_of(m, 2), result_of(m, 1)
+        mid = m.get("matchID")
+        mrows.append({
+            "provider": "openligadb",
+            "league": league,
+            "season": season,
+            "match_id": mid,
+            "matchday": (m.get("group") or {}).get("groupOrderID"),
+            "kickoff_utc": m.get("matchDateTimeUTC"),
+            "home_team": (m.get("team1") or {}).get("teamName"),
+            "away_team": (m.get("team2") or {}).get("teamName"),
+            "ft_home_goals": ft.get("pointsTeam1"),
+            "ft_away_goals": ft.get("pointsTeam2"),
+            "ht_home_goals": ht.get("pointsTeam1"),
+            "ht_away_goals": ht.get("pointsTeam2"),
+            "finished": m.get("matchIsFinished"),
+            "last_update": m.get("lastUpdateDateTime"),
+        })
+        for gl in (m.get("goals") or []):
+            grows.append({
+                "provider": "openligadb",
+                "league": league,
+                "season": season,
+                "match_id": mid,
+                "goal_id": gl.get("goalID"),
+                "minute": gl.get("matchMinute"),
+                "score_home": gl.get("scoreTeam1"),
+                "score_away": gl.get("scoreTeam2"),
+                "scorer": gl.get("goalGetterName"),
+                "is_penalty": gl.get("isPenalty"),
+                "is_own_goal": gl.get("isOwnGoal"),
+                "is_overtime": gl.get("isOvertime"),
+            })
+    mdf = pd.DataFrame(mrows, columns=[
+        "provider","league","season","match_id","matchday","kickoff_utc","home_team","away_team",
+        "ft_home_goals","ft_away_goals","ht_home_goals","ht_away_goals","finished","last_update"
+    ])
+    gdf = pd.DataFrame(grows, columns=[
+        "provider","league","season","match_id","goal_id","minute","score_home","score_away",
+        "scorer","is_penalty","is_own_goal","is_overtime"
+    ])
+    # kickoff, goals, league and teams typed per the canonical schema
+    mdf = conform(mdf, fill_missing=False)
+    mdf["matchday"] = mdf["matchday"].astype("Int16")
+    for c in ["minute","score_home","score_away"]:
+        gdf[c] = gdf[c].astype("Int16")
+    return mdf, gdf
+
+# registry entries for src/normalizers.py: one raw season snapshot (<league>_<season>.json) -> rows
+def _season_file(path):
+    league, season = re.match(r"(.+)_(\d{4})$", json_stem(Path(path).name)).groups()
+    return normalize(load_json(path), league, season)
+
+@register("openligadb_matches", "openligadb", ["*_[0-9][0-9][0-9][0-9]"], competition="league", key="match_id")
+def matches_file(path):
+    return _season_file(path)[0]
+
+@register("openligadb_goals", "openligadb", ["*_[0-9][0-9][0-9][0-9]"], competition="league", key="goal_id",
+          teams={})
+def goals_file(path):
+    return _season_file(path)[1]
+
+def incremental():
+    notes = []
+    for league in LEAGUES:
+        for season in SEASONS:
+            matches, changed = sync_season(league, season)
+            # the store is the source of truth: snapshot the whole season, synced or not (no API cost)
+            p = dump_json("openligadb", f"{league}_{season}.json", matches)
+            notes.append(f"{league} {season}: matches={len(matches)} refetched matchdays={changed or 'none'} → {p}")
+    short_obs("openligadb incremental sync", notes + ["tables: python src/normalizers.py openligadb_matches openligadb_goals"])
+
 if __name__ == "__main__":
     try:
-        r = requests.get(URL, headers=UA, timeout=30)
+        if INCREMENTAL:
+            incremental()
+            print("\n✅ openligadb_pull complete (incremental)")
+            sys.exit(0)
+        r = http_client.get(URL, headers=UA, timeout=30)
         r.raise_for_status()
         data = r.json()
         dump_json("openligadb", "bl1_2024.json", data)
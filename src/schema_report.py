@@ -1,25 +1,33 @@
 #!/usr/bin/env python3
-import sys, json
+import sys
 from pathlib import Path
 import pandas as pd
-from utils import today_dir
+import catalog
+from utils import today_dir, json_stem, read_json
 
-def summarize_json_records(path: Path, max_files=8):
+def summarize_file(p: Path):
+    try:
+        obj = read_json(p)
+        if isinstance(obj, list) and obj and isinstance(obj[0], dict):
+            df = pd.DataFrame(obj)
+            return (p.name, len(df), len(df.columns), list(df.columns))
+        elif isinstance(obj, dict):
+            df = pd.json_normalize(obj)
+            return (p.name, len(df), len(df.columns), list(df.columns))
+        else:
+            return (p.name, 0, 0, [])
+    except Exception:
+        return (p.name, -1, -1, [])
+
+def summarize_json_records(source, date, max_files=8):
+    # record counts and top-level keys come from the catalog; files are only
+    # opened for snapshots saved before the catalog existed
     rows = []
-    for i, p in enumerate(sorted(path.glob("*.json"))):
-        if i >= max_files: break
-        try:
-            obj = json.loads(p.read_text(encoding="utf-8"))
-            if isinstance(obj, list) and obj and isinstance(obj[0], dict):
-                df = pd.DataFrame(obj)
-                rows.append((p.name, len(df), len(df.columns), list(df.columns)))
-            elif isinstance(obj, dict):
-                df = pd.json_normalize(obj)
-                rows.append((p.name, len(df), len(df.columns), list(df.columns)))
-            else:
-                rows.append((p.name, 0, 0, []))
-        except Exception:
-            rows.append((p.name, -1, -1, []))
+    for e in catalog.entries(source, date)[:max_files]:
+        if e["records"] is not None:
+            rows.append((e["name"], e["records"], len(e["keys"]), e["keys"]))
+        elif json_stem(e["name"]) is not None:
+            rows.append(summarize_file(e["path"]))
     return rows
 
 if __name__ == "__main__":
@@ -28,14 +36,14 @@ if __name__ == "__main__":
         print("no data/raw yet — run pulls first")
         sys.exit(0)
 
-    for source_dir in root.iterdir():
-        dated = sorted(source_dir.iterdir())[-1] if list(source_dir.iterdir()) else None
+    for source in catalog.sources():
+        dated = catalog.latest_date(source)
         if not dated:
             continue
         print("\n" + "="*80)
-        print(f"schema report — source: {source_dir.name}, date: {dated.name}")
+        print(f"schema report — source: {source}, date: {dated}")
         print("="*80)
-        rows = summarize_json_records(dated)
+        rows = summarize_json_records(source, dated)
         for name, nrows, ncols, cols in rows:
             print(f"\n{name}: rows={nrows}, cols={ncols}")
             if cols:
@@ -10,6 +10,10 @@ Extend this to join with Football-Data/Understat later.
 import sys, json
 from pathlib import Path
 import pandas as pd
+import odds_consensus
+import odds_flatten
+import xg_aggregate
+from canonical_schema import conform
 from utils import today_dir
 
 RAW_DIR = Path("data/raw/odds_api")
@@ -31,73 +35,22 @@ def load_any_today_json(prefix="odds_soccer"):
     return rows
 
 def to_canonical(events):
-    out = []
-    for ev in events:
-        bm = (ev.get("bookmakers") or [])
-        best = None
-        # pick first market set as "best" for demonstration
-        if bm and (bm[0].get("markets")):
-            m = bm[0]["markets"]
-            # extract simple h2h
-            h2h = next((x for x in m if x.get("key")=="h2h"), None)
-            odds_home = odds_draw = odds_away = None
-            if h2h:
-                for o in (h2h.get("outcomes") or []):
-                    if o.get("name") == ev.get("home_team"):
-                        odds_home = o.get("price")
-                    elif o.get("name") == ev.get("away_team"):
-                        odds_away = o.get("price")
-                    elif o.get("name") in ("Draw","draw","X"):
-                        odds_draw = o.get("price")
-            # extract totals if present
-            totals = next((x for x in m if x.get("key")=="totals"), None)
-            total_line = over_price = under_price = None
-            if totals and totals.get("outcomes"):
-                # outcomes often include Over/Under with "point"
-                total_line = totals["outcomes"][0].get("point")
-                for o in totals["outcomes"]:
-                    if str(o.get("name","")).lower().startswith("over"):
-                        over_price = o.get("price")
-                    if str(o.get("name","")).lower().startswith("under"):
-                        under_price = o.get("price")
-            # spreads if present
-            spreads = next((x for x in m if x.get("key")=="spreads"), None)
-            spread_home_line = spread_home_price = spread_away_line = spread_away_price = None
-            if spreads and spreads.get("outcomes"):
-                for o in spreads["outcomes"]:
-                    if o.get("name") == ev.get("home_team"):
-                        spread_home_line = o.get("point"); spread_home_price = o.get("price")
-                    if o.get("name") == ev.get("away_team"):
-                        spread_away_line = o.get("point"); spread_away_price = o.get("price")
-        row = {
-            "provider": "odds_api",
-            "provider_event_id": ev.get("id"),
-            "competition": ev.get("sport_title"),
-            "season": None,
-            "match_date_utc": ev.get("commence_time"),
-            "home_team": ev.get("home_team"),
-            "away_team": ev.get("away_team"),
-            "status": ev.get("status"),
-            "score_home": None,
-            "score_away": None,
-            "odds_home": odds_home,
-            "odds_draw": odds_draw,
-            "odds_away": odds_away,
-            "total_goals_line": total_line,
-            "total_goals_over_price": over_price,
-            "total_goals_under_price": under_price,
-            "spread_home_line": spread_home_line,
-            "spread_home_price": spread_home_price,
-            "spread_away_line": spread_away_line,
-            "spread_away_price": spread_away_price,
-            "xg_home": None,
-            "xg_away": None,
-            "lineup_home_available": None,
-            "lineup_away_available": None,
-            "source_last_update": (bm[0].get("last_update") if bm else None)
-        }
-        out.append(row)
-    return out
+    # every bookmaker, not just bookmakers[0]: consensus h2h, main-line totals and spreads
+    ev = odds_flatten.events_table(events).to_pandas()
+    lines = odds_consensus.canonical_odds(odds_flatten.flatten(events))
+    df = pd.DataFrame({
+        "provider": "odds_api",
+        "provider_event_id": ev["event_id"],
+        "competition": ev["sport_title"],
+        "match_date_utc": ev["commence_time"],
+        "home_team": ev["home_team"],
+        "away_team": ev["away_team"],
+        "status": [e.get("status") for e in events],
+    })
+    df = df.merge(lines, how="left", left_on="provider_event_id", right_on="event_id").drop(columns="event_id")
+    df["n_bookmakers"] = ev["n_bookmakers"]
+    # remaining canonical columns (season, scores, lineups) come in as typed nulls
+    return conform(xg_aggregate.attach(df)).to_dict("records")
 
 if __name__ == "__main__":
     events = load_any_today_json()
@@ -2,19 +2,24 @@
 import os
 import pandas as pd
 from pathlib import Path
+from table_io import exists, read_frame, write_frame
+import team_resolver
+from canonical_schema import conform, parse_utc
 
 NORM = Path("data/normalized")
 RAW  = Path("data/raw")
 OUTJ = Path("data/joined"); OUTJ.mkdir(parents=True, exist_ok=True)
 
 # ---------- Helpers ----------
-def norm_name(s):
+def norm_name(s, source=None):
+    """Join key: normalized canonical team (team_resolver), so "Man Utd" and "Manchester United FC" meet."""
     if s is None:
         return ""
-    return str(s).strip().lower()
+    return team_resolver.team_key(s, source)
 
-def safe_to_datetime(s, utc=True):
-    return pd.to_datetime(s, utc=utc, errors="coerce")
+def team_keys(s, source=None):
+    """norm_name over a column (categorical team columns are mapped as plain values)."""
+    return s.astype(object).map(lambda n: norm_name(n, source))
 
 def ensure_col(df, new_col, from_cols):
     """
@@ -54,6 +59,10 @@ def join_time(a, a_time, b, b_time, keys, hours=4, left_id_col=None):
         return pd.DataFrame()
     a2 = a.copy()
     b2 = b.copy()
+    if b_time in a2.columns:
+        # same time column on both sides: the merge would suffix it away
+        b2 = b2.rename(columns={b_time: f"{b_time}_b"})
+        b_time = f"{b_time}_b"
     a2["_left"]  = a2[a_time] - pd.Timedelta(hours=hours)
     a2["_right"] = a2[a_time] + pd.Timedelta(hours=hours)
     # exact key match first
@@ -78,67 +87,64 @@ def join_time(a, a_time, b, b_time, keys, hours=4, left_id_col=None):
 # ---------- Load inputs (robustly) ----------
 # Fixtures (API-Football)
 fx_path  = NORM / "api_football_fixtures.parquet"
-fx = pd.read_parquet(fx_path) if fx_path.exists() else pd.DataFrame()
+fx = read_frame(fx_path) if exists(fx_path) else pd.DataFrame()
 
 # FD.org matches (future/past with FT results where available)
 fdm_path = NORM / "fdorg_matches.parquet"
-fdm = pd.read_parquet(fdm_path) if fdm_path.exists() else pd.DataFrame()
+fdm = read_frame(fdm_path) if exists(fdm_path) else pd.DataFrame()
 
 # Injuries (API-Football)
 inj_path = NORM / "api_football_injuries.parquet"
-inj = pd.read_parquet(inj_path) if inj_path.exists() else pd.DataFrame()
+inj = read_frame(inj_path) if exists(inj_path) else pd.DataFrame()
 
-# Canonical odds (Stage 5)
-odds_csv = latest_canonical_odds_csv()
-odds = pd.read_csv(odds_csv) if odds_csv else pd.DataFrame()
+# Canonical odds (Stage 5): the typed parquet, else the latest CSV
+odds_path = NORM / "odds_api_canonical.parquet"
+odds_csv = None if exists(odds_path) else latest_canonical_odds_csv()
+odds = read_frame(odds_path) if exists(odds_path) else pd.read_csv(odds_csv) if odds_csv else pd.DataFrame()
 
 # ---------- Normalize columns / create fallbacks ----------
+# one cast to the canonical dtypes (older snapshots predate them; CSV has none)
+fx = conform(fx, fill_missing=False)
+fdm = conform(fdm, fill_missing=False)
 # Fixtures: ensure canonical team columns exist
 fx = ensure_col(fx, "home_canon", ["home_team_canonical", "home_team"])
 fx = ensure_col(fx, "away_canon", ["away_team_canonical", "away_team"])
 fx = ensure_col(fx, "kickoff_utc", ["kickoff_utc", "match_date_utc", "date_utc"])
-fx["kickoff_utc"] = safe_to_datetime(fx["kickoff_utc"])
+fx["kickoff_utc"] = parse_utc(fx["kickoff_utc"])
 # Prefer having a fixture_id; if missing, synthesize a stable id
 fx = ensure_col(fx, "fixture_id", ["fixture_id"])
 if fx["fixture_id"].isna().all():
-    fx["fixture_id"] = (fx["home_canon"].fillna("") + "_" +
-                        fx["away_canon"].fillna("") + "_" +
+    fx["fixture_id"] = (fx["home_canon"].astype("string").fillna("") + "_" +
+                        fx["away_canon"].astype("string").fillna("") + "_" +
                         fx["kickoff_utc"].astype(str))
 
 # FD.org matches: ensure canonical team columns + kickoff
 fdm = ensure_col(fdm, "home_canon", ["home_team_canonical", "home_team"])
 fdm = ensure_col(fdm, "away_canon", ["away_team_canonical", "away_team"])
 fdm = ensure_col(fdm, "kickoff_utc", ["kickoff_utc", "utcDate", "match_date_utc", "date_utc"])
-fdm["kickoff_utc"] = safe_to_datetime(fdm["kickoff_utc"])
+fdm["kickoff_utc"] = parse_utc(fdm["kickoff_utc"])
 # Some files might not have FT goals yet (future); ensure present
 fdm = ensure_col(fdm, "ft_home_goals", ["ft_home_goals"])
 fdm = ensure_col(fdm, "ft_away_goals", ["ft_away_goals"])
 fdm = ensure_col(fdm, "status", ["status"])
 
-# Odds: ensure match datetime column exists as match_date_utc
+# Odds: every canonical column (match_date_utc, teams, odds_*) present and typed
 if not odds.empty:
-    if "match_date_utc" in odds.columns:
-        odds["match_date_utc"] = safe_to_datetime(odds["match_date_utc"])
-    elif "date_utc" in odds.columns:
-        odds["match_date_utc"] = safe_to_datetime(odds["date_utc"])
-    else:
-        odds["match_date_utc"] = pd.NaT
-    odds = ensure_col(odds, "home_team", ["home_team"])
-    odds = ensure_col(odds, "away_team", ["away_team"])
+    odds = conform(ensure_col(odds, "match_date_utc", ["match_date_utc", "date_utc"]))
 
 # Keys for joining
 for c in ["home_canon","away_canon"]:
     if c not in fx.columns:  fx[c]  = None
     if c not in fdm.columns: fdm[c] = None
 
-fx["home_key"]  = fx["home_canon"].map(norm_name)
-fx["away_key"]  = fx["away_canon"].map(norm_name)
-fdm["home_key"] = fdm["home_canon"].map(norm_name)
-fdm["away_key"] = fdm["away_canon"].map(norm_name)
+fx["home_key"]  = team_keys(fx["home_canon"])
+fx["away_key"]  = team_keys(fx["away_canon"])
+fdm["home_key"] = team_keys(fdm["home_canon"])
+fdm["away_key"] = team_keys(fdm["away_canon"])
 
 if not odds.empty:
-    odds["home_key"] = odds["home_team"].map(norm_name)
-    odds["away_key"] = odds["away_team"].map(norm_name)
+    odds["home_key"] = team_keys(odds["home_team"], "odds_api")
+    odds["away_key"] = team_keys(odds["away_team"], "odds_api")
 
 # ---------- Perform joins (robust to empties) ----------
 # 1) fixtures ↔ odds (± hours). Allow override via env (default 4)
@@ -177,7 +183,7 @@ if not fx_odds_res.empty:
         # team_canonical may not exist; fallback to team_name
         if "team_canonical" not in inj.columns:
             inj["team_canonical"] = inj.get("team_name", pd.Series([None]*len(inj)))
-        inj["team_key"] = inj["team_canonical"].map(norm_name)
+        inj["team_key"] = team_keys(inj["team_canonical"])
         counts = inj.groupby("team_key").size().rename("inj_count_team").reset_index()
         fx_odds_res = fx_odds_res.merge(
             counts.rename(columns={"team_key":"home_key"}), how="left", on="home_key"
@@ -189,6 +195,13 @@ if not fx_odds_res.empty:
         fx_odds_res["inj_count_team_home"] = 0
         fx_odds_res["inj_count_team_away"] = 0
 
+# 4) Price history (line_movement.py): consensus opening/closing h2h prices per event
+lm_path = NORM / "odds_line_movement.parquet"
+if not fx_odds_res.empty and exists(lm_path) and "provider_event_id" in fx_odds_res.columns:
+    from line_movement import event_prices
+    prices = event_prices(read_frame(lm_path)).rename(columns={"event_id": "provider_event_id"})
+    fx_odds_res = fx_odds_res.merge(prices, how="left", on="provider_event_id")
+
 # ---------- QC report ----------
 def safe_nunique(df, col):
     return df[col].nunique() if (not df.empty and col in df.columns) else 0
@@ -213,16 +226,22 @@ if not fx_odds_res.empty and {"ft_home_goals","ft_away_goals"}.issubset(fx_odds_
 else:
     qc_lines.append("results columns absent after join")
 
+if not fx_odds_res.empty and "close_home" in fx_odds_res.columns:
+    qc_lines.append(f"Fixtures with closing line: {fx_odds_res['close_home'].notna().sum()}")
+
 # ---------- Save outputs (always) ----------
 # If parquet engine not available, you can switch to CSV by uncommenting:
 # fx_odds_res.to_csv(OUTJ/"stage7_master_training_table.csv", index=False)
 try:
-    fx_odds_res.to_parquet(OUTJ/"stage7_master_training_table.parquet", index=False)
+    write_frame(fx_odds_res, OUTJ/"stage7_master_training_table.parquet")
 except Exception as e:
     # fallback to CSV so the pipeline never fails
     fx_odds_res.to_csv(OUTJ/"stage7_master_training_table.csv", index=False)
     qc_lines.append(f"NOTE: Parquet engine missing, wrote CSV instead. ({e})")
 
+qc_lines.append(f"Team names needing fuzzy/unresolved lookup: {len(team_resolver.default().misses)} "
+                f"(→ {team_resolver.write_report()})")
+
 (Path("data/joined")/"stage7_join_report.txt").write_text("\n".join(qc_lines), encoding="utf-8")
 print("✅ Stage 7 master table → data/joined/")
 print("\n".join(qc_lines))
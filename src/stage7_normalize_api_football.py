@@ -1,40 +1,17 @@
 #!/usr/bin/env python3
-import json
+import sys
 from pathlib import Path
 import pandas as pd
-from utils import today_dir
+from utils import env, inputs_unchanged, mark_inputs
+from table_io import write_frame, output_files, write_dataset, DATASET_DIR
+import normalizers
+import team_resolver
+from normalizers import dated_dirs, load_json, register
 
 RAW = Path("data/raw/api_football")
 OUT = Path("data/normalized"); OUT.mkdir(parents=True, exist_ok=True)
-MAP_PATH = Path("mappings/team_dictionary.csv")
-
-def load_map():
-    if MAP_PATH.exists():
-        m = pd.read_csv(MAP_PATH)
-        need = {"source","source_team","canonical_team"}
-        if not need.issubset(m.columns): raise RuntimeError("team_dictionary.csv missing required columns")
-        return m
-    return pd.DataFrame(columns=["source","source_team","canonical_team"])
-
-MAP = load_map()
-
-def canon(df, src_col, source_name):
-    if df.empty or src_col not in df.columns: return df
-    m = MAP[MAP["source"]==source_name][["source_team","canonical_team"]].drop_duplicates()
-    if m.empty:
-        df[f"{src_col}_canonical"] = df[src_col]
-        return df
-    out = df.merge(m, left_on=src_col, right_on="source_team", how="left")
-    out[f"{src_col}_canonical"] = out["canonical_team"].fillna(out[src_col])
-    return out.drop(columns=["source_team","canonical_team"])
-
-def latest_dir(base):
-    dirs = [p for p in base.glob("*") if p.is_dir()]
-    return sorted(dirs)[-1] if dirs else None
-
-def load_json(path):
-    obj = json.loads(Path(path).read_text(encoding="utf-8"))
-    return obj.get("json", obj)  # unwrap fail-safe wrapper
+# 1 = (re)build the partitioned history from every dated folder, not just the latest
+ALL_DATES = env("STAGE7_ALL_DATES", "0") == "1"
 
 def flatten_fixtures(payload):
     resp = payload.get("response", [])
@@ -66,8 +43,11 @@ def flatten_injuries(payload):
     for r in resp:
         ply = (r.get("player") or {})
         t = (r.get("team") or {})
+        lg = (r.get("league") or {})
         rows.append({
             "provider":"api_football",
+            "league_id": lg.get("id"),
+            "season": lg.get("season"),
             "player_name": ply.get("name"),
             "player_id": ply.get("id"),
             "team_name": t.get("name"),
@@ -76,45 +56,57 @@ def flatten_injuries(payload):
             "reason": r.get("reason"),
         })
     return pd.DataFrame(rows, columns=[
-        "provider","player_name","player_id","team_name","team_id","type","reason"
+        "provider","league_id","season","player_name","player_id","team_name","team_id","type","reason"
     ])
 
-if __name__ == "__main__":
-    d = latest_dir(RAW)
-    OUT.mkdir(parents=True, exist_ok=True)
-    fx = pd.DataFrame(); inj = pd.DataFrame()
+# registry entries: one snapshot -> rows; team names and dtypes are applied by normalizers
+@register("api_football_fixtures", RAW.name, ["fixtures_future_*"], competition="league_id", key="fixture_id")
+def fixtures(path):
+    return flatten_fixtures(load_json(path))
 
-    if d:
-        fx_path  = next(d.glob("fixtures_future_*.json"), None)
-        inj_path = next(d.glob("injuries_*_last14d.json"), None)
+@register("api_football_injuries", RAW.name, ["injuries_*_last14d"], competition="league_id", sort_by=None,
+          teams={"team_name": "team_canonical"})
+def injuries(path):
+    return flatten_injuries(load_json(path))
+
+def input_paths(d):
+    # one fixtures/injuries snapshot per league (APIFOOTBALL_LEAGUE_IDS)
+    return (normalizers.REGISTRY["api_football_fixtures"].inputs(d.name),
+            normalizers.REGISTRY["api_football_injuries"].inputs(d.name))
+
+def normalize_dir(d):
+    fx_paths, inj_paths = input_paths(d)
+    return normalizers.normalize("api_football_fixtures", fx_paths), normalizers.normalize("api_football_injuries", inj_paths)
 
-        if fx_path and fx_path.exists():
-            try:
-                fx_json = load_json(fx_path)
-                fx = flatten_fixtures(fx_json)
-                if not fx.empty:
-                    fx = canon(fx, "home_team", "api_football")
-                    fx = canon(fx, "away_team", "api_football")
-                    if "kickoff_utc" in fx.columns:
-                        fx["kickoff_utc"] = pd.to_datetime(fx["kickoff_utc"], utc=True, errors="coerce")
-            except Exception as e:
-                print("Fixture normalize error:", e)
+def to_history(fx, inj, d):
+    write_dataset(fx, "api_football_fixtures", d.name, competition="league_id", season="season")
+    write_dataset(inj, "api_football_injuries", d.name, competition="league_id", season="season", sort_by=None)
 
-        if inj_path and inj_path.exists():
-            try:
-                inj_json = load_json(inj_path)
-                inj = flatten_injuries(inj_json)
-                if not inj.empty:
-                    m = MAP[MAP["source"]=="api_football"][["source_team","canonical_team"]].drop_duplicates()
-                    if not m.empty:
-                        inj = inj.merge(m, left_on="team_name", right_on="source_team", how="left")\
-                                 .assign(team_canonical=lambda d: d["canonical_team"].fillna(d["team_name"]))\
-                                 .drop(columns=["source_team","canonical_team"])
-                    else:
-                        inj["team_canonical"] = inj["team_name"]
-            except Exception as e:
-                print("Injuries normalize error:", e)
+if __name__ == "__main__":
+    dirs = dated_dirs(RAW)
+    OUT.mkdir(parents=True, exist_ok=True)
+    if ALL_DATES:
+        for old in dirs[:-1]:
+            fx, inj = normalize_dir(old)
+            to_history(fx, inj, old)
+            print(f"history {old.name}: fixtures={len(fx)} injuries={len(inj)}")
+    d = dirs[-1] if dirs else None
+    fx_paths, inj_paths = input_paths(d) if d else ([], [])
 
-    fx.to_parquet(OUT/"api_football_fixtures.parquet", index=False)
-    inj.to_parquet(OUT/"api_football_injuries.parquet", index=False)
-    print("✅ Stage 7: normalized API-Football → data/normalized/*.parquet")
\ No newline at end of file
+    # same input hashes as the last run -> both parquets are already up to date
+    unchanged, digest = inputs_unchanged("stage7_api_football",
+                                         fx_paths + inj_paths + normalizers.REGISTRY["api_football_fixtures"].dependencies(),
+                                         [*output_files(OUT/"api_football_fixtures.parquet"), *output_files(OUT/"api_football_injuries.parquet"),
+                                          DATASET_DIR/"api_football_fixtures"])
+    if unchanged and (fx_paths or inj_paths):
+        print("✅ Stage 7: API-Football inputs unchanged → keeping data/normalized/*.parquet")
+        sys.exit(0)
+
+    fx, inj = normalize_dir(d) if d else (pd.DataFrame(), pd.DataFrame())
+    write_frame(fx, OUT/"api_football_fixtures.parquet")
+    write_frame(inj, OUT/"api_football_injuries.parquet")
+    if d:
+        to_history(fx, inj, d)
+    mark_inputs("stage7_api_football", digest)
+    team_resolver.write_report()
+    print("✅ Stage 7: normalized API-Football → data/normalized/*.parquet (+ dataset/api_football_*/)")
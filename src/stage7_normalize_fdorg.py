@@ -1,35 +1,18 @@
 #!/usr/bin/env python3
-import json
+import sys
 from pathlib import Path
 import pandas as pd
+import catalog
+from utils import env, inputs_unchanged, mark_inputs
+from table_io import write_frame, output_files, write_dataset, DATASET_DIR
+import normalizers
+import team_resolver
+from normalizers import dated_dirs, load_json, register
 
 RAW = Path("data/raw/footballdata_org")
 OUT = Path("data/normalized"); OUT.mkdir(parents=True, exist_ok=True)
-MAP_PATH = Path("mappings/team_dictionary.csv")
-
-def load_map():
-    return pd.read_csv(MAP_PATH) if MAP_PATH.exists() else pd.DataFrame(columns=["source","source_team","canonical_team"])
-
-MAP = load_map()
-
-def canon(df, src_col):
-    if df.empty or src_col not in df.columns: return df
-    m = MAP[MAP["source"]=="footballdata_org"][["source_team","canonical_team"]].drop_duplicates()
-    if m.empty:
-        df[f"{src_col}_canonical"] = df[src_col]
-        return df
-    out = df.merge(m, left_on=src_col, right_on="source_team", how="left")
-    out[f"{src_col}_canonical"] = out["canonical_team"].fillna(out[src_col])
-    return out.drop(columns=["source_team","canonical_team"])
-
-def latest_dir(base):
-    dirs = [p for p in base.glob("*") if p.is_dir()]
-    return sorted(dirs)[-1] if dirs else None
-
-def load_json(path):
-    txt = Path(path).read_text(encoding="utf-8")
-    obj = json.loads(txt)
-    return obj.get("json", obj)
+# 1 = (re)build the partitioned history from every dated folder, not just the latest
+ALL_DATES = env("STAGE7_ALL_DATES", "0") == "1"
 
 def flatten_matches(payload):
     rows=[]
@@ -37,6 +20,7 @@ def flatten_matches(payload):
         rows.append({
             "provider":"footballdata_org",
             "comp_code": (m.get("competition") or {}).get("code"),
+            "season": ((m.get("season") or {}).get("startDate") or "")[:4] or None,
             "match_id": m.get("id"),
             "kickoff_utc": m.get("utcDate"),
             "status": m.get("status"),
@@ -46,23 +30,46 @@ def flatten_matches(payload):
             "ft_away_goals": ((m.get("score") or {}).get("fullTime") or {}).get("away"),
         })
     return pd.DataFrame(rows, columns=[
-        "provider","comp_code","match_id","kickoff_utc","status",
+        "provider","comp_code","season","match_id","kickoff_utc","status",
         "home_team","away_team","ft_home_goals","ft_away_goals"
     ])
 
-if __name__ == "__main__":
-    d = latest_dir(RAW)
-    frames=[]
-    if d:
-        for p in [*d.glob("matches_future_*.json"), *d.glob("matches_past_*.json")]:
-            payload = load_json(p)
-            frames.append(flatten_matches(payload))
-    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+def input_paths(d):
+    # legacy matches_future_/matches_past_ files first, merged store snapshots
+    # (matches_<code>.json) last, so the store wins on duplicate match ids
+    legacy = [*catalog.files(RAW.name, d.name, "matches_future_*"), *catalog.files(RAW.name, d.name, "matches_past_*")]
+    stores = [p for p in catalog.files(RAW.name, d.name, "matches_*") if p not in legacy]
+    return [*sorted(legacy), *sorted(stores)]
+
+@register("fdorg_matches", RAW.name, inputs=lambda date: input_paths(RAW / date), competition="comp_code",
+          key="match_id")
+def matches(path):
+    return flatten_matches(load_json(path))
+
+def normalize_dir(d):
+    # store snapshots come last in input_paths, so they win on duplicate match ids
+    return normalizers.normalize("fdorg_matches", input_paths(d))
 
-    if not df.empty:
-        df = canon(df, "home_team")
-        df = canon(df, "away_team")
-        df["kickoff_utc"] = pd.to_datetime(df["kickoff_utc"], utc=True, errors="coerce")
+def to_history(df, d):
+    return write_dataset(df, "fdorg_matches", d.name, competition="comp_code", season="season")
 
-    df.to_parquet(OUT/"fdorg_matches.parquet", index=False)
-    print("✅ Stage 7: normalized FD.org → data/normalized/fdorg_matches.parquet")
\ No newline at end of file
+if __name__ == "__main__":
+    dirs = dated_dirs(RAW)
+    if ALL_DATES:
+        for old in dirs[:-1]:
+            print(f"history {old.name}: rows={to_history(normalize_dir(old), old)}")
+    d = dirs[-1] if dirs else None
+    paths = input_paths(d) if d else []
+    # same input hashes as the last run -> the parquet is already up to date
+    unchanged, digest = inputs_unchanged("stage7_fdorg", paths + normalizers.REGISTRY["fdorg_matches"].dependencies(),
+                                         [*output_files(OUT/"fdorg_matches.parquet"), DATASET_DIR/"fdorg_matches"])
+    if unchanged and paths:
+        print("✅ Stage 7: FD.org inputs unchanged → keeping data/normalized/fdorg_matches.parquet")
+        sys.exit(0)
+    df = normalize_dir(d) if d else pd.DataFrame()
+    write_frame(df, OUT/"fdorg_matches.parquet")
+    if d:
+        to_history(df, d)
+    mark_inputs("stage7_fdorg", digest)
+    team_resolver.write_report()
+    print("✅ Stage 7: normalized FD.org → data/normalized/fdorg_matches.parquet (+ dataset/fdorg_matches/)")
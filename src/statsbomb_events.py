@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Streaming StatsBomb event flattener.
+
+Event files are parsed one event at a time (incremental raw_decode over a
+decompressed byte stream), so a match file is never held in memory whole.
+Shots, passes, carries and pressures go to typed Parquet tables with a
+fixed set of columns, written STATSBOMB_BATCH_ROWS rows at a time:
+
+  data/normalized/statsbomb_events/<shots|passes|carries|pressures>/part-NNN.parquet
+
+Match files are split across STATSBOMB_PROCS worker processes; each worker
+writes its own part file per table. A match's rows are kept only when its whole
+file parsed, and a run's output replaces the previous one only when it finished.
+
+  python src/statsbomb_events.py            # crawl mirror (open_data/events/) or the latest events_* snapshots
+  python src/statsbomb_events.py a.json ... # explicit files
+
+  STATSBOMB_PROCS=4                 default: CPU count
+  STATSBOMB_BATCH_ROWS=50000
+"""
+
+import sys, os, re, json, codecs, shutil, uuid
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import catalog
+from utils import DATA_DIR, env, open_snapshot, short_obs
+
+OUT = Path("data/normalized/statsbomb_events")
+MIRROR = DATA_DIR / "statsbomb_open" / "open_data"
+PROCS = int(env("STATSBOMB_PROCS", str(os.cpu_count() or 1)))
+BATCH_ROWS = int(env("STATSBOMB_BATCH_ROWS", "50000"))
+CHUNK = 1 << 20
+
+COMMON = [
+    ("match_id", pa.int32()), ("id", pa.string()), ("index", pa.int32()), ("period", pa.int8()),
+    ("timestamp", pa.string()), ("minute", pa.int16()), ("second", pa.int16()), ("possession", pa.int32()),
+    ("team_id", pa.int32()), ("team", pa.string()), ("player_id", pa.int32()), ("player", pa.string()),
+    ("position", pa.string()), ("play_pattern", pa.string()), ("x", pa.float32()), ("y", pa.float32()),
+    ("under_pressure", pa.bool_()), ("duration", pa.float32()),
+]
+SCHEMAS = {
+    "shots": pa.schema(COMMON + [
+        ("end_x", pa.float32()), ("end_y", pa.float32()), ("end_z", pa.float32()), ("xg", pa.float32()),
+        ("outcome", pa.string()), ("body_part", pa.string()), ("technique", pa.string()),
+        ("shot_type", pa.string()), ("first_time", pa.bool_()), ("key_pass_id", pa.string()),
+    ]),
+    "passes": pa.schema(COMMON + [
+        ("recipient_id", pa.int32()), ("recipient", pa.string()), ("length", pa.float32()), ("angle", pa.float32()),
+        ("end_x", pa.float32()), ("end_y", pa.float32()), ("height", pa.string()), ("body_part", pa.string()),
+        ("pass_type", pa.string()), ("outcome", pa.string()), ("cross", pa.bool_()), ("switch", pa.bool_()),
+        ("through_ball", pa.bool_()), ("shot_assist", pa.bool_()), ("goal_assist", pa.bool_()),
+    ]),
+    "carries": pa.schema(COMMON + [("end_x", pa.float32()), ("end_y", pa.float32())]),
+    "pressures": pa.schema(COMMON + [("counterpress", pa.bool_())]),
+}
+TYPES = {"Shot": "shots", "Pass": "passes", "Carry": "carries", "Pressure": "pressures"}
+
+def iter_events(path):
+    """
+    Yield the objects of a JSON array file one at a time (plain, .gz, .zst or deduplicated).
+    Raises ValueError when the array never opens or never closes (empty or truncated file).
+    """
+    dec = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, started = "", 0, False
+    with open_snapshot(path) as f:
+        while True:
+            chunk = f.read(CHUNK)
+            buf = buf[pos:] + text.decode(chunk, final=not chunk)
+            pos = 0
+            while True:
+                while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+                    pos += 1
+                if not started and pos < len(buf):
+                    if buf[pos] != "[":
+                        raise ValueError(f"{path}: expected a JSON array")
+                    started, pos = True, pos + 1
+                    continue
+                if pos < len(buf) and buf[pos] == "]":
+                    return      # closing bracket: the whole array was read
+                if pos >= len(buf):
+                    break
+                try:
+                    obj, end = dec.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break       # object continues in the next chunk
+                pos = end
+                yield obj
+            if not chunk:
+                raise ValueError(f"{path}: {'unterminated' if started else 'empty'} JSON array")
+
+def _name(d):
+    return d.get("name") if isinstance(d, dict) else None
+
+def _id(d):
+    return d.get("id") if isinstance(d, dict) else None
+
+def _xy(loc, i):
+    return float(loc[i]) if isinstance(loc, list) and len(loc) > i and loc[i] is not None else None
+
+def _common(match_id, ev):
+    loc = ev.get("location")
+    return [match_id, ev.get("id"), ev.get("index"), ev.get("period"), ev.get("timestamp"), ev.get("minute"),
+            ev.get("second"), ev.get("possession"), _id(ev.get("team")), _name(ev.get("team")),
+            _id(ev.get("player")), _name(ev.get("player")), _name(ev.get("position")),
+            _name(ev.get("play_pattern")), _xy(loc, 0), _xy(loc, 1), bool(ev.get("under_pressure")),
+            ev.get("duration")]
+
+def row(match_id, ev):
+    """(table, values in SCHEMAS[table] order) for the event types we keep, else None."""
+    table = TYPES.get(_name(ev.get("type")))
+    if table is None:
+        return None
+    r = _common(match_id, ev)
+    if table == "shots":
+        s = ev.get("shot") or {}
+        end = s.get("end_location")
+        r += [_xy(end, 0), _xy(end, 1), _xy(end, 2), s.get("statsbomb_xg"), _name(s.get("outcome")),
+              _name(s.get("body_part")), _name(s.get("technique")), _name(s.get("type")),
+              bool(s.get("first_time")), s.get("key_pass_id")]
+    elif table == "passes":
+        p = ev.get("pass") or {}
+        end = p.get("end_location")
+        r += [_id(p.get("recipient")), _name(p.get("recipient")), p.get("length"), p.get("angle"),
+              _xy(end, 0), _xy(end, 1), _name(p.get("height")), _name(p.get("body_part")), _name(p.get("type")),
+              _name(p.get("outcome")),   # null = completed
+              bool(p.get("cross")), bool(p.get("switch")), bool(p.get("through_ball")),
+              bool(p.get("shot_assist")), bool(p.get("goal_assist"))]
+    elif table == "carries":
+        end = (ev.get("carry") or {}).get("end_location")
+        r += [_xy(end, 0), _xy(end, 1)]
+    else:
+        r += [bool(ev.get("counterpress"))]
+    return table, r
+
+class Batches:
+    """Column buffers per table; every BATCH_ROWS rows are handed to sink(table, pa.Table)."""
+    def __init__(self, sink, batch_rows=BATCH_ROWS):
+        self.sink, self.batch_rows = sink, batch_rows
+        self.cols = {t: [[] for _ in s] for t, s in SCHEMAS.items()}
+        self.rows = dict.fromkeys(SCHEMAS, 0)
+
+    def add(self, table, values):
+        for col, v in zip(self.cols[table], values):
+            col.append(v)
+        self.rows[table] += 1
+        if len(self.cols[table][0]) >= self.batch_rows:
+            self.flush(table)
+
+    def flush(self, table=None):
+        for t in [table] if table else SCHEMAS:
+            if self.cols[t][0]:
+                schema = SCHEMAS[t]
+                self.sink(t, pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(self.cols[t], schema)],
+                                                  schema=schema))
+                self.cols[t] = [[] for _ in schema]
+
+def match_id_of(path):
+    m = re.search(r"(\d+)", Path(path).name)
+    return int(m.group(1)) if m else None
+
+def flatten_file(path):
+    """One match file -> {table: pa.Table} (in memory; for a quick look at a single match)."""
+    parts = {t: [] for t in SCHEMAS}
+    b = Batches(lambda t, tbl: parts[t].append(tbl))
+    mid = match_id_of(path)
+    for ev in iter_events(path):
+        r = row(mid, ev)
+        if r:
+            b.add(*r)
+    b.flush()
+    return {t: pa.concat_tables(p) if p else SCHEMAS[t].empty_table() for t, p in parts.items()}
+
+def flatten_files(paths, out_dir, part):
+    """Worker: stream every file in paths into out_dir/<table>/part-<part>.parquet. Returns rows per table."""
+    out_dir = Path(out_dir)
+    writers, tmps = {}, {}
+
+    def sink(t, tbl):
+        if t not in writers:
+            d = out_dir / t
+            d.mkdir(parents=True, exist_ok=True)
+            tmps[t] = d / f".{uuid.uuid4().hex}.part"
+            writers[t] = pq.ParquetWriter(tmps[t], SCHEMAS[t])
+        writers[t].write_table(tbl)
+
+    b = Batches(sink)
+    failed = []
+    for p in paths:
+        mid = match_id_of(p)
+        # a match's kept rows are committed only once its file has parsed to the end,
+        # so a truncated or corrupt file leaves nothing behind in the tables
+        try:
+            rows = [r for r in (row(mid, ev) for ev in iter_events(p)) if r]
+        except Exception as e:
+            failed.append(f"{p}: {e!r}")
+            continue
+        for r in rows:
+            b.add(*r)
+    b.flush()
+    for t, w in writers.items():
+        w.close()
+        os.replace(tmps[t], out_dir / t / f"part-{part:03d}.parquet")
+    return b.rows, failed
+
+def event_files():
+    """Crawl mirror events (open_data/events/*.json) if present, else the latest events_* snapshots."""
+    mirror = sorted((MIRROR / "events").glob("*.json"))
+    if mirror:
+        return mirror
+    latest = catalog.latest_date("statsbomb_open")
+    return catalog.files("statsbomb_open", latest, "events_*") if latest else []
+
+def run(paths, out_dir=OUT, procs=PROCS):
+    """
+    Flatten paths across procs worker processes into a temp dir that replaces the previous
+    output only once every worker has finished (a crashed run keeps the old tables). Returns (rows, failed).
+    """
+    out_dir = Path(out_dir)
+    tmp = out_dir.with_name(f".{out_dir.name}.{uuid.uuid4().hex}")
+    tmp.mkdir(parents=True)
+    try:
+        rows, failed = _run(paths, tmp, procs)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    old = out_dir.with_name(f".{out_dir.name}.old.{uuid.uuid4().hex}")
+    if out_dir.exists():
+        os.replace(out_dir, old)
+    os.replace(tmp, out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+    return rows, failed
+
+def _run(paths, out_dir, procs):
+    # largest files first, dealt round-robin, so workers finish together
+    paths = sorted(paths, key=lambda p: Path(p).stat().st_size if Path(p).exists() else 0, reverse=True)
+    procs = max(1, min(procs, len(paths)))
+    chunks = [paths[i::procs] for i in range(procs)]
+    rows, failed = dict.fromkeys(SCHEMAS, 0), []
+    if procs == 1:
+        results = [flatten_files(chunks[0], out_dir, 0)] if paths else []
+    else:
+        with ProcessPoolExecutor(max_workers=procs) as pool:
+            results = list(pool.map(flatten_files, chunks, [out_dir] * procs, range(procs)))
+    for r, f in results:
+        for t, n in r.items():
+            rows[t] += n
+        failed += f
+    return rows, failed
+
+if __name__ == "__main__":
+    try:
+        paths = [Path(p) for p in sys.argv[1:]] or event_files()
+        if not paths:
+            print("No StatsBomb event files found. Run statsbomb_open_pull.py first.")
+            sys.exit(0)
+        rows, failed = run(paths)
+        short_obs("statsbomb events", [f"files={len(paths)} procs={max(1, min(PROCS, len(paths)))} "
+                                       f"batch_rows={BATCH_ROWS}"]
+                  + [f"{t}: {n} rows → {OUT / t}" for t, n in rows.items()]
+                  + [f"failed: {f}" for f in failed[:10]])
+        print("\n✅ statsbomb_events complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
@@ -1,15 +1,137 @@
 #!/usr/bin/env python3
-import sys, requests, pandas as pd
-from utils import UA, dump_json, print_fields
+"""
+StatsBomb Open Data pull.
+
+Default (smoke) mode: competitions.json, the first competition/season's matches
+and the first match's events, with a few sample values printed.
+
+Crawl mode (STATSBOMB_CRAWL=1): walks every competition/season in competitions.json
+and mirrors every matches, events, lineups and three-sixty file into
+data/raw/statsbomb_open/open_data/ (same layout as the upstream repo).
+- bounded worker pool (STATSBOMB_WORKERS, default 16)
+- checkpoint manifest (open_data/manifest.jsonl): every finished file, including
+  upstream 404s (most matches have no 360 data), is appended as it completes, so
+  an interrupted crawl resumes where it stopped
+- STATSBOMB_KINDS limits the per-match files (default events,lineups,three-sixty)
+"""
+
+import sys, json, os, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import http_client
+import statsbomb_events
+from utils import UA, DATA_DIR, env, dump_json, dump_json_stream, print_fields, short_obs
 
 BASE = "https://raw.githubusercontent.com/statsbomb/open-data/master/data"
 
+CRAWL = env("STATSBOMB_CRAWL", "0") == "1"
+WORKERS = int(env("STATSBOMB_WORKERS", "16"))
+KINDS = [k.strip() for k in env("STATSBOMB_KINDS", "events,lineups,three-sixty").split(",") if k.strip()]
+MIRROR = DATA_DIR / "statsbomb_open" / "open_data"
+
 def get(url):
-    r = requests.get(url, headers=UA, timeout=30)
+    # open-data files rarely change; revalidate instead of re-downloading
+    r = http_client.get(url, headers=UA, timeout=30, conditional=True)
     r.raise_for_status()
     return r
 
+class CrawlManifest:
+    """Append-only checkpoint: one JSON line per finished file (rel path, status, bytes) or change to one."""
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self.lock = threading.Lock()
+        if path.exists():
+            for ln in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    rec = json.loads(ln)
+                    self.done[rec["path"]] = rec
+                except (ValueError, KeyError):
+                    continue   # torn last line from a killed run
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __contains__(self, rel):
+        return rel in self.done
+
+    def add(self, rel, status, nbytes):
+        rec = {"path": rel, "status": status, "bytes": nbytes, "at": int(time.time())}
+        with self.lock:
+            old = self.done.get(rel)
+            if old and (old["status"], old["bytes"]) == (status, nbytes):
+                return   # revalidated unchanged (refresh=True): nothing new to checkpoint
+            self.done[rel] = rec
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+
+def mirror_file(rel, manifest, refresh=False):
+    """
+    Download BASE/rel into MIRROR/rel unless the manifest already has it.
+    refresh=True always revalidates (conditional GET) — used for the season
+    match lists, which grow while a season is running.
+    Returns "resumed", "ok" or "missing".
+    """
+    if rel in manifest and not refresh:
+        return "resumed"
+    # large bodies: skip the in-memory memo, the manifest is the cache here
+    r = http_client.get(f"{BASE}/{rel}", headers=UA, timeout=60, memo=False, conditional=refresh)
+    if r.status_code == 404:
+        manifest.add(rel, 404, 0)
+        return "missing"
+    r.raise_for_status()
+    out = MIRROR / rel
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".part")
+    tmp.write_bytes(r.content)
+    os.replace(tmp, out)    # never leave a half-written file behind a manifest entry
+    manifest.add(rel, 200, len(r.content))
+    return "ok"
+
+def crawl():
+    manifest = CrawlManifest(MIRROR / "manifest.jsonl")
+    http_client.set_host_limit("raw.githubusercontent.com", WORKERS)
+    comps = get(f"{BASE}/competitions.json").json()
+    MIRROR.mkdir(parents=True, exist_ok=True)
+    (MIRROR / "competitions.json").write_text(json.dumps(comps, ensure_ascii=False), encoding="utf-8")
+    seasons = sorted({(c["competition_id"], c["season_id"]) for c in comps})
+    print(f"crawl: {len(seasons)} competition/seasons, resume from {len(manifest.done)} finished files")
+
+    stats = {"ok": 0, "missing": 0, "resumed": 0, "failed": 0}
+    def run(pool, rels, refresh=False):
+        futs = {pool.submit(mirror_file, rel, manifest, refresh): rel for rel in rels}
+        for i, fut in enumerate(as_completed(futs), 1):
+            try:
+                stats[fut.result()] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"failed: {futs[fut]} ({e!r})")
+            if i % 500 == 0:
+                print(f"  {i}/{len(futs)} files ({stats})")
+
+    with ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="sb") as pool:
+        season_rels = [f"matches/{cid}/{sid}.json" for cid, sid in seasons]
+        run(pool, season_rels, refresh=True)
+        match_ids = []
+        for rel in season_rels:
+            p = MIRROR / rel
+            if p.exists():
+                match_ids += [m["match_id"] for m in json.loads(p.read_text(encoding="utf-8"))]
+        print(f"crawl: {len(match_ids)} matches x {KINDS}")
+        run(pool, [f"{kind}/{mid}.json" for mid in match_ids for kind in KINDS])
+
+    short_obs("statsbomb crawl summary", [
+        f"competition/seasons={len(seasons)} matches={len(match_ids)}",
+        f"this run: downloaded={stats['ok']} resumed={stats['resumed']} "
+        f"missing_upstream={stats['missing']} failed={stats['failed']}",
+        f"manifest entries={len(manifest.done)} → {manifest.path}",
+    ])
+    return stats["failed"] == 0
+
 if __name__ == "__main__":
+    if CRAWL:
+        try:
+            sys.exit(0 if crawl() else 1)
+        except Exception as e:
+            print("❌", repr(e))
+            sys.exit(1)
     try:
         comps = get(f"{BASE}/competitions.json").json()
         dump_json("statsbomb_open", "competitions.json", comps)
@@ -28,16 +150,18 @@ if __name__ == "__main__":
 
         mid = matches[0]["match_id"]
         events = get(f"{BASE}/events/{mid}.json").json()
-        dump_json("statsbomb_open", f"events_{mid}.json", events)
+        path = dump_json_stream("statsbomb_open", f"events_{mid}.json", events)
 
-        df = pd.json_normalize(events)
-        print(f"\nrows(events)={len(df)}, cols={len(df.columns)}")
+        # typed per-type tables, streamed back from the snapshot (statsbomb_events.py)
+        tables = statsbomb_events.flatten_file(path)
+        print(f"\nrows(events)={len(events)}, " + ", ".join(f"{t}={x.num_rows}" for t, x in tables.items()))
         # show real values for a few key columns
-        show = ["type.name","team.name","player.name","shot.statsbomb_xg","pass.length","pass.height","minute","second"]
-        present = [c for c in show if c in df.columns]
-        print("\nexample values:")
-        print(df[present].head(8).to_string(index=False))
+        for t, show in (("shots", ["minute", "second", "team", "player", "xg", "outcome"]),
+                        ("passes", ["minute", "second", "team", "player", "length", "height"])):
+            print(f"\nexample {t}:")
+            print(tables[t].select(show).slice(0, 8).to_pandas().to_string(index=False))
 
+        short_obs("conditional GET cache", [http_client.VALIDATORS.summary()])
         print("\n✅ statsbomb_open_pull complete")
     except Exception as e:
         print("❌", repr(e))
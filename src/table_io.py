@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Table output/input for data/normalized and data/joined.
+
+Parquet is always written. With TABLE_IPC=1 an uncompressed Arrow IPC file
+(Feather v2) is written next to it (<name>.arrow). Readers memory-map that file:
+open_table() returns Arrow columns backed by the page cache (no decode, no copy),
+so several processes reading the same table share one copy in memory.
+
+  from table_io import open_table, read_frame
+  t  = open_table("data/joined/stage7_master_training_table.parquet", columns=[...])
+  df = read_frame("data/normalized/fdorg_matches.parquet")
+
+Normalized history goes to a hive-partitioned dataset, one snapshot date at a time:
+  data/normalized/dataset/<table>/provider=/competition=/season=/date=/part-0.parquet
+Rows are sorted by kickoff in small row groups, so read_dataset() prunes by
+partition first and then by row-group min/max statistics (kickoff, teams).
+
+  read_dataset("api_football_fixtures", competition="39", kickoff=[("2024-03-01", "2024-04-01"),
+               ("2023-03-01", "2023-04-01")], teams=["Arsenal"], key="fixture_id")
+
+  python src/table_io.py              # list tables and which have an .arrow sibling
+"""
+
+import sys, os, uuid
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from pathlib import Path
+from utils import env, short_obs
+
+TABLE_IPC = env("TABLE_IPC", "0") == "1"
+DATASET_DIR = Path("data/normalized/dataset")
+PARTITIONS = ["provider", "competition", "season", "date"]
+ROW_GROUP_ROWS = int(env("DATASET_ROW_GROUP_ROWS", "5000"))
+
+def ipc_path(path) -> Path:
+    return Path(path).with_suffix(".arrow")
+
+def _atomic(path, write):
+    tmp = path.with_name(f".{uuid.uuid4().hex}{path.suffix}")
+    write(tmp)
+    os.replace(tmp, path)   # a process mapping the old file keeps its view
+
+def write_frame(df: pd.DataFrame, path, ipc=None):
+    """df -> path (.parquet), plus the .arrow sibling when TABLE_IPC (or ipc=True)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    _atomic(path, lambda p: pq.write_table(table, p))
+    a = ipc_path(path)
+    if TABLE_IPC if ipc is None else ipc:
+        # uncompressed so the file can be mapped and used in place
+        _atomic(a, lambda p: feather.write_feather(table, p, compression="uncompressed"))
+    elif a.exists():
+        a.unlink()      # never leave a stale sibling that readers would prefer
+    return path
+
+def open_table(path, columns=None) -> pa.Table:
+    """Arrow table for path: memory-mapped from the .arrow sibling when present, else read from Parquet."""
+    path = Path(path)
+    a = ipc_path(path)
+    if a.exists() and (not path.exists() or a.stat().st_mtime >= path.stat().st_mtime):
+        return feather.read_table(a, columns=columns, memory_map=True)
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+def read_frame(path, columns=None) -> pd.DataFrame:
+    """pandas view of open_table (numeric columns without nulls come through without a copy)."""
+    return open_table(path, columns).to_pandas(split_blocks=True)
+
+def output_files(path):
+    """Files write_frame(…, path) produces under the current TABLE_IPC setting."""
+    return [Path(path), ipc_path(path)] if TABLE_IPC else [Path(path)]
+
+def exists(path) -> bool:
+    return Path(path).exists() or ipc_path(path).exists()
+
+def part_value(v) -> str:
+    """Partition directory value: '/' (StatsBomb '2023/2024' seasons) would nest directories."""
+    return str(v).replace("/", "-").replace("\\", "-")
+
+def _partitioning():
+    return ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITIONS]), flavor="hive")
+
+def write_dataset(df: pd.DataFrame, table, date, competition, season, sort_by="kickoff_utc"):
+    """
+    One snapshot date of a normalized table -> DATASET_DIR/<table>/provider=/competition=/season=/date=/.
+    competition/season name the df columns to partition by; '/' in their values is written
+    as '-' (part_value), and read_dataset filters map the same way. Re-running a date
+    replaces its partitions (never other dates). Returns rows written.
+    """
+    if df.empty:
+        return 0
+    d = df.copy()
+    for col, src in (("competition", competition), ("season", season)):
+        d[col] = d[src] if src in d.columns else None
+    d["date"] = str(date)
+    for c in PARTITIONS:
+        d[c] = d[c].astype("string").fillna("unknown").map(part_value)
+    if sort_by in d.columns:
+        d = d.sort_values(sort_by, kind="stable")   # tight kickoff min/max per row group
+    arrow = pa.Table.from_pandas(d.drop(columns=PARTITIONS), preserve_index=False)
+    # dictionary-encoded (canonical schema) columns are stored as plain strings so every
+    # snapshot of a table unifies on read; Parquet dictionary-encodes the pages anyway
+    arrow = arrow.cast(pa.schema([pa.field(f.name, f.type.value_type) if pa.types.is_dictionary(f.type) else f
+                                  for f in arrow.schema], metadata=arrow.schema.metadata))
+    # one file per partition; replacing it atomically leaves other dates untouched
+    for key, idx in d.reset_index(drop=True).groupby(PARTITIONS, sort=False).indices.items():
+        part = DATASET_DIR / table / Path(*[f"{c}={v}" for c, v in zip(PARTITIONS, key)])
+        part.mkdir(parents=True, exist_ok=True)
+        _atomic(part / "part-0.parquet", lambda p: pq.write_table(arrow.take(idx), p, row_group_size=ROW_GROUP_ROWS))
+    return len(d)
+
+def _utc(x):
+    t = pd.Timestamp(x)
+    return t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+
+def _is_instant(x):
+    # a kickoff bound, as opposed to a (start, end) pair (pd.Timestamp is a datetime)
+    return isinstance(x, (str, dt.date, np.datetime64))
+
+def _as_list(v):
+    return None if v is None else [str(x) for x in (v if isinstance(v, (list, tuple, set)) else [v])]
+
+def read_dataset(table, provider=None, competition=None, season=None, dates=None,
+                 kickoff=None, teams=None, columns=None, key=None) -> pd.DataFrame:
+    """
+    Filtered read of a partitioned table; every condition is pushed into the scan.
+    provider/competition/season/dates (snapshot dates) prune directories; kickoff is a
+    (start, end) pair or a list of them (end exclusive) and teams matches home or away;
+    both are checked against row-group statistics before any row is decoded.
+    key: keep only the latest snapshot of each id (e.g. "fixture_id").
+    """
+    root = DATASET_DIR / table
+    if not root.exists():
+        return pd.DataFrame(columns=columns)
+    dset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+    conds = []
+    for col, v in (("provider", provider), ("competition", competition), ("season", season), ("date", dates)):
+        if v is not None:
+            conds.append(ds.field(col).isin([part_value(x) for x in _as_list(v)]))
+    # columns that were all-null in one snapshot are typed null there, and older snapshots
+    # predate the canonical dtypes (float goals, ns timestamps): read with the permissive
+    # union of the (partition-pruned) files' schemas
+    part = None
+    for c in conds:
+        part = c if part is None else part & c
+    frags = list(dset.get_fragments(filter=part))
+    if not frags:
+        return pd.DataFrame(columns=columns)
+    schema = pa.unify_schemas([f.physical_schema for f in frags] + [_partitioning().schema],
+                              promote_options="permissive")
+    dset = ds.dataset([f.path for f in frags], format="parquet", schema=schema,
+                      partitioning=_partitioning(), partition_base_dir=str(root))
+    names = dset.schema.names
+    if kickoff is not None and "kickoff_utc" in names:
+        ranges = [kickoff] if _is_instant(kickoff[0]) else kickoff
+        typ = dset.schema.field("kickoff_utc").type
+        expr = None
+        for a, b in ranges:
+            r = (ds.field("kickoff_utc") >= pa.scalar(_utc(a), type=typ)) & \
+                (ds.field("kickoff_utc") < pa.scalar(_utc(b), type=typ))
+            expr = r if expr is None else expr | r
+        conds.append(expr)
+    if teams is not None:
+        cols = [c for c in ("home_team", "away_team", "home_team_canonical", "away_team_canonical") if c in names]
+        expr = None
+        for c in cols:
+            e = ds.field(c).isin(_as_list(teams))
+            expr = e if expr is None else expr | e
+        if expr is not None:
+            conds.append(expr)
+    flt = None
+    for c in conds:
+        flt = c if flt is None else flt & c
+    want = None if columns is None else list(dict.fromkeys(columns + ([key, "date"] if key else [])))
+    df = dset.to_table(filter=flt, columns=want).to_pandas()
+    if key and key in df.columns:
+        df = df.sort_values("date", kind="stable").drop_duplicates(subset=[key], keep="last")
+        df = df[columns] if columns is not None else df
+    return df.reset_index(drop=True)
+
+if __name__ == "__main__":
+    try:
+        lines = []
+        for root in (Path("data/normalized"), Path("data/joined")):
+            for p in sorted(root.glob("*.parquet")):
+                a = ipc_path(p)
+                lines.append(f"{p}: rows={pq.ParquetFile(p).metadata.num_rows} "
+                             f"arrow={'%d bytes' % a.stat().st_size if a.exists() else 'no'}")
+        short_obs("tables", lines or ["no tables yet — run stage 7 first"])
+        print("\n✅ table_io complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Team-name resolver shared by the normalizers and the Stage 7 join.
+
+Built once from mappings/team_dictionary.csv into plain dicts keyed on an
+aggressively normalized name (accents stripped, lowercase, "&" -> "and",
+Utd/Man/Nottm expanded, FC/AFC/CF/... dropped, punctuation removed):
+1. exact (source, key) from the dictionary, then key from any source or a canonical name
+2. unique token-subset match ("Leeds" -> Leeds United; "Manchester" stays unresolved)
+3. trigram index fuzzy match (Dice >= TEAM_FUZZY_MIN, clear of the runner-up)
+Results are memoized. Names that needed a fuzzy match or stayed unresolved are
+collected and written to data/normalized/team_unmatched.csv for review.
+
+  python src/team_resolver.py "Man Utd" "Nott'm Forest" "Wolverhampton"
+
+  TEAM_FUZZY_MIN=0.75
+"""
+
+import sys, csv, re, unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+import pandas as pd
+from utils import env, short_obs
+
+MAP_PATH = Path("mappings/team_dictionary.csv")
+REPORT = Path("data/normalized/team_unmatched.csv")
+FUZZY_MIN = float(env("TEAM_FUZZY_MIN", "0.75"))
+
+DROP = {"fc", "afc", "cf", "sc", "ac", "cfc", "fk", "sk", "the", "club", "football", "de"}
+EXPAND = {"utd": "united", "man": "manchester", "nottm": "nottingham", "&": "and"}
+_PUNCT = re.compile(r"[^\w& ]+")
+
+def normalize(name) -> str:
+    """'Brighton & Hove Albion FC' -> 'brighton and hove albion'; "Nott'm Forest" -> 'nottingham forest'."""
+    if name is None or (isinstance(name, float) and name != name):
+        return ""
+    s = unicodedata.normalize("NFKD", str(name))
+    s = "".join(c for c in s if not unicodedata.combining(c)).lower().replace("&", " & ")
+    s = _PUNCT.sub("", s.replace("-", " "))
+    toks = [EXPAND.get(t, t) for t in s.split()]
+    kept = [t for t in toks if t not in DROP]
+    return " ".join(kept or toks)
+
+def _trigrams(key):
+    s = f"  {key} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+class TeamResolver:
+    def __init__(self, rows):
+        """rows: (source, source_team, canonical_team)."""
+        self.by_source, self.by_key = {}, {}
+        for src, team, canon in rows:
+            self.by_source.setdefault((src, normalize(team)), canon)
+            self.by_key.setdefault(normalize(team), canon)
+        for canon in {c for _, _, c in rows}:
+            self.by_key.setdefault(normalize(canon), canon)
+        self.keys = sorted(self.by_key)
+        self.grams = [_trigrams(k) for k in self.keys]
+        self.index = defaultdict(list)      # trigram -> key ids
+        self.tokens = defaultdict(set)      # token -> key ids
+        for i, k in enumerate(self.keys):
+            for g in self.grams[i]:
+                self.index[g].append(i)
+            for t in k.split():
+                self.tokens[t].add(i)
+        self.misses = {}                    # (source, name) -> (resolved, method, score)
+        self._memo = lru_cache(maxsize=None)(self._resolve)
+
+    @classmethod
+    def from_csv(cls, path=MAP_PATH):
+        rows = []
+        if Path(path).exists():
+            with open(path, newline="", encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    src = (r.get("source") or "").strip()
+                    if not src or src.startswith("#") or not r.get("source_team") or not r.get("canonical_team"):
+                        continue
+                    rows.append((src, r["source_team"].strip(), r["canonical_team"].strip()))
+        return cls(rows)
+
+    def _fuzzy(self, key):
+        grams = _trigrams(key)
+        hits = Counter(i for g in grams for i in self.index.get(g, ()))
+        scored = sorted(((2 * n / (len(grams) + len(self.grams[i])), i) for i, n in hits.items()), reverse=True)
+        if not scored:
+            return None, 0.0
+        best, i = scored[0]
+        runner = scored[1][0] if len(scored) > 1 else 0.0
+        return (self.keys[i], best) if best >= FUZZY_MIN and best - runner >= 0.05 else (None, best)
+
+    def resolve(self, name, source=None):
+        """Canonical team for name (the input name itself when nothing matches)."""
+        return self._memo(name, source)
+
+    def _resolve(self, name, source):
+        if name is None or (isinstance(name, float) and name != name):
+            return name
+        key = normalize(name)
+        hit = self.by_source.get((source, key)) or self.by_key.get(key)
+        if hit:
+            return hit
+        toks = key.split()
+        ids = set.intersection(*(self.tokens.get(t, set()) for t in toks)) if toks else set()
+        if len(ids) == 1:
+            hit = self.by_key[self.keys[ids.pop()]]
+            self.misses[(source, name)] = (hit, "tokens", 1.0)
+            return hit
+        # "Manchester": several teams share every token, a fuzzy pick would be a guess
+        k, score = self._fuzzy(key) if len(ids) < 2 else (None, 0.0)
+        if k:
+            self.misses[(source, name)] = (self.by_key[k], "fuzzy", round(score, 3))
+            return self.by_key[k]
+        self.misses[(source, name)] = (None, "unmatched", round(score, 3))
+        return name
+
+    def key(self, name, source=None) -> str:
+        """Join key: normalized canonical name."""
+        return normalize(self.resolve(name, source))
+
+    def canon(self, df, col, source=None, out=None):
+        """df[out or col + '_canonical'] = resolved names (each distinct name resolved once)."""
+        if df.empty or col not in df.columns:
+            return df
+        names = df[col].dropna().unique()
+        df[out or f"{col}_canonical"] = df[col].map({n: self.resolve(n, source) for n in names})
+        return df
+
+    def report(self):
+        return pd.DataFrame([(*k, *v) for k, v in self.misses.items()],
+                            columns=["source", "name", "resolved", "method", "score"])
+
+    def write_report(self, path=REPORT):
+        """Upsert this process's fuzzy/unmatched names into the shared report."""
+        new = self.report()
+        path = Path(path)
+        if path.exists():
+            old = pd.read_csv(path)
+            keep = ~old.set_index(["source", "name"]).index.isin(new.set_index(["source", "name"]).index)
+            frames = [f for f in (old[keep], new) if not f.empty]
+            new = pd.concat(frames, ignore_index=True) if frames else new
+        path.parent.mkdir(parents=True, exist_ok=True)
+        new.sort_values(["method", "source", "name"], na_position="first").to_csv(path, index=False)
+        return path
+
+_default = None
+
+def default() -> TeamResolver:
+    global _default
+    if _default is None:
+        _default = TeamResolver.from_csv()
+    return _default
+
+def resolve(name, source=None):
+    return default().resolve(name, source)
+
+def team_key(name, source=None):
+    return default().key(name, source)
+
+def canon(df, col, source=None, out=None):
+    return default().canon(df, col, source, out)
+
+def write_report(path=REPORT):
+    return default().write_report(path)
+
+if __name__ == "__main__":
+    try:
+        r = default()
+        names = sys.argv[1:]
+        short_obs(f"team resolver ({len(r.keys)} keys from {MAP_PATH})",
+                  [f"{n!r} -> {r.resolve(n)!r} (key {r.key(n)!r})" for n in names] or ["pass team names to resolve"])
+        if len(r.misses):
+            print(r.report().to_string(index=False))
+        print("\n✅ team_resolver complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
@@ -5,73 +5,113 @@ Understat (no official API) — robust HTML scraper:
 - Extracts embedded JSON (works for both legacy playersData and __NUXT__ payloads)
 - Prints fields and real values (xG, xA, etc.)
 - Saves raw JSON to data/raw/understat/YYYY-MM-DD/
+- Batch mode (UNDERSTAT_BATCH=1): UNDERSTAT_LEAGUES x UNDERSTAT_SEASONS pages,
+  fetched concurrently and parsed in a process pool
 
 Change LEAGUE / SEASON if you want a different league.
 Common league slugs: EPL, La_Liga, Bundesliga, Serie_A, Ligue_1, RFPL (RPL)
 """
 
-import sys, json, re, html
+import sys, json, re, html, os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import requests
+import http_client
 import pandas as pd
-from bs4 import BeautifulSoup
-from utils import UA, dump_json, today_dir, short_obs, print_fields
+from utils import UA, env, dump_json, today_dir, short_obs, print_fields
 
 LEAGUE = "EPL"     # change if desired
 SEASON = "2024"    # year-like season label on Understat
 
+# Batch mode (UNDERSTAT_BATCH=1): every league x season, parsed in a process pool
+BATCH = env("UNDERSTAT_BATCH", "0") == "1"
+BATCH_LEAGUES = [s.strip() for s in env("UNDERSTAT_LEAGUES", "EPL,La_Liga,Bundesliga,Serie_A,Ligue_1,RFPL").split(",") if s.strip()]
+BATCH_SEASONS = [s.strip() for s in env("UNDERSTAT_SEASONS", "2024").split(",") if s.strip()]
+BATCH_WORKERS = int(env("UNDERSTAT_WORKERS", str(os.cpu_count() or 2)))
+
 BASE = "https://understat.com"
 
 def fetch_league_html(league: str, season: str) -> str:
     url = f"{BASE}/league/{league}/{season}"
-    r = requests.get(url, headers=UA, timeout=30)
+    r = http_client.get(url, headers=UA, timeout=30)
     r.raise_for_status()
     return r.text
 
+# variables Understat embeds as  var <name> = JSON.parse('<hex-escaped json>');
+KNOWN_VARS = ("playersData", "teamsData", "matchesData", "datesData")
+_HEX_ESC = re.compile(r"\\x([0-9A-Fa-f]{2})")
+_DECODER = json.JSONDecoder()
+
+def _decode_js_string(raw: str):
+    # Understat hex-escapes the JSON (\x22 for quotes etc.); fall back to HTML entities
+    try:
+        return json.loads(_HEX_ESC.sub(lambda m: chr(int(m.group(1), 16)), raw))
+    except ValueError:
+        return json.loads(html.unescape(raw))
+
 def extract_json_payloads(html_text: str):
     """
     Understat has used a few formats over time:
     1) Legacy: window.__NUXT__ = {...}
     2) Legacy script with JSON.parse('...') for variables like "playersData"
-    We attempt both and return a dict with any found keys.
+    Single pass over the raw HTML: jump to each known marker with str.find and
+    decode only that blob (no DOM build, no regex over every <script>).
+    Returns a dict with any found keys.
     """
-    soup = BeautifulSoup(html_text, "lxml")
-    scripts = soup.find_all("script")
-
     payload = {}
 
-    # Try __NUXT__ first (newer Nuxt payload)
-    nuxt_pat = re.compile(r"window\.__NUXT__\s*=\s*(\{.*?\});", re.DOTALL)
-    for sc in scripts:
-        m = nuxt_pat.search(sc.text or "")
-        if m:
+    # __NUXT__ object literal: decode exactly one JSON value after the "="
+    i = html_text.find("window.__NUXT__")
+    if i != -1:
+        j = html_text.find("{", i)
+        if j != -1:
             try:
-                payload["__NUXT__"] = json.loads(m.group(1))
-            except Exception:
-                pass
-
-    # Try legacy JSON.parse('...') blocks (playersData / teamsData / matchesData)
-    parse_pat = re.compile(r"JSON\.parse\('([^']+)'\)")
-    for sc in scripts:
-        txt = sc.text or ""
-        if "playersData" in txt or "teamsData" in txt or "matchesData" in txt:
-            # Extract key name by a loose heuristic
-            varname = None
-            if "playersData" in txt: varname = "playersData"
-            elif "teamsData" in txt: varname = "teamsData"
-            elif "matchesData" in txt: varname = "matchesData"
-
-            m = parse_pat.search(txt)
-            if m and varname:
+                payload["__NUXT__"], _ = _DECODER.raw_decode(html_text, j)
+            except ValueError:
+                pass    # Nuxt sometimes ships a JS function, not JSON
+
+    # legacy JSON.parse('...') blocks
+    for var in KNOWN_VARS:
+        i = html_text.find(var)
+        while i != -1:
+            j = html_text.find("JSON.parse('", i)
+            # the JSON.parse must belong to this variable's assignment
+            if j == -1 or html_text.find(";", i, j) != -1:
+                i = html_text.find(var, i + len(var))
+                continue
+            j += len("JSON.parse('")
+            k = html_text.find("')", j)
+            if k != -1:
                 try:
-                    decoded = html.unescape(m.group(1))
-                    payload[varname] = json.loads(decoded)
-                except Exception:
-                    # sometimes arrays/objects are outside JSON.parse; try a broader fallback
+                    payload[var] = _decode_js_string(html_text[j:k])
+                except ValueError:
                     pass
+            break
 
     return payload
 
+def _find_players_list(root, max_depth=6, max_nodes=20000):
+    """Bounded breadth-first scan for a list of dicts that looks like player rows."""
+    frontier, seen, visited = deque([(root, 0)]), set(), 0
+    while frontier and visited < max_nodes:
+        cur, depth = frontier.popleft()
+        if id(cur) in seen:
+            continue
+        seen.add(id(cur))
+        visited += 1
+        if isinstance(cur, list) and cur and isinstance(cur[0], dict):
+            # if a list of dicts has key 'xG' or 'xA' or 'player_name', assume it's players
+            keys = set(cur[0].keys())
+            if {"xG", "xA"} & keys or {"player_name", "player"} & keys:
+                return cur
+        if depth >= max_depth:
+            continue
+        if isinstance(cur, dict):
+            frontier.extend((v, depth + 1) for v in cur.values() if isinstance(v, (dict, list)))
+        elif isinstance(cur, list):
+            frontier.extend((v, depth + 1) for v in cur if isinstance(v, (dict, list)))
+    return None
+
 def pick_players_table(payload: dict) -> pd.DataFrame:
     """
     Try to locate a players array with xG/xA stats. We probe known spots.
@@ -86,39 +126,60 @@ def pick_players_table(payload: dict) -> pd.DataFrame:
     # payload["__NUXT__"]["data"][0]["league"]["players"] ...
     nuxt = payload.get("__NUXT__")
     if isinstance(nuxt, dict):
-        # Walk common paths
         data = nuxt.get("data")
         if isinstance(data, list):
             for block in data:
+                if not isinstance(block, dict):
+                    continue
                 # direct playersData
-                if isinstance(block, dict) and "playersData" in block and isinstance(block["playersData"], list):
+                if isinstance(block.get("playersData"), list):
                     return pd.DataFrame(block["playersData"])
-                # nested under league/players
-                if isinstance(block, dict):
-                    league_obj = block.get("league") or block.get("state") or {}
-                    # brute-force scan for any list with dicts containing 'xG'
-                    stack = [league_obj, block]
-                    seen = set()
-                    while stack:
-                        cur = stack.pop()
-                        if id(cur) in seen:
-                            continue
-                        seen.add(id(cur))
-                        if isinstance(cur, dict):
-                            for v in cur.values():
-                                stack.append(v)
-                        elif isinstance(cur, list) and cur and isinstance(cur[0], dict):
-                            # if a list of dicts has key 'xG' or 'xA' or 'player_name', assume it's players
-                            keys = set(cur[0].keys())
-                            if {"xG", "xA"} & keys or {"player_name", "player"} & keys:
-                                try:
-                                    return pd.DataFrame(cur)
-                                except Exception:
-                                    pass
+                # nested under league/state: bounded scan, closest match first
+                league_obj = block.get("league") or block.get("state") or {}
+                found = _find_players_list(league_obj) or _find_players_list(block)
+                if found:
+                    try:
+                        return pd.DataFrame(found)
+                    except Exception:
+                        pass
     # nothing found
     return pd.DataFrame()
 
+def parse_page(job):
+    """Process-pool worker: (league, season, html) -> (league, season, payload)."""
+    league, season, html_text = job
+    return league, season, extract_json_payloads(html_text)
+
+def batch():
+    """Fetch every league x season page concurrently, parse them in a process pool."""
+    jobs = [(lg, ss) for lg in BATCH_LEAGUES for ss in BATCH_SEASONS]
+    pages = http_client.fetch_all([{"url": f"{BASE}/league/{lg}/{ss}", "headers": UA,
+                                    "timeout": 30, "memo": False} for lg, ss in jobs])
+    work, notes = [], []
+    for (lg, ss), r in zip(jobs, pages):
+        if isinstance(r, Exception) or not r.ok:
+            notes.append(f"{lg} {ss}: fetch failed ({r if isinstance(r, Exception) else r.status_code})")
+        else:
+            work.append((lg, ss, r.text))
+    with ProcessPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+        for lg, ss, payload in pool.map(parse_page, work):
+            if not payload:
+                notes.append(f"{lg} {ss}: no recognizable payload")
+                continue
+            dump_json("understat", f"understat_{lg}_{ss}_payload.json", payload)
+            notes.append(f"{lg} {ss}: players={len(pick_players_table(payload))} "
+                         f"keys={sorted(payload)}")
+    short_obs(f"understat batch ({len(jobs)} pages)", notes)
+
 if __name__ == "__main__":
+    if BATCH:
+        try:
+            batch()
+            print("\n✅ understat_pull complete (batch mode)")
+            sys.exit(0)
+        except Exception as e:
+            print("❌", repr(e))
+            sys.exit(1)
     try:
         html_text = fetch_league_html(LEAGUE, SEASON)
         payloads = extract_json_payloads(html_text)
@@ -1,29 +1,273 @@
-import os, json
+import os, json, gzip, fnmatch, hashlib, threading, uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from dotenv import load_dotenv
+import catalog
+
+# optional speedups: orjson (serializer) and zstandard (zstd snapshots)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 load_dotenv()
 
 DATA_DIR = Path("data") / "raw"
 UA = {"User-Agent": "betmachine-soccer-ingest/1.0 (+github)"}
 
+# raw JSON snapshot format: gzip (default) | zstd | json (plain, uncompressed)
+RAW_FORMAT = os.getenv("RAW_FORMAT", "gzip").strip().lower()
+JSON_SUFFIXES = (".json.gz", ".json.zst", ".json")
+_GZIP_MAGIC, _ZSTD_MAGIC = b"\x1f\x8b", b"\x28\xb5\x2f\xfd"
+
+# content-addressed raw store (RAW_DEDUP=1): payload bytes live once under
+# data/raw/_blobs/<sha[:2]>/<sha><suffix>; dated dirs keep only _manifest.json
+RAW_DEDUP = os.getenv("RAW_DEDUP", "0") == "1"
+BLOB_DIR = DATA_DIR / "_blobs"
+MANIFEST = "_manifest.json"
+INPUTS_DIR = Path("data") / "cache" / "inputs"
+# every save is also recorded in the SQLite catalog (src/catalog.py)
+RAW_CATALOG = os.getenv("RAW_CATALOG", "1") == "1"
+_manifest_lock = threading.Lock()
+
 def today_dir(source: str) -> Path:
     d = DATA_DIR / source / datetime.now(timezone.utc).strftime("%Y-%m-%d")
     d.mkdir(parents=True, exist_ok=True)
     return d
 
+def _raw_format():
+    if RAW_FORMAT == "zstd" and zstandard is None:
+        return "gzip"    # zstandard not installed
+    return RAW_FORMAT if RAW_FORMAT in ("gzip", "zstd", "json") else "gzip"
+
+def snapshot_name(name: str) -> str:
+    """'odds_x.json' -> 'odds_x.json.gz' (or .json.zst / .json per RAW_FORMAT)."""
+    stem = json_stem(name) or name
+    return stem + {"gzip": ".json.gz", "zstd": ".json.zst", "json": ".json"}[_raw_format()]
+
+def json_stem(name: str):
+    """'odds_x.json.gz' -> 'odds_x'; None for non-JSON files."""
+    for suf in JSON_SUFFIXES:
+        if name.endswith(suf):
+            return name[: -len(suf)]
+    return None
+
+def encode_json(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def decode_json(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+class _SnapshotWriter:
+    """Binary writer for a snapshot path; compression picked from the file suffix."""
+    def __init__(self, path: Path):
+        self.raw = open(path, "wb")
+        name = path.name
+        if name.endswith(".gz"):
+            # mtime=0 and no file name in the header: identical payloads give identical bytes
+            self.f = gzip.GzipFile(filename="", fileobj=self.raw, mode="wb", compresslevel=6, mtime=0)
+        elif name.endswith(".zst"):
+            self.f = zstandard.ZstdCompressor(level=3).stream_writer(self.raw, closefd=False)
+        else:
+            self.f = self.raw
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, *exc):
+        if self.f is not self.raw:
+            self.f.close()
+        self.raw.close()
+
+def write_json(path: Path, obj):
+    with _SnapshotWriter(path) as f:
+        f.write(encode_json(obj))
+
+def _suffix(name: str) -> str:
+    for suf in JSON_SUFFIXES:
+        if name.endswith(suf):
+            return suf
+    return Path(name).suffix
+
+def load_manifest(dirpath: Path) -> dict:
+    """name -> {sha256, bytes, blob} for every snapshot written into dirpath."""
+    p = Path(dirpath) / MANIFEST
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+def _record(dirpath: Path, name: str, entry: dict):
+    # several threads of one script can dump into the same dated dir
+    with _manifest_lock:
+        m = load_manifest(dirpath)
+        m[name] = entry
+        tmp = dirpath / f"{MANIFEST}.{uuid.uuid4().hex}.part"
+        tmp.write_text(json.dumps(m, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, dirpath / MANIFEST)
+
+def resolve_snapshot(path) -> Path:
+    """The file holding a snapshot's bytes: the path itself, or its blob when deduplicated."""
+    path = Path(path)
+    if path.exists():
+        return path
+    ent = load_manifest(path.parent).get(path.name)
+    if ent and ent.get("blob"):
+        return DATA_DIR / ent["blob"]
+    raise FileNotFoundError(path)
+
+def snapshot_sha256(path) -> str:
+    """sha256 of the uncompressed payload (from the manifest when recorded)."""
+    path = Path(path)
+    ent = load_manifest(path.parent).get(path.name)
+    if ent:
+        return ent["sha256"]
+    data = resolve_snapshot(path).read_bytes()
+    return hashlib.sha256(_decompress(data, path) if json_stem(path.name) else data).hexdigest()
+
+def _decompress(data: bytes, path) -> bytes:
+    if data[:2] == _GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; pip install zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+def read_json(path):
+    """Read a snapshot written by any RAW_FORMAT (detected by magic bytes, not just suffix)."""
+    return decode_json(_decompress(resolve_snapshot(path).read_bytes(), path))
+
+def open_snapshot(path):
+    """Binary stream over a snapshot's uncompressed payload, for files too large to read at once."""
+    p = resolve_snapshot(path)
+    with open(p, "rb") as f:
+        head = f.read(4)
+    if head[:2] == _GZIP_MAGIC:
+        return gzip.open(p, "rb")
+    if head[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; pip install zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(open(p, "rb"), closefd=True)
+    return open(p, "rb")
+
+def read_text(path) -> str:
+    return resolve_snapshot(path).read_text(encoding="utf-8")
+
+def iter_snapshots(dirpath: Path, pattern: str = "*"):
+    """Snapshot paths in dirpath (real files plus deduplicated manifest entries) matching pattern."""
+    if not dirpath.exists():
+        return []
+    names = {p.name for p in dirpath.iterdir() if p.is_file() and not p.name.startswith(MANIFEST)}
+    names.update(load_manifest(dirpath))
+    return [dirpath / n for n in sorted(names) if fnmatch.fnmatch(n, pattern)]
+
+def iter_json_files(dirpath: Path, pattern: str = "*"):
+    """JSON snapshots in dirpath whose name without the .json[.gz|.zst] suffix matches pattern."""
+    out = []
+    for p in iter_snapshots(dirpath):
+        stem = json_stem(p.name)
+        if stem is not None and fnmatch.fnmatch(stem, pattern):
+            out.append(p)
+    return out
+
+class _HashingWriter:
+    """Pass-through writer that hashes the uncompressed payload on the way in."""
+    def __init__(self, f):
+        self.f, self.sha, self.n = f, hashlib.sha256(), 0
+
+    def write(self, b):
+        self.sha.update(b)
+        self.n += len(b)
+        return self.f.write(b)
+
+def _save(source: str, name: str, write, describe=None):
+    """
+    write(f) produces the payload; returns (path, sha256). describe() -> (records, keys)
+    is evaluated after the write for the catalog entry. With RAW_DEDUP the bytes
+    go to the blob store (once per content hash) and only the manifest entry is
+    kept in the dated dir; otherwise the file is written in place as before.
+    """
+    d = today_dir(source)
+    p = d / name
+    if RAW_DEDUP:
+        BLOB_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = BLOB_DIR / f".{uuid.uuid4().hex}{_suffix(name)}"
+        with _SnapshotWriter(tmp) as f:
+            h = _HashingWriter(f)
+            write(h)
+        sha = h.sha.hexdigest()
+        blob = BLOB_DIR / sha[:2] / f"{sha}{_suffix(name)}"
+        if blob.exists():
+            tmp.unlink()
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, blob)
+        if p.exists():
+            p.unlink()      # an older non-deduplicated copy would shadow the blob
+        _record(d, name, {"sha256": sha, "bytes": h.n, "blob": blob.relative_to(DATA_DIR).as_posix()})
+    else:
+        with _SnapshotWriter(p) as f:
+            h = _HashingWriter(f)
+            write(h)
+        sha = h.sha.hexdigest()
+        _record(d, name, {"sha256": sha, "bytes": h.n, "blob": None})
+    if RAW_CATALOG:
+        records, keys = describe() if describe else (None, [])
+        catalog.record(p, sha, h.n, records, keys)
+    return p, sha
+
+def inputs_unchanged(key: str, paths, outputs=()):
+    """
+    (unchanged, digest) for a downstream stage: unchanged is True when the input
+    snapshots hash to the digest recorded by mark_inputs(key, ...) and every
+    output still exists, so the stage can skip its work.
+    """
+    h = hashlib.sha256()
+    for p in sorted(Path(p) for p in paths):
+        h.update(f"{p.name}:{snapshot_sha256(p)}\n".encode())
+    digest = h.hexdigest()
+    rec = INPUTS_DIR / f"{key}.sha256"
+    same = rec.exists() and rec.read_text().strip() == digest
+    return same and all(Path(o).exists() for o in outputs), digest
+
+def mark_inputs(key: str, digest: str):
+    INPUTS_DIR.mkdir(parents=True, exist_ok=True)
+    (INPUTS_DIR / f"{key}.sha256").write_text(digest + "\n")
+
 def dump_json(source: str, name: str, obj):
-    p = today_dir(source) / name
-    with open(p, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    p, _ = _save(source, snapshot_name(name), lambda f: f.write(encode_json(obj)),
+                 lambda: catalog.describe(obj))
     print(f"saved: {p}")
+    return p
+
+def dump_json_stream(source: str, name: str, items):
+    """Stream a large list to a snapshot one item at a time (never holds the whole encoded array)."""
+    n, first = 0, None
+    def write(f):
+        nonlocal n, first
+        f.write(b"[")
+        for item in items:
+            if n:
+                f.write(b",")
+            else:
+                first = item
+            f.write(encode_json(item))
+            n += 1
+        f.write(b"]")
+    p, _ = _save(source, snapshot_name(name), write,
+                 lambda: (n, sorted(first) if isinstance(first, dict) else []))
+    print(f"saved: {p} ({n} items)")
+    return p
 
 def dump_text(source: str, name: str, text: str):
-    p = today_dir(source) / name
-    with open(p, "w", encoding="utf-8") as f:
-        f.write(text)
+    p, _ = _save(source, name, lambda f: f.write(text.encode("utf-8")),
+                 lambda: catalog.describe_text(name, text))
     print(f"saved: {p}")
+    return p
 
 def env(key: str, default: str = None, required: bool = False) -> str:
     v = os.getenv(key, default)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Match-level xG: StatsBomb shot.statsbomb_xg summed per match x team, plus
+Understat match xG (datesData) where a league page was pulled.
+
+StatsBomb event files are streamed through statsbomb_events.flatten_file() and
+reduced with grouped NumPy sums (bincount) over all new shots at once.
+Per-team results are cached by the sha256 of the source file in
+  data/cache/xg/match_team_xg.parquet
+so a run only flattens files it has not seen (or whose content changed).
+
+  python src/xg_aggregate.py     -> data/normalized/match_xg.parquet
+                                    (xg_home/xg_away, npxg_*, shots_* per match)
+
+attach(df) fills xg_home/xg_away on canonical rows by kickoff date + resolved team names.
+"""
+
+import sys, re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import catalog
+import statsbomb_events
+import team_resolver
+from normalizers import register
+from table_io import exists, read_frame, write_frame
+from utils import read_json, short_obs, snapshot_sha256
+
+NORM = Path("data/normalized")
+MATCH_XG = NORM / "match_xg.parquet"
+CACHE = Path("data/cache/xg/match_team_xg.parquet")
+TEAM_COLS = ["sha256", "provider", "match_id", "team", "xg", "npxg", "shots"]
+
+def _all_files(source, pattern):
+    return [p for d in catalog.dates(source) for p in catalog.files(source, d, pattern)]
+
+def statsbomb_event_files():
+    """Crawl mirror events plus every dated events_* snapshot."""
+    return sorted((statsbomb_events.MIRROR / "events").glob("*.json")) + _all_files("statsbomb_open", "events_*")
+
+MATCH_COLS = ["match_id", "match_date_utc", "competition", "season", "home_team", "away_team"]
+
+def statsbomb_match_rows(path):
+    """One StatsBomb matches file -> match rows (date, competition, season, teams, score, status)."""
+    ms = read_json(path)
+    return [{
+        "provider": "statsbomb",
+        "match_id": m.get("match_id"),
+        "match_date_utc": f"{m.get('match_date')}T{m.get('kick_off') or '00:00:00.000'}Z",
+        "competition": (m.get("competition") or {}).get("competition_name"),
+        "season": (m.get("season") or {}).get("season_name"),
+        "home_team": (m.get("home_team") or {}).get("home_team_name"),
+        "away_team": (m.get("away_team") or {}).get("away_team_name"),
+        "score_home": m.get("home_score"),
+        "score_away": m.get("away_score"),
+        "status": m.get("match_status"),
+    } for m in (ms if isinstance(ms, list) else [])]
+
+def statsbomb_matches():
+    """match_id -> date, competition, season, home/away team names (from every matches file seen)."""
+    files = sorted((statsbomb_events.MIRROR / "matches").glob("*/*.json")) + _all_files("statsbomb_open", "matches_*")
+    rows = []
+    for p in files:
+        try:
+            rows += statsbomb_match_rows(p)
+        except Exception:
+            continue
+    return pd.DataFrame(rows, columns=MATCH_COLS).drop_duplicates("match_id", keep="last")
+
+def team_xg(shots: pd.DataFrame, by=("match_id", "team")) -> pd.DataFrame:
+    """Shots (match_id, team, xg, shot_type) -> one row per `by` group, grouped NumPy sums."""
+    by = list(by)
+    if shots.empty:
+        return pd.DataFrame(columns=by + ["xg", "npxg", "shots"])
+    gid = shots.groupby(by, sort=False, dropna=False).ngroup().to_numpy()
+    n = gid.max() + 1
+    first = np.full(n, -1, dtype=np.int64)
+    first[gid[::-1]] = np.arange(len(gid) - 1, -1, -1)
+    xg = np.nan_to_num(shots["xg"].to_numpy(np.float64))
+    pen = (shots["shot_type"] == "Penalty").to_numpy()
+    out = shots.iloc[first][by].reset_index(drop=True)
+    out["xg"] = np.bincount(gid, xg, n)
+    out["npxg"] = np.bincount(gid, np.where(pen, 0.0, xg), n)
+    out["shots"] = np.bincount(gid, minlength=n).astype(np.int32)
+    return out
+
+def understat_matches(path):
+    """datesData of one league payload -> match rows with home/away xG."""
+    payload = read_json(path)
+    dates = payload.get("datesData") if isinstance(payload, dict) else None
+    m = re.match(r"understat_(.+)_(\d{4})_payload", Path(path).name)
+    rows = []
+    for d in dates or []:
+        if not d.get("isResult"):
+            continue
+        xg, goals = d.get("xG") or {}, d.get("goals") or {}
+        rows.append({
+            "provider": "understat",
+            "match_id": int(d["id"]),
+            "match_date_utc": pd.Timestamp(d.get("datetime")).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "competition": m.group(1) if m else None,
+            "season": m.group(2) if m else None,
+            "home_team": (d.get("h") or {}).get("title"),
+            "away_team": (d.get("a") or {}).get("title"),
+            "xg_home": float(xg["h"]) if xg.get("h") is not None else np.nan,
+            "xg_away": float(xg["a"]) if xg.get("a") is not None else np.nan,
+            "goals_home": int(goals["h"]) if goals.get("h") is not None else None,
+            "goals_away": int(goals["a"]) if goals.get("a") is not None else None,
+        })
+    return rows
+
+# registry entries for src/normalizers.py (match tables, without the xG reduction)
+@register("statsbomb_matches", "statsbomb_open", ["matches_*"], key="match_id", sort_by="match_date_utc")
+def statsbomb_matches_file(path):
+    return pd.DataFrame(statsbomb_match_rows(path))
+
+@register("understat_matches", "understat", ["understat_*_payload"], key="match_id", sort_by="match_date_utc")
+def understat_matches_file(path):
+    return pd.DataFrame(understat_matches(path))
+
+def _load_cache():
+    return read_frame(CACHE) if exists(CACHE) else pd.DataFrame(columns=TEAM_COLS)
+
+def update_cache():
+    """
+    Flatten and reduce only the StatsBomb event files whose hash is not cached.
+    Returns (team rows, new files, failures); a file that fails to parse stays uncached and is retried next run.
+    """
+    cache = _load_cache()
+    known = set(cache["sha256"])
+    files = [(p, snapshot_sha256(p)) for p in statsbomb_event_files()]
+    new, parts, failed = [], [], []
+    for p, h in dict((h, (p, h)) for p, h in files).values():
+        if h in known:
+            continue
+        try:
+            s = statsbomb_events.flatten_file(p)["shots"].select(
+                ["match_id", "team", "xg", "shot_type"]).to_pandas()
+        except Exception as e:
+            failed.append(f"{p}: {e!r}")
+            continue
+        new.append((p, h))
+        parts.append(s.assign(sha256=h))
+    if new:
+        shots = pd.concat(parts, ignore_index=True)
+        # one pass over every new shot; grouping by file keeps a re-fetched match separate
+        rows = team_xg(shots, by=("sha256", "match_id", "team"))
+        rows.insert(1, "provider", "statsbomb")
+        # every new file gets a row (a match without shots still counts as computed)
+        done = set(rows["sha256"])
+        empty = pd.DataFrame([{"sha256": h, "provider": "statsbomb"} for _, h in new if h not in done],
+                             columns=TEAM_COLS)
+        cache = pd.concat([f for f in (cache, rows, empty) if not f.empty], ignore_index=True)
+        CACHE.parent.mkdir(parents=True, exist_ok=True)
+        write_frame(cache, CACHE)
+    current = {h for _, h in files}
+    return cache[cache["sha256"].isin(current) & cache["match_id"].notna()], len(new), failed
+
+def statsbomb_match_xg(teams: pd.DataFrame) -> pd.DataFrame:
+    """Per-team rows -> one row per match with home/away columns (teams placed by the matches files)."""
+    meta = statsbomb_matches()
+    if teams.empty or meta.empty:
+        return pd.DataFrame()
+    t = teams.astype({"match_id": np.int64}).drop_duplicates(["match_id", "team"], keep="last")
+    out = meta.astype({"match_id": np.int64})
+    for side in ("home", "away"):
+        s = t.rename(columns={"team": f"{side}_team", "xg": f"xg_{side}", "npxg": f"npxg_{side}",
+                              "shots": f"shots_{side}"})
+        out = out.merge(s[["match_id", f"{side}_team", f"xg_{side}", f"npxg_{side}", f"shots_{side}"]],
+                        how="left", on=["match_id", f"{side}_team"])
+    out = out[out["match_id"].isin(t["match_id"])]
+    # a side without a single shot has 0 xG, not unknown
+    for c in ("xg_home", "xg_away", "npxg_home", "npxg_away", "shots_home", "shots_away"):
+        out[c] = out[c].astype("float64").fillna(0.0)
+    out.insert(0, "provider", "statsbomb")
+    return out
+
+def build():
+    teams, n_new, failed = update_cache()
+    sb = statsbomb_match_xg(teams)
+    us = pd.DataFrame([r for p in _all_files("understat", "understat_*_payload") for r in understat_matches(p)])
+    if not us.empty:
+        us = us.drop_duplicates(["match_id"], keep="last")
+    return pd.concat([sb, us], ignore_index=True), n_new, failed
+
+def _key(date, home, away):
+    day = pd.to_datetime(date, utc=True, errors="coerce", format="ISO8601").dt.strftime("%Y-%m-%d")
+    norm = lambda s: s.map(team_resolver.team_key).astype("string")
+    return day + "|" + norm(home) + "|" + norm(away)
+
+def attach(df: pd.DataFrame, xg: pd.DataFrame = None) -> pd.DataFrame:
+    """Fill xg_home/xg_away on canonical rows (match_date_utc, home_team, away_team); StatsBomb first."""
+    if xg is None:
+        xg = read_frame(MATCH_XG) if exists(MATCH_XG) else pd.DataFrame()
+    df = df.copy()
+    for c in ("xg_home", "xg_away"):
+        if c not in df.columns:
+            df[c] = np.nan
+    if xg.empty or df.empty:
+        return df
+    k = xg.assign(_k=_key(xg["match_date_utc"], xg["home_team"], xg["away_team"]))
+    k = k.drop_duplicates("_k", keep="first").set_index("_k")
+    key = _key(df["match_date_utc"], df["home_team"], df["away_team"])
+    for c in ("xg_home", "xg_away"):
+        # columns of None come in as object: numeric first, so fillna never downcasts
+        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(key.map(k[c]))
+    return df
+
+if __name__ == "__main__":
+    try:
+        xg, n_new, failed = build()
+        write_frame(xg, MATCH_XG)
+        by = xg["provider"].value_counts().to_dict() if not xg.empty else {}
+        short_obs("match xG", [
+            f"statsbomb files newly aggregated={n_new} (cached: {CACHE})",
+            f"matches: {by}",
+            f"→ {MATCH_XG}",
+        ] + [f"failed (retried next run): {f}" for f in failed[:10]])
+        print("\n✅ xg_aggregate complete")
+    except Exception as e:
+        print("❌", repr(e))
+        sys.exit(1)
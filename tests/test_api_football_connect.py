@@ -0,0 +1,39 @@
+import pytest
+import api_football_connect as af
+
+
+def test_get_all_pages_follows_paging(monkeypatch):
+    seen = []
+
+    def get(path, params=None):
+        n = (params or {}).get("page", 1)
+        seen.append(n)
+        return [n * 10, n * 10 + 1], {"paging": {"current": n, "total": 3}, "response": [n * 10, n * 10 + 1]}
+    monkeypatch.setattr(af, "get", get)
+    resp, full = af.get_all_pages("/fixtures", {"league": "39"})
+    assert resp == [10, 11, 20, 21, 30, 31] and full["results"] == 6 and full["response"] == resp
+    assert sorted(seen) == [1, 2, 3]
+
+
+def test_quota_stops_at_daily_floor_and_pauses_on_minute_window():
+    q = af.Quota(per_minute=600, min_daily=5)
+    q.check()
+    q.observe({"x-ratelimit-requests-remaining": "6", "X-RateLimit-Remaining": "3"})
+    q.check()
+    q.observe({"x-ratelimit-requests-remaining": "9"})        # late response: stays at 6
+    assert q.daily_remaining == 6
+    q.observe({"x-ratelimit-requests-remaining": "5", "X-RateLimit-Remaining": "0"})
+    with pytest.raises(af.DailyQuotaLow):
+        q.check()
+    assert q.limiter.blocked_until > 0
+
+
+def test_details_for_every_fixture_and_kind(monkeypatch):
+    monkeypatch.setattr(af, "DETAILS", ["lineups", "events"])
+
+    def detail(kind, fid):
+        if fid == 2 and kind == "lineups":
+            raise RuntimeError("not published yet")
+        return [] if fid == 3 else [{"fixture": fid}]
+    monkeypatch.setattr(af, "fixture_detail", detail)
+    assert af.details_for_fixtures([1, 2, 3]) == {"lineups": 1, "events": 2}
@@ -0,0 +1,43 @@
+import pandas as pd
+import pyarrow as pa
+import canonical_schema
+from canonical_schema import FIELDS, SCHEMA, check, conform
+
+
+def test_conform_types_fills_and_orders():
+    df = pd.DataFrame({
+        "extra": [1, 2, 3],
+        "score_home": ["2", None, "x"],
+        "match_date_utc": ["2024-03-02T15:00:00Z", "2024-03-02T16:00:00+01:00", "soon"],
+        "provider": ["fdorg"] * 3,
+        "odds_home": [1.9, "2.1", None],
+        "home_team": ["Arsenal", "Chelsea", None],
+    })
+    out = conform(df)
+    assert list(out.columns) == FIELDS + ["extra"]
+    assert str(out["score_home"].dtype) == "Int16" and out["score_home"].tolist()[0] == 2
+    assert out["score_home"].isna().tolist() == [False, True, True]
+    assert str(out["match_date_utc"].dtype) == "datetime64[ms, UTC]"
+    assert out["match_date_utc"].iloc[0] == out["match_date_utc"].iloc[1] and pd.isna(out["match_date_utc"].iloc[2])
+    assert out["odds_home"].dtype == "float32" and isinstance(out["home_team"].dtype, pd.CategoricalDtype)
+    # absent fields come back typed, so every frame converts to the same Arrow schema
+    assert str(out["lineup_home_available"].dtype) == "boolean" and out["xg_home"].isna().all()
+    t = pa.Table.from_pandas(out[FIELDS], preserve_index=False)
+    assert check(t.schema) == [] and t.schema.field("score_away").type == pa.int16()
+    assert t.cast(SCHEMA).schema == SCHEMA       # dictionary index width is the only difference
+
+
+def test_aliases_are_typed_in_place_without_fill():
+    df = pd.DataFrame({"kickoff_utc": pd.to_datetime(["2024-03-02 15:00"]), "ft_home_goals": [2.0],
+                       "league": ["bl1"], "matchday": [5]})
+    out = conform(df, fill_missing=False)
+    assert list(out.columns) == list(df.columns)
+    assert str(out["kickoff_utc"].dtype) == "datetime64[ms, UTC]"      # naive -> UTC
+    assert str(out["ft_home_goals"].dtype) == "Int16" and out["matchday"].dtype == "int64"
+    assert canonical_schema.dtype_of("league") == "dictionary" and canonical_schema.dtype_of("matchday") is None
+
+
+def test_check_reports_drift():
+    schema = pa.schema([("score_home", pa.float64()), ("home_team", pa.string()),
+                        ("competition", pa.dictionary(pa.int8(), pa.string())), ("extra", pa.int64())])
+    assert check(schema) == [("score_home", "double", "int16"), ("home_team", "string", "dictionary")]
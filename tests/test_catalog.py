@@ -0,0 +1,35 @@
+import catalog
+import utils
+
+
+def test_scan_dates_ignores_non_date_folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "RAW", tmp_path)
+    monkeypatch.setattr(catalog, "DB", tmp_path / "_catalog.sqlite")     # empty catalog: directory fallback
+    for d in ("2024-08-16", "2024-08-17", "open_data"):
+        (tmp_path / "statsbomb_open" / d).mkdir(parents=True)
+    assert catalog.dates("statsbomb_open") == ["2024-08-16", "2024-08-17"]
+    assert catalog.latest_date("statsbomb_open") == "2024-08-17"
+    assert catalog.dates("missing") == []
+
+
+def test_saves_are_catalogued_and_reindex_rebuilds(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(utils, "RAW_CATALOG", True)
+    monkeypatch.setattr(utils, "RAW_FORMAT", "gzip")
+    utils.dump_json("fdorg", "matches_PL.json", {"matches": [{"id": 1}, {"id": 2}], "count": 2})
+    utils.dump_json("fdorg", "standings_PL.json", {"standings": [{"table": []}]})
+    utils.dump_text("fdorg", "teams.csv", "id,name\n1,Arsenal\n2,Chelsea\n3,Spurs\n")
+    day = catalog.latest_date("fdorg")
+    assert catalog.dates("fdorg") == [day] and catalog.sources() == ["fdorg"]
+    assert [p.name for p in catalog.files("fdorg", day, "matches_*")] == ["matches_PL.json.gz"]
+    ents = {e["name"]: e for e in catalog.entries("fdorg", day)}
+    assert ents["matches_PL.json.gz"]["records"] == 2
+    assert ents["matches_PL.json.gz"]["keys"] == ["count", "matches"]
+    assert ents["teams.csv"]["records"] == 3 and ents["teams.csv"]["keys"] == ["id", "name"]
+    assert catalog.records("fdorg") == 6 and catalog.records("fdorg", contains="matches") == 2
+
+    # files saved before the catalog existed: reindex reads them once
+    before = catalog._query("SELECT name, sha256, records FROM snapshots ORDER BY name")
+    catalog.DB.unlink()
+    assert catalog.reindex() == 3
+    assert catalog._query("SELECT name, sha256, records FROM snapshots ORDER BY name") == before
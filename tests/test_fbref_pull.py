@@ -0,0 +1,33 @@
+import fbref_pull
+
+HTML = """<div><!--
+<table id="stats_squads_standard_for"><tbody>
+<tr><th data-stat="team">Arsenal</th><td data-stat="games">38</td><td data-stat="xg">1,071.5</td></tr>
+<tr class="spacer"><td colspan="3"></td></tr>
+<tr><th data-stat="team">Chelsea</th><td data-stat="games">38</td></tr>
+<tr><th data-stat="team">Spurs</th><td data-stat="xg" colspan="2">60.1</td></tr>
+</tbody></table>
+--></div>"""
+
+
+def test_extract_table_keeps_ragged_rows():
+    df = fbref_pull.extract_table(HTML, "stats_squads_standard_for")
+    assert list(df.columns) == ["team", "games", "xg"]
+    assert df["team"].tolist() == ["Arsenal", "Chelsea", "Spurs"]
+    assert df["xg"].tolist()[0] == 1071.5 and df["xg"].tolist()[2] == 60.1
+    assert df["games"].isna().tolist() == [False, False, True]
+
+
+def test_scrape_reuses_cached_pages_and_tables(tmp_path, monkeypatch):
+    fetched = []
+    monkeypatch.setattr(fbref_pull, "fetch_html_with_retries", lambda url: fetched.append(url) or HTML)
+    pages = [("https://fbref.com/en/comps/9/", ["stats_squads_standard_for", "missing_table"])]
+    cache = fbref_pull.PageCache(tmp_path)
+    (url, tables, note), = fbref_pull.scrape(pages, cache)
+    assert note == "fetched" and len(tables["stats_squads_standard_for"]) == 3 and tables["missing_table"].empty
+
+    monkeypatch.setattr(fbref_pull, "extract_table", lambda *a: 1 / 0)     # must not parse again
+    pages = [(pages[0][0], ["stats_squads_standard_for"])]
+    (url, tables, note), = fbref_pull.scrape(pages, fbref_pull.PageCache(tmp_path))
+    assert note == "cached" and fetched == [pages[0][0]]
+    assert tables["stats_squads_standard_for"]["team"].tolist() == ["Arsenal", "Chelsea", "Spurs"]
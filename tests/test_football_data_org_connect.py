@@ -0,0 +1,35 @@
+import football_data_org_connect as fdo
+
+
+def test_sync_skips_unchanged_and_retries_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(fdo, "STORE", tmp_path)
+    monkeypatch.setattr(fdo, "CODES", ["PL", "BL1"])
+    calls, dumped, broken = [], [], {"BL1"}
+
+    def matches_window(code):
+        calls.append(("matches", code))
+        if code in broken:
+            raise RuntimeError("429")
+        return fdo.merge_into_store(code, [{"id": 1, "status": "SCHEDULED"}])
+    monkeypatch.setattr(fdo, "matches_window", matches_window)
+    monkeypatch.setattr(fdo, "standings", lambda code: calls.append(("standings", code)))
+    monkeypatch.setattr(fdo, "scorers", lambda code: calls.append(("scorers", code)))
+    monkeypatch.setattr(fdo, "dump_json", lambda source, name, obj: dumped.append((name, obj)))
+    comps = [{"code": "PL", "lastUpdated": "t1"}, {"code": "BL1", "lastUpdated": "t1"}]
+
+    fdo.sync(comps)
+    assert len(calls) == 6 and [n for n, _ in dumped] == ["matches_PL.json"]
+    calls.clear()
+    broken.clear()
+    fdo.sync(comps)                  # PL unchanged; BL1 failed last time, so it runs again
+    assert sorted(c for _, c in calls) == ["BL1"] * 3
+    calls.clear()
+    fdo.sync(comps)
+    assert calls == []
+
+
+def test_merge_into_store_upserts_by_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(fdo, "STORE", tmp_path)
+    fdo.merge_into_store("PL", [{"id": 1, "status": "SCHEDULED"}, {"id": 2, "status": "SCHEDULED"}])
+    store = fdo.merge_into_store("PL", [{"id": 1, "status": "FINISHED"}])
+    assert {k: m["status"] for k, m in store.items()} == {"1": "FINISHED", "2": "SCHEDULED"}
@@ -0,0 +1,36 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import football_data_pull as fd
+
+OLD = b"\xef\xbb\xbf" + ("Div,Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR,B365H,,\n"
+                         "E0,13/08/05,Aston Villa,Bolton,2,2,D,2.5,,\n"
+                         "E0,13/08/05,Alavés,Man United,0,2,A,4.33,,\n"
+                         ",,,,,,,,,\n").encode("latin-1")
+NEW = ("Div,Date,Time,HomeTeam,AwayTeam,FTHG,FTAG,FTR,AvgH,Referee\n"
+       "E0,16/08/2024,20:00,Man United,Fulham,1,0,H,1.6,R Jones\n").encode("utf-8")
+
+
+def test_expand_seasons():
+    assert fd.expand_seasons("1920,2122-2425") == ["1920", "2122", "2223", "2324", "2425"]
+    assert fd.expand_seasons("9899-0001") == ["9899", "9900", "0001"]
+
+
+def test_parse_csv_types_and_both_date_formats():
+    old, new = fd.parse_csv(OLD), fd.parse_csv(NEW)
+    assert old.num_rows == 2 and "" not in old.column_names
+    assert old.schema.field("FTHG").type == pa.int16() and old.schema.field("B365H").type == pa.float32()
+    assert str(old["match_date"][0]) == "2005-08-13" and str(new["match_date"][0]) == "2024-08-16"
+    assert new["Referee"].to_pylist() == ["R Jones"]
+    assert old["HomeTeam"].to_pylist() == ["Aston Villa", "Alavés"]     # cp1252-era file
+
+
+def test_load_backfill_prunes_and_unions_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr(fd, "OUT_DIR", tmp_path)
+    for ss, body in (("0506", OLD), ("2425", NEW)):
+        d = tmp_path / "league=E0" / f"season={ss}"
+        d.mkdir(parents=True)
+        pq.write_table(fd.parse_csv(body), d / "part-0.parquet")
+    both = fd.load_backfill(leagues=["E0"])
+    assert len(both) == 3 and {"B365H", "AvgH"} <= set(both.columns)
+    new = fd.load_backfill(seasons=[2425], columns=["HomeTeam", "season"])
+    assert new.values.tolist() == [["Man United", "2425"]]
@@ -0,0 +1,151 @@
+import threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import http_client
+
+
+class Stub(BaseHTTPRequestHandler):
+    """
+    Local server: /slow/<n> sleeps and echoes n, /static.csv has an ETag, /flaky answers 429
+    (Retry-After) to the first two requests; anything else is a 404.
+    """
+    lock = threading.Lock()
+    active = peak = hits = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.hits += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            if self.path == "/static.csv":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self._send(304, b"")
+                else:
+                    self._send(200, b"a,b\n1,2\n", [("ETag", '"v1"')])
+            elif self.path == "/flaky":
+                if cls.hits < 3:
+                    self._send(429, b"slow down", [("Retry-After", "0.1")])
+                else:
+                    self._send(200, b"ok")
+            elif self.path.startswith("/slow/"):
+                time.sleep(0.05)
+                self._send(200, self.path.split("?")[0].rsplit("/", 1)[1].encode())
+            else:
+                self._send(404, b"no")
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    Stub.active = Stub.peak = Stub.hits = 0
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+
+def test_fetch_all_keeps_order_and_host_cap(server, monkeypatch):
+    monkeypatch.setattr(http_client, "HOST_LIMITS", {})
+    monkeypatch.setattr(http_client, "_host_sems", {})
+    http_client.set_host_limit(server.split("//")[1], 3)
+    calls = [{"url": f"{server}/slow/{i}", "memo": False} for i in range(12)] + [f"{server}/missing"]
+    out = http_client.fetch_all(calls)
+    assert [r.text for r in out[:12]] == [str(i) for i in range(12)]
+    assert out[12].status_code == 404        # statuses are left to the caller
+    assert 1 < Stub.peak <= 3
+
+
+def test_fetch_all_returns_errors_in_place(server):
+    out = http_client.fetch_all([{"url": f"{server}/slow/1", "memo": False},
+                                 {"url": "http://127.0.0.1:1/", "memo": False, "timeout": 2}])
+    assert out[0].text == "1" and isinstance(out[1], requests.RequestException)
+
+
+def test_peek_does_not_count():
+    memo = http_client.MemoCache(60, 8)
+    r = requests.Response()
+    r.status_code, r._content, r.url = 200, b"{}", "https://example.org/x"
+    memo.put("GET https://example.org/x?", r)
+    assert memo.peek("GET https://example.org/x?") is not None
+    assert memo.peek("GET https://example.org/y?") is None
+    assert (memo.hits, memo.misses) == (0, 0)
+    assert memo.get("GET https://example.org/x?") is not None
+    assert (memo.hits, memo.misses) == (1, 0)
+
+
+def test_memo_key_ignores_secrets_and_param_order():
+    a = http_client.memo_key("HTTPS://Api.Example.org/v4/odds?apiKey=abc&regions=uk", {"markets": "h2h"})
+    b = http_client.memo_key("https://api.example.org/v4/odds", {"markets": "h2h", "regions": "uk", "apiKey": "xyz"})
+    assert a == b and "abc" not in a
+
+
+def test_memo_ttl_lru_and_disk(tmp_path, monkeypatch):
+    r = requests.Response()
+    r.status_code, r._content, r.url = 200, b"{}", "https://example.org/x"
+    memo = http_client.MemoCache(60, 2, tmp_path)
+    for k in ("GET a", "GET b", "GET c"):
+        memo.put(k, r)
+    assert list(memo.items) == ["GET b", "GET c"]       # oldest evicted
+    assert memo.get("GET a") is not None                # ... but still on disk
+    clock = [http_client.time.time() + 61]
+    monkeypatch.setattr(http_client.time, "time", lambda: clock[0])
+    assert memo.get("GET b") is None                    # expired in memory and on disk
+
+
+def test_get_answers_repeats_from_memo(server, monkeypatch):
+    monkeypatch.setattr(http_client, "MEMO", http_client.MemoCache(60, 8))
+    first = http_client.get(f"{server}/slow/7", params={"apiKey": "s1"})
+    again = http_client.get(f"{server}/slow/7", params={"apiKey": "s2"})
+    missing = [http_client.get(f"{server}/missing") for _ in range(2)]
+    assert (first.from_memo, again.from_memo, again.text) == (False, True, "7")
+    assert [m.from_memo for m in missing] == [False, False]     # errors are never memoized
+    assert Stub.hits == 3
+
+
+def test_conditional_get_reuses_body_on_304(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_client, "VALIDATORS", http_client.ValidatorCache(tmp_path))
+    first = http_client.get(f"{server}/static.csv", memo=False, conditional=True)
+    again = http_client.get(f"{server}/static.csv", memo=False, conditional=True)
+    assert (first.not_modified, again.not_modified) == (False, True)
+    assert again.status_code == 200 and again.text == first.text == "a,b\n1,2\n"
+    assert (http_client.VALIDATORS.requests, http_client.VALIDATORS.not_modified,
+            http_client.VALIDATORS.bytes_saved) == (2, 1, 8)
+
+
+def test_rate_limiter_spaces_calls_and_pauses():
+    lim = http_client.RateLimiter(20, per=1.0)      # one call every 50 ms, no burst
+    t0 = time.monotonic()
+    for _ in range(5):
+        lim.acquire()
+    assert 0.18 <= time.monotonic() - t0 < 0.6
+    lim.pause(0.2)
+    t0 = time.monotonic()
+    lim.acquire()
+    assert time.monotonic() - t0 >= 0.19
+
+
+def test_backoff_honors_retry_after(server):
+    lim = http_client.RateLimiter(100, per=1.0, burst=10)
+    t0 = time.monotonic()
+    r = http_client.get_with_backoff(f"{server}/flaky", attempts=4, base=30.0, limiter=lim, memo=False)
+    assert r.text == "ok" and Stub.hits == 3
+    # waited Retry-After (0.1 s) twice, never the 30 s exponential base
+    assert 0.19 <= time.monotonic() - t0 < 5
+    last = http_client.get_with_backoff(f"{server}/missing", attempts=2, memo=False, retry_on=(404,), base=0.01)
+    assert last.status_code == 404 and Stub.hits == 5
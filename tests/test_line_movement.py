@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from line_movement import LineIndex
+
+
+def _log(event_id, commence, prices):
+    return pd.DataFrame({
+        "event_id": event_id, "bookmaker": "pinnacle", "market": "h2h", "outcome": "Arsenal", "point": np.nan,
+        "captured_at": pd.to_datetime([t for t, _ in prices], utc=True), "price": [p for _, p in prices],
+        "commence_time": pd.to_datetime(commence, utc=True), "home_team": "Arsenal", "away_team": "Chelsea",
+    })
+
+
+def test_features_match_scalar_lookups_and_survive_nat_commence():
+    good = _log("ev1", "2024-08-17T14:00:00Z", [("2024-08-16T08:00:00Z", 2.0), ("2024-08-17T08:00:00Z", 1.9),
+                                               ("2024-08-17T13:00:00Z", 1.8), ("2024-08-17T15:00:00Z", 1.5)])
+    df = pd.concat([_log("ev0", "2024-08-18T14:00:00Z", [("2024-08-17T09:00:00Z", 3.0)]), good], ignore_index=True)
+    df.loc[df["event_id"] == "ev0", "commence_time"] = pd.NaT
+    idx = LineIndex(df)
+    f = idx.features(hours=[24, 6]).set_index("event_id")
+    line = ("ev1", "pinnacle", "h2h", "Arsenal")
+    assert f.loc["ev1", "open_price"] == np.float32(2.0) == idx.opening(*line)["price"]
+    assert f.loc["ev1", "close_price"] == np.float32(1.8) == idx.closing(*line)["price"]
+    assert f.loc["ev1", "price_t24h"] == np.float32(2.0) == idx.as_of(*line, hours_before=24)["price"]
+    assert f.loc["ev1", "price_t6h"] == np.float32(1.9)
+    assert np.isnan(f.loc["ev0", "close_price"]) and np.isnan(f.loc["ev0", "price_t6h"])
+    assert f.loc["ev0", "open_price"] == np.float32(3.0)
+    assert idx.closing("ev0", "pinnacle", "h2h", "Arsenal") is None
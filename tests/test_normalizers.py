@@ -0,0 +1,79 @@
+from pathlib import Path
+import pandas as pd
+import normalizers
+import xg_aggregate
+from canonical_schema import SCHEMA_PATH
+from normalizers import Normalizer
+from table_io import read_dataset, read_frame
+
+
+def test_dependencies_cover_code_schema_and_declared_inputs(tmp_path):
+    dep = tmp_path / "match_xg.parquet"
+    dep.write_bytes(b"x")
+    n = Normalizer("t", "src", lambda path: None, depends=[dep, tmp_path / "missing.parquet"])
+    deps = n.dependencies()
+    assert Path(__file__) in deps          # module of the flatten function
+    assert SCHEMA_PATH in deps
+    assert dep in deps
+    assert tmp_path / "missing.parquet" not in deps
+
+
+def test_odds_events_depend_on_match_xg():
+    assert xg_aggregate.MATCH_XG in normalizers.load_plugins()["odds_api_events"].depends
+
+
+def test_failed_latest_date_keeps_previous_table(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(normalizers.catalog, "dates", lambda source: ["2024-08-17"])
+    snap = tmp_path / "s.json"
+    snap.write_text("{}")
+    broken = {"on": False}
+
+    def flatten(path):
+        if broken["on"]:
+            raise ValueError("bad payload")
+        return pd.DataFrame({"match_id": [1], "home_team": ["A"], "away_team": ["B"],
+                             "match_date_utc": ["2024-08-17T14:00:00Z"]})
+    monkeypatch.setitem(normalizers.REGISTRY, "t", Normalizer("t", "src", flatten, inputs=lambda d: [snap],
+                                                              key="match_id", sort_by="match_date_utc"))
+    monkeypatch.setattr(normalizers, "load_plugins", lambda: normalizers.REGISTRY)
+    normalizers.run(["t"], procs=1)
+    assert len(read_frame(normalizers.OUT / "t.parquet")) == 1
+
+    broken["on"] = True
+    snap.write_text('{"changed": 1}')       # new digest, so the table is not skipped
+    lines, _, _ = normalizers.run(["t"], procs=1)
+    assert any("previous output kept" in ln for ln in lines)
+    assert len(read_frame(normalizers.OUT / "t.parquet")) == 1
+
+
+def test_run_writes_every_date_last_snapshot_wins_and_skips_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    snaps = {}
+    for d, goals in (("2024-08-17", [None, None]), ("2024-08-18", [1, 3])):
+        for i, g in enumerate(goals):
+            p = tmp_path / f"{d}_{i}.json"
+            p.write_text(f'{{"match_id": 1, "goals": {g if g is not None else "null"}}}')
+            snaps.setdefault(d, []).append(p)
+    monkeypatch.setattr(normalizers.catalog, "dates", lambda source: sorted(snaps))
+    monkeypatch.setattr(normalizers.team_resolver, "_default", normalizers.team_resolver.TeamResolver([]))
+
+    def flatten(path):
+        obj = normalizers.load_json(path)
+        return pd.DataFrame({"match_id": [obj["match_id"]], "home_team": ["A"], "away_team": ["B"],
+                             "ft_home_goals": [obj["goals"]], "competition": ["PL"], "season": ["2024"]})
+    monkeypatch.setitem(normalizers.REGISTRY, "t", Normalizer("t", "src", flatten, inputs=lambda d: snaps[d],
+                                                              key="match_id"))
+    monkeypatch.setattr(normalizers, "load_plugins", lambda: normalizers.REGISTRY)
+
+    lines, units, procs = normalizers.run(["t"], all_dates=True, procs=1)
+    assert (units, procs) == (4, 1) and lines[:2] == ["t 2024-08-17: 1 rows", "t 2024-08-18: 1 rows"]
+    table = read_frame(normalizers.OUT / "t.parquet")
+    # the later snapshot of a date replaces the earlier one; the table is the latest date
+    assert table["ft_home_goals"].tolist() == [3] and str(table["ft_home_goals"].dtype) == "Int16"
+    assert table["home_team_canonical"].tolist() == ["A"] and table["provider"].tolist() == ["src"]
+    hist = read_dataset("t")
+    assert sorted(hist["date"]) == ["2024-08-17", "2024-08-18"]
+
+    lines, units, _ = normalizers.run(["t"], procs=1)
+    assert units == 0 and lines[0] == "t: inputs unchanged, skipped"
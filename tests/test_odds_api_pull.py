@@ -0,0 +1,47 @@
+import os
+import requests
+os.environ.setdefault("ODDS_API_KEY", "test-key")
+import odds_api_pull
+from odds_api_pull import CreditBudget, CreditBudgetExceeded
+
+
+def test_request_cost():
+    p = {"markets": "h2h,totals", "regions": "uk,eu"}
+    assert odds_api_pull.request_cost("/sports", {}) == 0
+    assert odds_api_pull.request_cost("/sports/soccer_epl/odds", p) == 4
+    assert odds_api_pull.request_cost("/historical/sports/soccer_epl/odds", p) == 40
+
+
+def test_budget_reserves_in_flight_credits():
+    b = CreditBudget(reserve=50)
+    assert b.acquire(30)                     # remaining unknown until the first response
+    b.settle(30, {"x-requests-remaining": "100", "x-requests-used": "400"})
+    assert b.acquire(30) and b.acquire(15)   # 100 - 45 in flight leaves 55
+    assert not b.acquire(10)                 # would dip under the floor
+    assert b.acquire(0)                      # free endpoints always go through
+    # a late response with a higher count never raises remaining again
+    b.settle(30, {"x-requests-remaining": "120", "x-requests-used": "380"})
+    b.settle(15, {"x-requests-remaining": "85"})
+    assert (b.remaining, b.used, b.pending) == (85, 400, 0)
+
+
+def test_get_many_holds_back_calls_over_budget(monkeypatch):
+    monkeypatch.setattr(odds_api_pull, "BUDGET", CreditBudget(reserve=50))
+    odds_api_pull.BUDGET.remaining = 60
+    monkeypatch.setattr(odds_api_pull.http_client, "is_memoized", lambda url: False)
+    sent = []
+
+    def fetch_all(calls):
+        sent.extend(calls)
+        out = []
+        for _ in calls:
+            r = requests.Response()
+            r.status_code, r._content = 200, b"[]"
+            r.headers["x-requests-remaining"] = "57"
+            out.append(r)
+        return out
+    monkeypatch.setattr(odds_api_pull.http_client, "fetch_all", fetch_all)
+    one = {"markets": "h2h", "regions": "uk,eu,us"}          # 3 credits each
+    out = odds_api_pull.get_many([("/sports/a/odds", one)] * 4 + [("/sports", {})])
+    assert out[:3] == [[], [], []] and isinstance(out[3], CreditBudgetExceeded) and out[4] == []
+    assert len(sent) == 4 and odds_api_pull.BUDGET.pending == 0
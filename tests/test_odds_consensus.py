@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+import odds_consensus
+import odds_flatten
+
+
+def test_canonical_odds_has_h2h_totals_and_spreads():
+    long = odds_flatten.flatten(odds_flatten._synthetic(2, 3))
+    out = odds_consensus.canonical_odds(long).set_index("event_id")
+    assert sorted(out.index) == ["ev0", "ev1"]
+    assert out["odds_home"].notna().all()
+    assert (out["total_goals_line"] == 2.5).all() and (out["total_goals_over_price"] == 1.9).all()
+    assert (out["spread_home_line"] == -0.5).all() and (out["spread_away_line"] == 0.5).all()
+
+
+def _long(rows):
+    return pd.DataFrame(rows, columns=["event_id", "bookmaker", "market", "side", "point", "price"])
+
+
+def test_power_k_solves_every_book_at_once():
+    q = 1.0 / np.array([2.0, 3.5, 4.0, 1.9, 1.9, 1.5, 4.5, 7.0])
+    book = np.array([0, 0, 0, 1, 1, 2, 2, 2])
+    k = odds_consensus.power_k(q, book, 3)
+    assert np.allclose(np.bincount(book, q ** k[book]), 1.0, atol=1e-10)
+    assert (k > 1).all()        # every book has a margin, so the power pulls probabilities down
+    for b in range(3):          # same root as a scalar bisection
+        lo, hi = 1.0, 3.0
+        for _ in range(100):
+            mid = (lo + hi) / 2
+            lo, hi = (mid, hi) if (q[book == b] ** mid).sum() > 1 else (lo, mid)
+        assert k[b] == pytest.approx(lo, abs=1e-9)
+
+
+def test_consensus_devig_best_price_and_median():
+    long = _long([
+        ("e", "a", "h2h", "home", None, 2.0), ("e", "a", "h2h", "draw", None, 3.5), ("e", "a", "h2h", "away", None, 4.0),
+        ("e", "b", "h2h", "home", None, 2.2), ("e", "b", "h2h", "draw", None, 3.4), ("e", "b", "h2h", "away", None, 3.6),
+        # only one side quoted: counted in the prices, left out of the de-vig
+        ("e", "c", "h2h", "home", None, 2.5),
+        ("e", "a", "totals", "over", 2.5, 1.9), ("e", "a", "totals", "under", 2.5, 1.9),
+        ("e", "a", "spreads", "home", -0.5, 1.8), ("e", "a", "spreads", "away", 0.5, 2.0),
+    ])
+    cons = odds_consensus.consensus(long).set_index(["market", "side"])
+    home = cons.loc[("h2h", "home")]
+    assert (home["n_books"], home["best_price"], home["best_bookmaker"]) == (3, 2.5, "c")
+    assert home["mean_price"] == pytest.approx((2.0 + 2.2 + 2.5) / 3) and home["median_price"] == 2.2
+
+    qa, qb = 1 / np.array([2.0, 3.5, 4.0]), 1 / np.array([2.2, 3.4, 3.6])
+    assert home["overround"] == pytest.approx((qa.sum() + qb.sum()) / 2 - 1)
+    mult = (qa / qa.sum() + qb / qb.sum()) / 2
+    assert cons.loc["h2h", "prob_mult"].to_numpy() == pytest.approx(mult / mult.sum())
+    assert cons.loc["h2h", "prob_power"].sum() == pytest.approx(1.0)
+    # the power method shades the longshot more than the multiplicative one
+    assert cons.loc[("h2h", "away"), "prob_power"] < cons.loc[("h2h", "away"), "prob_mult"]
+    assert home["best_overround"] == pytest.approx(1 / 2.5 + 1 / 3.5 + 1 / 4.0 - 1)
+
+    # spreads are one market line keyed by the home handicap
+    assert set(cons.loc["spreads", "line"]) == {-0.5}
+    assert cons.loc[("totals", "over"), "prob_mult"] == pytest.approx(0.5)
+    ev = odds_consensus.event_odds(cons.reset_index()).set_index("event_id")
+    assert (ev.loc["e", "odds_home"], ev.loc["e", "best_odds_home"], ev.loc["e", "h2h_books"]) == (2.2, 2.5, 3)
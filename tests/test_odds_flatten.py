@@ -0,0 +1,56 @@
+import pytest
+import odds_flatten
+
+
+def _book(key, last_update, home_point, home_price, away_price):
+    bm = {"key": key, "title": key, "markets": [
+        {"key": "spreads", "outcomes": [{"name": "Home FC", "price": home_price, "point": home_point},
+                                        {"name": "Away FC", "price": away_price, "point": -home_point}]}]}
+    if last_update:
+        bm["last_update"] = last_update
+    return bm
+
+
+def test_main_lines_signed_spreads_and_missing_last_update():
+    ev = {"id": "ev1", "sport_key": "soccer_epl", "commence_time": "2024-08-17T14:00:00Z",
+          "home_team": "Home FC", "away_team": "Away FC", "bookmakers": [
+              _book("a", "2024-08-17T10:00:00Z", -0.5, 1.9, 1.9),
+              _book("b", None, -0.5, 2.1, 1.7),
+              # mirrored alternate line: same |point|, opposite sides
+              _book("c", "2024-08-17T11:00:00Z", 0.5, 1.2, 4.0)]}
+    out = odds_flatten.main_lines(odds_flatten.flatten([ev])).set_index("event_id")
+    assert out.loc["ev1", "source_last_update"] == "2024-08-17T11:00:00Z"
+    assert out.loc["ev1", "spread_home_line"] == -0.5
+    assert out.loc["ev1", "spread_away_line"] == 0.5
+    assert out.loc["ev1", "spread_home_price"] == 2.0
+    assert out.loc["ev1", "spread_away_price"] == 1.8
+
+
+def test_flatten_matches_the_row_loop_and_tags_sides():
+    events = odds_flatten._synthetic(3, 4) + [{"id": "empty", "home_team": "X", "away_team": "Y", "bookmakers": None}]
+    long = odds_flatten.flatten(events)
+    ref = odds_flatten._loop_flatten(events)
+    assert long.column_names == odds_flatten.COLUMNS and long.num_rows == len(ref) == 3 * 4 * 7
+    got = long.select(["event_id", "bookmaker", "market", "outcome"]).to_pandas()
+    assert got.equals(ref[["event_id", "bookmaker", "market", "outcome"]])
+    assert (long["price"].to_numpy() == ref["price"].to_numpy().astype("float32")).all()
+    sides = long.to_pandas().groupby("market")["side"].agg(lambda s: sorted(set(s)))
+    assert sides.to_dict() == {"h2h": ["away", "draw", "home"], "spreads": ["away", "home"],
+                               "totals": ["over", "under"]}
+    assert odds_flatten.events_table(events)["n_bookmakers"].to_pylist() == [4, 4, 4, 0]
+
+
+def test_wide_one_row_per_event_keeps_first_line():
+    ev = {"id": "ev1", "home_team": "Home FC", "away_team": "Away FC", "bookmakers": [
+        {"key": "a", "markets": [{"key": "totals", "outcomes": [
+            {"name": "Over", "price": 1.9, "point": 2.5}, {"name": "Under", "price": 1.9, "point": 2.5},
+            {"name": "Over", "price": 2.6, "point": 3.5}, {"name": "Under", "price": 1.5, "point": 3.5}]}]},
+        {"key": "b", "markets": [{"key": "h2h", "outcomes": [
+            {"name": "Home FC", "price": 2.0}, {"name": "Draw", "price": 3.5}, {"name": "Away FC", "price": 4.0}]}]}]}
+    w = odds_flatten.wide(odds_flatten.flatten([ev])).set_index("event_id")
+    assert len(w) == 1
+    assert set(w.columns) == {"totals_over__a", "totals_under__a", "totals_point__a",
+                              "h2h_home__b", "h2h_draw__b", "h2h_away__b"}
+    assert w.loc["ev1", "totals_over__a"] == pytest.approx(1.9) and w.loc["ev1", "totals_point__a"] == 2.5
+    assert w.loc["ev1", "h2h_draw__b"] == 3.5
+    assert list(odds_flatten.wide(odds_flatten.flatten([])).columns) == ["event_id"]
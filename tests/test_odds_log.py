@@ -0,0 +1,28 @@
+import odds_flatten
+import odds_log
+
+
+def test_polls_append_then_compact_without_loss(tmp_path, monkeypatch):
+    monkeypatch.setattr(odds_log, "ROOT", tmp_path)
+    ev = odds_flatten._synthetic(2, 2)
+    a = odds_log.append_poll("soccer_epl", ev, "2024-08-16T10:00:00Z")
+    b = odds_log.append_poll("soccer_epl", ev, "2024-08-16T10:00:00.400Z")    # same second
+    c = odds_log.append_poll("soccer_epl", ev, "2024-08-17T09:00:00Z")
+    assert a != b and b.name == "poll_100000_1.parquet" and a.exists()
+    assert odds_log.append_poll("soccer_epl", [], "2024-08-16T11:00:00Z") is None
+    rows = 2 * 2 * 7                                     # events x books x outcomes (3 h2h + 2 + 2)
+    before = odds_log.load(sport_keys=["soccer_epl"])
+    assert len(before) == 3 * rows
+
+    notes = odds_log.compact(include_today=True)
+    assert len(notes) == 2 and not (tmp_path / "hourly" / "date=2024-08-16").exists()
+    after = odds_log.load(sport_keys=["soccer_epl"])
+    assert len(after) == 3 * rows
+    assert len(odds_log.load(start="2024-08-17", end="2024-08-17")) == rows
+    assert odds_log.load(sport_keys=["soccer_spain_la_liga"]).empty
+
+
+def test_compact_leaves_today_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(odds_log, "ROOT", tmp_path)
+    p = odds_log.append_poll("soccer_epl", odds_flatten._synthetic(1, 1))     # now
+    assert odds_log.compact() == [] and p.exists()
@@ -0,0 +1,47 @@
+import json
+import requests
+import openligadb_pull
+
+
+def test_season_snapshot_feeds_matches_and_goals(tmp_path):
+    m = {"matchID": 7, "group": {"groupOrderID": 1}, "matchDateTimeUTC": "2024-08-23T18:30:00Z",
+         "team1": {"teamName": "Borussia Mönchengladbach"}, "team2": {"teamName": "Bayer 04 Leverkusen"},
+         "matchResults": [{"resultTypeID": 1, "pointsTeam1": 0, "pointsTeam2": 2},
+                          {"resultTypeID": 2, "pointsTeam1": 2, "pointsTeam2": 3}],
+         "goals": [{"goalID": 1, "matchMinute": 12, "scoreTeam1": 0, "scoreTeam2": 1, "goalGetterName": "X"}]}
+    p = tmp_path / "bl1_2024.json"
+    p.write_text(json.dumps([m]))
+    matches, goals = openligadb_pull.matches_file(p), openligadb_pull.goals_file(p)
+    assert matches[["league", "season", "match_id"]].astype(str).values.tolist() == [["bl1", "2024", "7"]]
+    assert int(matches["ft_away_goals"].iloc[0]) == 3 and int(matches["ht_away_goals"].iloc[0]) == 2
+    assert goals["goal_id"].tolist() == [1] and int(goals["minute"].iloc[0]) == 12
+
+
+def test_sync_season_refetches_only_changed_matchdays(tmp_path, monkeypatch):
+    monkeypatch.setattr(openligadb_pull, "STORE", tmp_path)
+    monkeypatch.setattr(openligadb_pull, "get_json", lambda path: [{"groupOrderID": 1}, {"groupOrderID": 2}])
+    stamps = {1: "2024-08-25T10:00:00", 2: "2024-09-01T10:00:00"}
+    fetched = []
+
+    def fetch_all(calls):
+        out = []
+        for c in calls:
+            g = int(c["url"].rsplit("/", 1)[1])
+            r = requests.Response()
+            r.status_code = 200
+            if "getlastchangedate" in c["url"]:
+                r._content = json.dumps(stamps[g]).encode()
+            else:
+                fetched.append(g)
+                r._content = json.dumps([{"matchID": g * 10, "group": {"groupOrderID": g}}]).encode()
+            out.append(r)
+        return out
+    monkeypatch.setattr(openligadb_pull.http_client, "fetch_all", fetch_all)
+
+    matches, changed = openligadb_pull.sync_season("bl1", "2024")
+    assert changed == [1, 2] and [m["matchID"] for m in matches] == [10, 20]
+    matches, changed = openligadb_pull.sync_season("bl1", "2024")
+    assert changed == [] and len(matches) == 2
+    stamps[2] = "2024-09-02T08:00:00"                # a result was corrected
+    matches, changed = openligadb_pull.sync_season("bl1", "2024")
+    assert changed == [2] and fetched == [1, 2, 2]
@@ -0,0 +1,86 @@
+import json
+import pyarrow.parquet as pq
+import pytest
+import statsbomb_events
+
+
+def _shot(i):
+    return {"id": f"s{i}", "index": i, "period": 1, "minute": i, "second": 0, "type": {"name": "Shot"},
+            "team": {"id": 1, "name": "A"}, "location": [100.0, 40.0], "shot": {"statsbomb_xg": 0.1}}
+
+
+def test_truncated_file_leaves_no_rows(tmp_path):
+    good, bad = tmp_path / "1.json", tmp_path / "2.json"
+    good.write_text(json.dumps([_shot(1), _shot(2)]))
+    # two complete events, then the file breaks off mid-object
+    bad.write_text(json.dumps([_shot(3), _shot(4)])[:-1] + ', {"id": "s5", "type": {')
+    out = tmp_path / "out"
+    rows, failed = statsbomb_events.run([good, bad], out, procs=1)
+    assert rows["shots"] == 2 and len(failed) == 1
+    shots = pq.read_table(out / "shots" / "part-000.parquet")
+    assert shots["match_id"].to_pylist() == [1, 1]
+
+
+def test_crashed_run_keeps_previous_output(tmp_path, monkeypatch):
+    src = tmp_path / "1.json"
+    src.write_text(json.dumps([_shot(1)]))
+    out = tmp_path / "out"
+    statsbomb_events.run([src], out, procs=1)
+
+    def boom(*a):
+        raise RuntimeError("worker died")
+    monkeypatch.setattr(statsbomb_events, "flatten_files", boom)
+    with pytest.raises(RuntimeError):
+        statsbomb_events.run([src], out, procs=1)
+    assert pq.read_table(out / "shots" / "part-000.parquet").num_rows == 1
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []
+
+
+@pytest.mark.parametrize("text", [
+    "",                                     # empty file
+    "  \n",
+    json.dumps([_shot(1), _shot(2)])[:-1],  # closing ] missing
+    json.dumps([_shot(1), _shot(2)])[:-1] + ", ",
+])
+def test_iter_events_rejects_truncated_arrays(tmp_path, text):
+    p = tmp_path / "1.json"
+    p.write_text(text)
+    with pytest.raises(ValueError):
+        list(statsbomb_events.iter_events(p))
+
+
+def test_iter_events_reads_across_chunks(tmp_path, monkeypatch):
+    p = tmp_path / "1.json"
+    p.write_text(json.dumps([_shot(i) for i in range(50)]))
+    monkeypatch.setattr(statsbomb_events, "CHUNK", 64)
+    assert [e["index"] for e in statsbomb_events.iter_events(p)] == list(range(50))
+    p.write_text("[]")
+    assert list(statsbomb_events.iter_events(p)) == []
+
+
+def test_flatten_file_typed_tables(tmp_path):
+    events = [
+        _shot(1) | {"player": {"id": 7, "name": "P"}, "under_pressure": True,
+                    "shot": {"statsbomb_xg": 0.25, "end_location": [120.0, 38.0, 1.5], "outcome": {"name": "Goal"},
+                             "type": {"name": "Penalty"}, "first_time": True}},
+        {"id": "p1", "index": 2, "period": 1, "type": {"name": "Pass"}, "location": [60.0, 40.0],
+         "pass": {"recipient": {"id": 9, "name": "R"}, "length": 12.5, "end_location": [70.0, 30.0]}},
+        {"id": "c1", "index": 3, "type": {"name": "Carry"}, "location": [70.0], "carry": {}},
+        {"id": "x1", "index": 4, "type": {"name": "Ball Receipt*"}},
+        {"id": "r1", "index": 5, "type": {"name": "Pressure"}, "counterpress": True},
+    ]
+    p = tmp_path / "3788741.json"
+    p.write_text(json.dumps(events))
+    t = statsbomb_events.flatten_file(p)
+    assert {k: v.num_rows for k, v in t.items()} == {"shots": 1, "passes": 1, "carries": 1, "pressures": 1}
+    for name, schema in statsbomb_events.SCHEMAS.items():
+        assert t[name].schema == schema
+    shot = t["shots"].to_pylist()[0]
+    assert (shot["match_id"], shot["player_id"], shot["under_pressure"]) == (3788741, 7, True)
+    assert (shot["end_z"], shot["outcome"], shot["shot_type"], shot["first_time"]) == (1.5, "Goal", "Penalty", True)
+    assert shot["xg"] == pytest.approx(0.25)
+    ps = t["passes"].to_pylist()[0]
+    assert (ps["recipient"], ps["end_y"], ps["outcome"], ps["cross"]) == ("R", 30.0, None, False)
+    carry = t["carries"].to_pylist()[0]
+    assert (carry["x"], carry["y"], carry["end_x"]) == (70.0, None, None)     # short location -> nulls
+    assert t["pressures"]["counterpress"].to_pylist() == [True]
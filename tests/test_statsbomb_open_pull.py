@@ -0,0 +1,40 @@
+import requests
+import statsbomb_open_pull
+
+
+def test_manifest_skips_unchanged_entries(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    m = statsbomb_open_pull.CrawlManifest(path)
+    m.add("matches/2/27.json", 200, 100)
+    m.add("matches/2/27.json", 200, 100)    # refresh revalidated, same file
+    m.add("three-sixty/1.json", 404, 0)
+    m.add("three-sixty/1.json", 404, 0)
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+    m.add("matches/2/27.json", 200, 120)    # season list grew
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+    assert statsbomb_open_pull.CrawlManifest(path).done["matches/2/27.json"]["bytes"] == 120
+
+
+def test_mirror_resumes_from_manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(statsbomb_open_pull, "MIRROR", tmp_path / "open_data")
+    calls = []
+
+    def get(url, **kw):
+        calls.append(url)
+        r = requests.Response()
+        r.status_code, r._content = (404, b"") if "three-sixty" in url else (200, b"[1]")
+        return r
+    monkeypatch.setattr(statsbomb_open_pull.http_client, "get", get)
+    path = tmp_path / "open_data" / "manifest.jsonl"
+    m = statsbomb_open_pull.CrawlManifest(path)
+    assert statsbomb_open_pull.mirror_file("events/1.json", m) == "ok"
+    assert statsbomb_open_pull.mirror_file("three-sixty/1.json", m) == "missing"
+    assert (tmp_path / "open_data" / "events" / "1.json").read_bytes() == b"[1]"
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path": "events/2.js')             # killed mid-write
+    m = statsbomb_open_pull.CrawlManifest(path)
+    assert sorted(m.done) == ["events/1.json", "three-sixty/1.json"]
+    assert statsbomb_open_pull.mirror_file("events/1.json", m) == "resumed"
+    assert statsbomb_open_pull.mirror_file("three-sixty/1.json", m) == "resumed"
+    assert len(calls) == 2
@@ -0,0 +1,91 @@
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import table_io
+from table_io import read_dataset, write_dataset
+
+
+def test_dataset_round_trip_with_slash_season(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_io, "DATASET_DIR", tmp_path)
+    df = pd.DataFrame({
+        "provider": ["statsbomb", "statsbomb"],
+        "match_id": [1, 2],
+        "match_date_utc": pd.to_datetime(["2024-01-02T16:00:00Z", "2023-09-01T19:00:00Z"]),
+        "competition": ["Premier League", "Premier League"],
+        "season": ["2023/2024", "2023/2024"],
+        "home_team": ["Arsenal", "Chelsea"],
+    })
+    assert write_dataset(df, "statsbomb_matches", "2026-10-16", competition="competition", season="season",
+                         sort_by="match_date_utc") == 2
+
+    parts = list(tmp_path.rglob("part-0.parquet"))
+    assert len(parts) == 1
+    assert parts[0].parent.parent.name == "season=2023-2024"
+
+    back = read_dataset("statsbomb_matches")
+    assert sorted(back["match_id"]) == [1, 2]
+    assert set(back["season"]) == {"2023-2024"}
+    # a filter given the provider's own season name finds the escaped partition
+    assert len(read_dataset("statsbomb_matches", season="2023/2024")) == 2
+    assert len(read_dataset("statsbomb_matches", season="2022/2023")) == 0
+
+
+def test_kickoff_accepts_any_datetime_pair(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_io, "DATASET_DIR", tmp_path)
+    df = pd.DataFrame({
+        "provider": ["fdorg"] * 3,
+        "match_id": [1, 2, 3],
+        "kickoff_utc": pd.to_datetime(["2024-03-02T15:00:00Z", "2024-03-20T20:00:00Z", "2024-05-01T19:00:00Z"]),
+        "competition": ["PL"] * 3,
+        "season": ["2023"] * 3,
+    })
+    write_dataset(df, "fdorg_matches", "2024-05-02", competition="competition", season="season")
+    march = [("2024-03-01", "2024-04-01"),
+             (datetime(2024, 3, 1), datetime(2024, 4, 1)),
+             (np.datetime64("2024-03-01"), np.datetime64("2024-04-01")),
+             (date(2024, 3, 1), date(2024, 4, 1))]
+    for rng in march:
+        assert sorted(read_dataset("fdorg_matches", kickoff=rng)["match_id"]) == [1, 2], rng
+    two = [(datetime(2024, 3, 1), datetime(2024, 3, 10)), ("2024-04-30", "2024-05-02")]
+    assert sorted(read_dataset("fdorg_matches", kickoff=two)["match_id"]) == [1, 3]
+
+
+def test_write_frame_ipc_sibling_is_mapped_and_never_stale(tmp_path):
+    p = tmp_path / "t.parquet"
+    df = pd.DataFrame({"a": np.arange(5, dtype=np.int64), "b": list("vwxyz")})
+    table_io.write_frame(df, p, ipc=True)
+    assert table_io.ipc_path(p).exists()
+    t = table_io.open_table(p, columns=["a"])
+    assert t.column_names == ["a"] and t["a"].to_pylist() == [0, 1, 2, 3, 4]
+    pd.testing.assert_frame_equal(table_io.read_frame(p), df)
+    # a later Parquet-only write removes the sibling instead of leaving old rows to be mapped
+    table_io.write_frame(df.head(2), p, ipc=False)
+    assert not table_io.ipc_path(p).exists() and len(table_io.read_frame(p)) == 2
+    assert table_io.exists(p) and not table_io.exists(tmp_path / "u.parquet")
+
+
+def test_key_keeps_latest_snapshot_and_teams_filter(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_io, "DATASET_DIR", tmp_path)
+    def snap(goals):
+        return pd.DataFrame({
+            "provider": ["fdorg"] * 2,
+            "match_id": [1, 2],
+            "kickoff_utc": pd.to_datetime(["2024-03-02T15:00:00Z", "2024-03-03T15:00:00Z"]),
+            "home_team": ["Arsenal", "Chelsea"],
+            "away_team": ["Spurs", "Arsenal"],
+            "ft_home_goals": goals,
+            "competition": ["PL"] * 2,
+            "season": ["2023"] * 2,
+        })
+    write_dataset(snap([None, None]), "fdorg_matches", "2024-03-02", "competition", "season")
+    write_dataset(snap([2.0, 1.0]), "fdorg_matches", "2024-03-04", "competition", "season")
+    assert len(read_dataset("fdorg_matches")) == 4
+    latest = read_dataset("fdorg_matches", key="match_id", columns=["match_id", "ft_home_goals"])
+    assert list(latest.columns) == ["match_id", "ft_home_goals"]
+    assert sorted(latest["ft_home_goals"]) == [1.0, 2.0]
+    assert len(read_dataset("fdorg_matches", dates="2024-03-02")) == 2
+    assert sorted(read_dataset("fdorg_matches", teams="Spurs")["date"]) == ["2024-03-02", "2024-03-04"]
+    # re-running a date replaces only that date's partition
+    write_dataset(snap([3.0, 3.0]).head(1), "fdorg_matches", "2024-03-04", "competition", "season")
+    latest = read_dataset("fdorg_matches", key="match_id").set_index("match_id")
+    assert latest.loc[1, "ft_home_goals"] == 3.0 and np.isnan(latest.loc[2, "ft_home_goals"])
@@ -0,0 +1,51 @@
+import pandas as pd
+import team_resolver
+from team_resolver import TeamResolver, normalize
+
+ROWS = [
+    ("fdorg", "Manchester United FC", "Manchester United"),
+    ("fdorg", "Manchester City FC", "Manchester City"),
+    ("fdorg", "Leeds United FC", "Leeds United"),
+    ("fdorg", "Wolverhampton Wanderers FC", "Wolverhampton Wanderers"),
+    ("fdorg", "Nottingham Forest FC", "Nottingham Forest"),
+    ("football_data", "Spurs", "Tottenham Hotspur"),
+]
+
+
+def test_normalize_keys():
+    assert normalize("Brighton & Hove Albion FC") == "brighton and hove albion"
+    assert normalize("Nott'm Forest") == "nottingham forest"
+    assert normalize("Man Utd") == "manchester united"
+    assert normalize("Atlético de Madrid") == "atletico madrid"
+    assert normalize("FC") == "fc"            # never normalized to nothing
+    assert normalize(None) == normalize(float("nan")) == ""
+
+
+def test_resolve_exact_tokens_fuzzy_and_unmatched(tmp_path):
+    r = TeamResolver(ROWS)
+    assert r.resolve("Man Utd") == "Manchester United"
+    assert r.resolve("Nott'm Forest") == "Nottingham Forest"
+    assert r.resolve("Spurs", "football_data") == "Tottenham Hotspur"
+    assert r.resolve("Leeds") == "Leeds United"                   # unique token subset
+    assert r.resolve("Manchester") == "Manchester"                # two teams share the token
+    assert r.resolve("Wolverhamptn Wanderers") == "Wolverhampton Wanderers"   # trigram fuzzy
+    assert r.resolve("Real Sociedad") == "Real Sociedad"
+    assert r.resolve(None) is None
+    assert r.key("Man Utd") == r.key("Manchester United FC") == "manchester united"
+
+    rep = r.report().set_index("name")
+    assert rep.loc["Leeds", "method"] == "tokens"
+    assert rep.loc["Wolverhamptn Wanderers", "method"] == "fuzzy"
+    assert rep.loc["Wolverhamptn Wanderers", "score"] >= team_resolver.FUZZY_MIN
+    assert rep.loc["Manchester", "method"] == rep.loc["Real Sociedad", "method"] == "unmatched"
+    assert "Man Utd" not in rep.index                              # exact hits are not reported
+
+    df = pd.DataFrame({"home_team": ["Man Utd", "Leeds", None]})
+    assert r.canon(df, "home_team")["home_team_canonical"].tolist()[:2] == ["Manchester United", "Leeds United"]
+
+    path = tmp_path / "unmatched.csv"
+    r.write_report(path)
+    again = TeamResolver(ROWS)
+    again.resolve("Leeds")
+    again.write_report(path)                  # upserts by (source, name), never duplicates
+    assert sorted(pd.read_csv(path)["name"]) == ["Leeds", "Manchester", "Real Sociedad", "Wolverhamptn Wanderers"]
@@ -0,0 +1,35 @@
+import json
+import understat_pull
+
+
+def _hex(obj):
+    return "".join(f"\\x{ord(c):02x}" if c in "\"'{}[]:," else c for c in json.dumps(obj))
+
+
+def test_extract_json_payloads_decodes_known_vars():
+    players = [{"id": "1", "player_name": "Bukayo Saka", "xG": "12.3"}]
+    dates = [{"id": "1", "isResult": True, "xG": {"h": "1.2", "a": "0.4"}}]
+    html = ("<script>var teamsData = {};</script>"
+            f"<script>var datesData\t= JSON.parse('{_hex(dates)}');</script>"
+            f"<script>var playersData = JSON.parse('{_hex(players)}');</script>")
+    payload = understat_pull.extract_json_payloads(html)
+    assert sorted(payload) == ["datesData", "playersData"]
+    assert payload["datesData"] == dates
+    assert understat_pull.pick_players_table(payload)["player_name"].tolist() == ["Bukayo Saka"]
+
+
+def test_nuxt_players_found_breadth_first():
+    nuxt = {"data": [{"league": {"meta": {"rows": [{"x": 1}]},
+                                 "stats": {"players": [{"player": "Saka", "xG": 12.3}]}}}]}
+    html = f"<script>window.__NUXT__ = {json.dumps(nuxt)};</script>"
+    payload = understat_pull.extract_json_payloads(html)
+    assert understat_pull.pick_players_table(payload)["player"].tolist() == ["Saka"]
+
+
+def test_find_players_list_is_bounded():
+    deep = cur = {}
+    for _ in range(10):
+        cur["next"] = cur = {}
+    cur["players"] = [{"xG": 1}]
+    assert understat_pull._find_players_list(deep) is None
+    assert understat_pull._find_players_list(deep, max_depth=12) == [{"xG": 1}]
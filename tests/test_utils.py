@@ -0,0 +1,66 @@
+import gzip
+import pytest
+import utils
+
+
+@pytest.fixture
+def raw(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(utils, "RAW_CATALOG", False)
+    return tmp_path / utils.DATA_DIR
+
+
+@pytest.mark.parametrize("fmt,suffix,magic", [("gzip", ".json.gz", b"\x1f\x8b"),
+                                              ("zstd", ".json.zst", b"\x28\xb5\x2f\xfd"),
+                                              ("json", ".json", b'{"')])
+def test_dump_json_round_trip_per_format(raw, monkeypatch, fmt, suffix, magic):
+    monkeypatch.setattr(utils, "RAW_FORMAT", fmt)
+    obj = {"événement": [1, 2.5, None], "n": 3}
+    p = utils.dump_json("src", "odds_x.json", obj)
+    assert p.name == "odds_x" + suffix and p.read_bytes().startswith(magic)
+    assert utils.read_json(p) == obj
+    with utils.open_snapshot(p) as f:
+        assert utils.decode_json(f.read()) == obj
+    assert utils.json_stem(p.name) == "odds_x"
+
+
+def test_gzip_snapshots_are_byte_identical(raw, monkeypatch):
+    monkeypatch.setattr(utils, "RAW_FORMAT", "gzip")
+    a = utils.dump_json("src", "a.json", {"k": 1}).read_bytes()
+    b = utils.dump_json("src", "b.json", {"k": 1}).read_bytes()
+    assert a == b and gzip.decompress(a) == b'{"k":1}'
+
+
+def test_dump_json_stream_writes_a_json_array(raw):
+    p = utils.dump_json_stream("src", "events_1.json", ({"i": i} for i in range(3)))
+    assert utils.read_json(p) == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert utils.load_manifest(p.parent)[p.name]["bytes"] == len(b'[{"i":0},{"i":1},{"i":2}]')
+
+
+def test_dedup_stores_each_payload_once(raw, monkeypatch):
+    monkeypatch.setattr(utils, "RAW_DEDUP", True)
+    a = utils.dump_json("odds_api", "odds_soccer_epl.json", [{"id": "ev1"}])
+    b = utils.dump_json("odds_api", "odds_soccer_epl_copy.json", [{"id": "ev1"}])
+    c = utils.dump_json("odds_api", "odds_other.json", [{"id": "ev2"}])
+    assert not a.exists() and not b.exists()            # only manifest entries in the dated dir
+    blobs = [p for p in (raw / "_blobs").rglob("*") if p.is_file()]
+    assert len(blobs) == 2
+    m = utils.load_manifest(a.parent)
+    assert m[a.name]["blob"] == m[b.name]["blob"] != m[c.name]["blob"]
+    assert utils.read_json(b) == [{"id": "ev1"}] and utils.snapshot_sha256(a) == m[a.name]["sha256"]
+    assert [p.name for p in utils.iter_json_files(a.parent, "odds_soccer_*")] == [a.name, b.name]
+
+
+def test_inputs_unchanged_until_a_payload_or_output_changes(raw, tmp_path):
+    p = utils.dump_json("fdorg", "matches_PL.json", {"matches": [1]})
+    out = tmp_path / "out.parquet"
+    out.write_bytes(b"x")
+    same, digest = utils.inputs_unchanged("stage", [p], [out])
+    assert not same
+    utils.mark_inputs("stage", digest)
+    assert utils.inputs_unchanged("stage", [p], [out]) == (True, digest)
+    out.unlink()
+    assert not utils.inputs_unchanged("stage", [p], [out])[0]      # output gone: recompute
+    out.write_bytes(b"x")
+    utils.dump_json("fdorg", "matches_PL.json", {"matches": [1, 2]})
+    assert not utils.inputs_unchanged("stage", [p], [out])[0]
@@ -0,0 +1,56 @@
+import json
+import pandas as pd
+import pytest
+import xg_aggregate
+
+
+def _shot(i, team, xg):
+    return {"id": f"s{i}", "index": i, "type": {"name": "Shot"}, "team": {"id": 1, "name": team},
+            "shot": {"statsbomb_xg": xg, "type": {"name": "Open Play"}}}
+
+
+def test_update_cache_skips_broken_files_and_retries_them(tmp_path, monkeypatch):
+    good, bad = tmp_path / "1.json", tmp_path / "2.json"
+    good.write_text(json.dumps([_shot(1, "A", 0.25), _shot(2, "A", 0.5)]))
+    bad.write_text(json.dumps([_shot(3, "B", 0.1)])[:-1])      # truncated
+    monkeypatch.setattr(xg_aggregate, "statsbomb_event_files", lambda: [good, bad])
+    monkeypatch.setattr(xg_aggregate, "CACHE", tmp_path / "cache" / "match_team_xg.parquet")
+
+    teams, n_new, failed = xg_aggregate.update_cache()
+    assert n_new == 1 and len(failed) == 1 and str(bad) in failed[0]
+    assert teams[["match_id", "team"]].values.tolist() == [[1, "A"]]
+    assert float(teams["xg"].iloc[0]) == 0.75
+
+    bad.write_text(json.dumps([_shot(3, "B", 0.1)]))           # fixed upstream
+    teams, n_new, failed = xg_aggregate.update_cache()
+    assert n_new == 1 and failed == []
+    assert sorted(teams["match_id"].astype(int)) == [1, 2]
+
+
+def test_team_xg_sums_per_match_and_team():
+    shots = pd.DataFrame({
+        "match_id": [1, 1, 1, 1, 2],
+        "team": ["A", "B", "A", "A", "A"],
+        "xg": [0.1, 0.3, 0.76, None, 0.2],
+        "shot_type": ["Open Play", "Open Play", "Penalty", "Open Play", "Free Kick"],
+    })
+    out = xg_aggregate.team_xg(shots)
+    assert out[["match_id", "team"]].values.tolist() == [[1, "A"], [1, "B"], [2, "A"]]   # first-seen order
+    assert out["xg"].tolist() == pytest.approx([0.86, 0.3, 0.2])
+    assert out["npxg"].tolist() == pytest.approx([0.1, 0.3, 0.2])       # penalty excluded, missing xG = 0
+    assert out["shots"].tolist() == [3, 1, 1]
+    assert list(xg_aggregate.team_xg(shots.head(0)).columns) == ["match_id", "team", "xg", "npxg", "shots"]
+
+
+def test_attach_fills_only_missing_xg_by_normalized_key():
+    xg = pd.DataFrame({"match_date_utc": ["2024-03-02T15:00:00Z"], "home_team": ["Arsenal FC"],
+                       "away_team": ["Chelsea"], "xg_home": [1.8], "xg_away": [0.6]})
+    df = pd.DataFrame({"match_date_utc": ["2024-03-02T12:30:00Z", "2024-03-02T15:00:00Z", "2024-03-03T15:00:00Z"],
+                       "home_team": ["Arsenal", "Spurs", "Arsenal"], "away_team": ["Chelsea", "Chelsea", "Chelsea"],
+                       "xg_home": [None, 0.9, None]})
+    out = xg_aggregate.attach(df, xg)
+    assert out["xg_home"].tolist()[:2] == [1.8, 0.9] and out["xg_away"].tolist()[0] == 0.6
+    assert out[["xg_home", "xg_away"]].iloc[2].isna().all()       # another day: no match
+    assert out["xg_away"].dtype == "float64"
+    none = xg_aggregate.attach(df.drop(columns="xg_home"), xg.head(0))
+    assert none[["xg_home", "xg_away"]].isna().all().all()